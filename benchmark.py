@@ -3,6 +3,20 @@ import pathlib
 import sys
 from src.solvers.solver_type import SudokuSolverType
 from src.model.grid import SudokuGrid
+from src.model.loading import load_many
+from src.solvers.auto_solver import (
+    SELECTABLE_SOLVERS,
+    SELECTION_PATH,
+    PuzzleFeatures,
+    fit_selection,
+    save_selection,
+)
+from src.solvers.batch import SolveStatus, solve_many
+from src.solvers.scheduler import solve_within
+from src.solvers.sat_solver import SatSudokuSolver, SudokuCNF
+from src.solvers.sat_backend import PROFILE_PATH, SatBackend, save_profile
+from src.solvers.cnf_cache import CNFCache
+from src.solvers.vectorized_cnf import VectorizedSudokuCNF
 from timeit import default_timer as timer
 
 
@@ -35,6 +49,48 @@ def parse_arguments() -> argparse.Namespace:
         default=10,
         help="how many times do we repeat an experiment",
     )
+    arg_parser.add_argument(
+        "--encoders",
+        action="store_true",
+        help="compare the SAT encoders instead of the solvers",
+    )
+    arg_parser.add_argument(
+        "--cnf-cache",
+        dest="cnf_cache",
+        type=pathlib.Path,
+        default=None,
+        help="directory caching the SAT encodings between runs",
+    )
+    arg_parser.add_argument(
+        "--presolve",
+        action="store_true",
+        help="reduce the puzzles by constraint propagation before solving",
+    )
+    arg_parser.add_argument(
+        "--tune-sat",
+        dest="tune_sat",
+        action="store_true",
+        help=f"pick the fastest SAT backend per size, save it in {PROFILE_PATH}",
+    )
+    arg_parser.add_argument(
+        "--fit-auto",
+        dest="fit_auto",
+        action="store_true",
+        help=f"time the solvers chosen by AUTO, save the selection in {SELECTION_PATH}",
+    )
+    arg_parser.add_argument(
+        "--deadline",
+        type=float,
+        default=None,
+        help="count the puzzles each solver solves within a shared budget (in seconds)",
+    )
+    arg_parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=1,
+        help="number of processes solving the puzzles in parallel",
+    )
     arg_parser.add_argument(
         "puzzle_paths",
         type=pathlib.Path,
@@ -44,33 +100,186 @@ def parse_arguments() -> argparse.Namespace:
     return arg_parser.parse_args()
 
 
-def get_puzzle(filepath: pathlib.Path) -> SudokuGrid:
-    with open(filepath) as f:
-        lines = f.readlines()
-    return SudokuGrid.from_text(lines)
+def benchmark_encoders(puzzles: list[SudokuGrid], repetitions: int) -> None:
+    """
+    Compares the object-based and the vectorized SAT encoders
+    and prints the average encoding time per grid size.
+
+    Parameters
+    -----------
+    puzzles: list[SudokuGrid]
+        puzzles to be encoded
+    repetitions: int
+        how many times is every puzzle encoded
+    """
+    took: dict[int, dict[str, float]] = {}
+    for puzzle in puzzles:
+        for name, encode in (
+            ("objects", SudokuCNF.encode),
+            ("vectorized", VectorizedSudokuCNF.encode),
+        ):
+            start = timer()
+            for _ in range(repetitions):
+                encode(puzzle)
+            size_took = took.setdefault(puzzle.size, {})
+            size_took[name] = size_took.get(name, 0.0) + (timer() - start)
+
+    for size, size_took in sorted(took.items()):
+        speed_up = size_took["objects"] / size_took["vectorized"]
+        print(
+            f"{size}x{size}: \tobjects {size_took['objects'] / repetitions:.4f} sec"
+            f"\tvectorized {size_took['vectorized'] / repetitions:.4f} sec"
+            f"\tspeed-up {speed_up:.1f}x"
+        )
+
+
+def tune_sat_backends(
+    puzzles: list[SudokuGrid], time_limit: float, repetitions: int
+) -> dict[int, SatBackend]:
+    """
+    Times every interruptible SAT backend on the puzzles
+    and picks the fastest one for every grid size.
+    A backend failing or timing out on a puzzle is not picked for its size.
+
+    Parameters
+    -----------
+    puzzles: list[SudokuGrid]
+        puzzles to be solved
+    time_limit: float
+        time limit for solving a single puzzle (in seconds)
+    repetitions: int
+        how many times is every puzzle solved
+
+    Returns
+    --------
+    backends: dict[int, SatBackend]
+        the fastest backend for every grid size
+    """
+    took: dict[int, dict[SatBackend, float]] = {}
+    for backend in SatBackend:
+        if not backend.supports_interrupt:
+            continue
+        for puzzle in puzzles:
+            size_took = took.setdefault(puzzle.size, {})
+            if size_took.get(backend) == float("inf"):
+                continue
+            try:
+                start = timer()
+                for _ in range(repetitions):
+                    solution = SatSudokuSolver.solve(
+                        puzzle, time_limit, backend=backend
+                    )
+                    if solution is None:
+                        raise ValueError("no solution")
+                spent = (timer() - start) / repetitions
+            except (TimeoutError, ValueError):
+                spent = float("inf")
+            size_took[backend] = size_took.get(backend, 0.0) + spent
+
+    backends = {}
+    for size, size_took in sorted(took.items()):
+        best = min(size_took, key=lambda backend: size_took[backend])
+        backends[size] = best
+        print(f"{size}x{size}: \t{best} \t{size_took[best]:.4f} sec")
+    return backends
+
+
+def time_selectable_solvers(
+    puzzles: list[SudokuGrid], time_limit: float, repetitions: int
+) -> list[tuple[PuzzleFeatures, dict[str, float]]]:
+    """
+    Times every solver the AUTO solver chooses from on every puzzle.
+    A solver failing or timing out on a puzzle gets an infinite time.
+
+    Parameters
+    -----------
+    puzzles: list[SudokuGrid]
+        puzzles to be solved
+    time_limit: float
+        time limit for solving a single puzzle (in seconds)
+    repetitions: int
+        how many times is every puzzle solved
+
+    Returns
+    --------
+    timings: list[tuple[PuzzleFeatures, dict[str, float]]]
+        features of every puzzle with the average times of the solvers
+    """
+    timings = []
+    for puzzle in puzzles:
+        took = {}
+        for name, solver_class in SELECTABLE_SOLVERS.items():
+            try:
+                start = timer()
+                for _ in range(repetitions):
+                    if solver_class.solve(puzzle, time_limit) is None:
+                        raise ValueError("no solution")
+                took[name] = (timer() - start) / repetitions
+            except Exception:
+                took[name] = float("inf")
+        features = PuzzleFeatures.of(puzzle)
+        timings.append((features, took))
+        best = min(took, key=lambda name: took[name])
+        print(f"{puzzle.size}x{puzzle.size} \t{features.fill_ratio:.2f}: \t{best}")
+    return timings
 
 
 def main() -> int:
     args = parse_arguments()
-    puzzles = [get_puzzle(puzzle_path) for puzzle_path in args.puzzle_paths]
+    puzzles = load_many(args.puzzle_paths)
     results = {}
 
+    if args.encoders:
+        benchmark_encoders(puzzles, args.repetitions)
+        return 0
+
+    if args.tune_sat:
+        save_profile(tune_sat_backends(puzzles, args.time_limit, args.repetitions))
+        return 0
+
+    if args.deadline is not None:
+        for solver_type in SudokuSolverType:
+            statuses = [
+                result.status
+                for result in solve_within(
+                    puzzles,
+                    solver_type,
+                    args.deadline,
+                    workers=args.workers,
+                    presolve=args.presolve,
+                )
+            ]
+            solved = statuses.count(SolveStatus.SOLVED)
+            print(f"{solver_type}: \t{solved}/{len(statuses)} solved")
+        return 0
+
+    if args.fit_auto:
+        timings = time_selectable_solvers(puzzles, args.time_limit, args.repetitions)
+        save_selection(fit_selection(timings))
+        return 0
+
     for solver_type in SudokuSolverType:
-        try:
-            start = timer()
-            for puzzle, _ in zip(puzzles, range(args.repetitions)):
-                solution = solver_type.solve(puzzle, args.time_limit)
-                if solution is None:
-                    results[solver_type] = "failure"
-            took = timer() - start
-            average_took = took / args.repetitions
-            results[solver_type] = average_took
-        except TimeoutError:
+        options: dict = {"presolve": args.presolve}
+        if solver_type == SudokuSolverType.SAT and args.cnf_cache is not None:
+            options["cache"] = CNFCache(args.cnf_cache)
+        start = timer()
+        statuses = {
+            result.status
+            for result in solve_many(
+                puzzles[: args.repetitions],
+                solver_type,
+                args.time_limit,
+                workers=args.workers,
+                **options,
+            )
+        }
+        took = timer() - start
+        if SolveStatus.TIMEOUT in statuses:
             results[solver_type] = "timeout"
-            continue
-        except Exception:
+        elif statuses - {SolveStatus.SOLVED}:
             results[solver_type] = "failure"
-            continue
+        else:
+            results[solver_type] = took / args.repetitions
 
     good_results = sorted(
         [
@@ -0,0 +1,166 @@
+import argparse
+from collections import Counter
+import contextlib
+import sys
+from typing import TextIO
+from src.model.loading import PuzzleFormat, read_puzzles
+from src.solvers.batch import solve_stream
+from src.solvers.solver_type import SudokuSolverType
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parses the command line arguments.
+    Run `python solve.py -h` to learn about them.
+
+    Returns
+    --------
+    parsed_args: argparse.Namespace
+        parsed arguments
+    """
+    arg_parser = argparse.ArgumentParser(
+        prog="sudolver-solve",
+        description="Solves a stream of puzzles, writing a JSON line per puzzle.",
+    )
+    arg_parser.add_argument(
+        "input",
+        type=argparse.FileType("r"),
+        nargs="?",
+        default=sys.stdin,
+        help="the file with the puzzles, by default the standard input",
+    )
+    arg_parser.add_argument(
+        "--output",
+        "-o",
+        type=argparse.FileType("w"),
+        default=sys.stdout,
+        help="the file for the results, by default the standard output",
+    )
+    arg_parser.add_argument(
+        "--format",
+        "-f",
+        dest="puzzle_format",
+        type=PuzzleFormat,
+        choices=list(PuzzleFormat),
+        default=PuzzleFormat.AUTO,
+        help="layout of the puzzles: grids one after another or a puzzle per line",
+    )
+    arg_parser.add_argument(
+        "--solver",
+        "-s",
+        type=SudokuSolverType,
+        choices=list(SudokuSolverType),
+        default=SudokuSolverType.SAT,
+        help="the solver used for every puzzle",
+    )
+    arg_parser.add_argument(
+        "--time-limit",
+        "-t",
+        dest="time_limit",
+        type=float,
+        default=10.0,
+        help="time limit for solving a single puzzle (in seconds)",
+    )
+    arg_parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=None,
+        help="number of the worker processes, by default the number of CPUs",
+    )
+    arg_parser.add_argument(
+        "--window",
+        type=int,
+        default=None,
+        help="the largest number of the puzzles in flight, bounds the memory use",
+    )
+    arg_parser.add_argument(
+        "--ordered",
+        action="store_true",
+        help="write the results in the order of the puzzles",
+    )
+    return arg_parser.parse_args()
+
+
+def solve(
+    lines: TextIO,
+    output: TextIO,
+    puzzle_format: PuzzleFormat,
+    solver_type: SudokuSolverType,
+    time_limit: float,
+    workers: int | None,
+    window: int | None,
+    ordered: bool,
+) -> Counter[str]:
+    """
+    Streams the puzzles through the solvers: they are read lazily,
+    at most `window` of them are in flight, and every result is written
+    as a JSON line (see `SolveResult.to_json`) as soon as it is ready.
+    A puzzle which cannot be parsed gets an `error` line with its line number.
+
+    Parameters
+    -----------
+    lines: TextIO
+        the stream of the puzzles
+    output: TextIO
+        the stream of the results
+    puzzle_format: PuzzleFormat
+        layout of the puzzles
+    solver_type: SudokuSolverType
+        the solver used for every puzzle
+    time_limit: float
+        time limit for solving a single puzzle (in seconds)
+    workers: int | None
+        number of the worker processes, by default the number of CPUs
+    window: int | None
+        the largest number of the puzzles in flight
+    ordered: bool
+        write the results in the order of the puzzles
+
+    Returns
+    --------
+    counts: Counter[str]
+        how many puzzles got every status
+    """
+    counts: Counter[str] = Counter()
+    results = solve_stream(
+        read_puzzles(lines, puzzle_format, strict=False),
+        solver_type,
+        time_limit,
+        workers=workers,
+        window=window,
+        ordered=ordered,
+    )
+    with contextlib.closing(results):
+        for result in results:
+            counts[result.status] += 1
+            output.write(result.to_json() + "\n")
+            output.flush()
+    return counts
+
+
+def main() -> int:
+    args = parse_arguments()
+    try:
+        counts = solve(
+            args.input,
+            args.output,
+            args.puzzle_format,
+            args.solver,
+            args.time_limit,
+            args.workers,
+            args.window,
+            args.ordered,
+        )
+    except ValueError as error:
+        print(f"{args.input.name}: {error}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        return 0
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    print(summary or "no puzzles", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
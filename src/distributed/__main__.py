@@ -0,0 +1,178 @@
+import argparse
+import pathlib
+import sys
+from typing import Sequence
+from src.distributed.coordinator import coordinate
+from src.distributed.work_queue import (
+    AUTHKEY,
+    DEFAULT_PORT,
+    LEASE_GRACE,
+    MAX_ATTEMPTS,
+)
+from src.distributed.worker import work
+from src.model.corpus import CORPUS_SUFFIX, PuzzleCorpus
+from src.model.grid import SudokuGrid
+from src.model.loading import load_many
+from src.solvers.solver_type import SudokuSolverType
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parses the command line arguments of the coordinator and the worker.
+    Run `python -m src.distributed coordinator -h`
+    and `python -m src.distributed worker -h` to learn about them.
+
+    Returns
+    --------
+    parsed_args: argparse.Namespace
+        parsed arguments
+    """
+    arg_parser = argparse.ArgumentParser(
+        prog="sudolver-distributed",
+        description="Solves a puzzle corpus on several machines.",
+    )
+    roles = arg_parser.add_subparsers(dest="role", required=True)
+
+    coordinator = roles.add_parser(
+        "coordinator", help="hands out the puzzles and collects the results"
+    )
+    coordinator.add_argument(
+        "puzzle_paths",
+        type=pathlib.Path,
+        nargs="+",
+        help=f"paths to the puzzle text files or to a single {CORPUS_SUFFIX} corpus",
+    )
+    coordinator.add_argument(
+        "--output",
+        "-o",
+        type=pathlib.Path,
+        required=True,
+        help="the results file to be written, a JSON line per puzzle",
+    )
+    coordinator.add_argument(
+        "--solver",
+        type=SudokuSolverType,
+        choices=list(SudokuSolverType),
+        default=SudokuSolverType.SAT,
+        help="the solver used for every puzzle",
+    )
+    coordinator.add_argument(
+        "--time-limit",
+        "-t",
+        type=float,
+        default=10.0,
+        help="time limit for solving a single puzzle (in seconds)",
+    )
+    coordinator.add_argument(
+        "--host",
+        type=str,
+        default="127.0.0.1",
+        help="host to listen on, by default this machine only; any other host "
+        "requires the SUDOKU_AUTHKEY environment variable",
+    )
+    coordinator.add_argument(
+        "--port",
+        "-p",
+        type=int,
+        default=DEFAULT_PORT,
+        help="TCP port to listen on",
+    )
+    coordinator.add_argument(
+        "--chunk-size",
+        type=int,
+        default=16,
+        help="how many puzzles are handed out to a worker at once",
+    )
+    coordinator.add_argument(
+        "--local-workers",
+        type=int,
+        default=0,
+        help="number of the single-process workers started on this machine",
+    )
+    coordinator.add_argument(
+        "--lease-grace",
+        type=float,
+        default=LEASE_GRACE,
+        help="how long (in seconds) past the time limit a worker may stay silent",
+    )
+    coordinator.add_argument(
+        "--max-attempts",
+        type=int,
+        default=MAX_ATTEMPTS,
+        help="how many times a chunk is handed out before it is given up",
+    )
+
+    worker = roles.add_parser("worker", help="solves the puzzles of a coordinator")
+    worker.add_argument(
+        "--connect",
+        "-c",
+        type=str,
+        required=True,
+        help="the coordinator as host:port",
+    )
+    worker.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=None,
+        help="number of the solving processes, by default the number of CPUs",
+    )
+    worker.add_argument(
+        "--name",
+        type=str,
+        default=None,
+        help="name of the worker in the results, by default host:pid",
+    )
+    return arg_parser.parse_args()
+
+
+def load_corpus(paths: list[pathlib.Path]) -> Sequence[SudokuGrid]:
+    """
+    Parameters
+    -----------
+    paths: list[pathlib.Path]
+        paths to the puzzle text files or to a single binary corpus
+
+    Returns
+    --------
+    puzzles: Sequence[SudokuGrid]
+        the puzzles, a memory-mapped corpus is not read up front
+    """
+    if len(paths) == 1 and paths[0].suffix == CORPUS_SUFFIX:
+        return PuzzleCorpus.open(paths[0])
+    return load_many(paths)
+
+
+def main() -> int:
+    args = parse_arguments()
+    match args.role:
+        case "coordinator":
+            try:
+                counts = coordinate(
+                    load_corpus(args.puzzle_paths),
+                    args.solver,
+                    args.time_limit,
+                    args.output,
+                    (args.host, args.port),
+                    AUTHKEY,
+                    args.chunk_size,
+                    args.local_workers,
+                    args.lease_grace,
+                    args.max_attempts,
+                )
+            except ValueError as error:
+                print(error, file=sys.stderr)
+                return 1
+            for status, count in sorted(counts.items()):
+                print(f"{status}: \t{count}")
+        case "worker":
+            host, _, port = args.connect.rpartition(":")
+            reported = work((host, int(port)), AUTHKEY, args.workers, args.name)
+            print(f"{reported} results reported")
+        case _:
+            raise NotImplementedError()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+from __future__ import annotations
+from collections import Counter
+import contextlib
+import ipaddress
+import multiprocessing
+from multiprocessing.managers import Server
+from pathlib import Path
+import socket
+import threading
+from typing import Sequence
+from src.distributed.work_queue import (
+    AUTHKEY,
+    DEFAULT_AUTHKEY,
+    DEFAULT_PORT,
+    LEASE_GRACE,
+    MAX_ATTEMPTS,
+    CoordinatorManager,
+    WorkQueue,
+)
+from src.distributed.worker import work
+from src.model.grid import SudokuGrid
+from src.solvers.batch import SolveResult, SolveStatus
+from src.solvers.solver_type import SudokuSolverType
+
+
+def coordinate(
+    puzzles: Sequence[SudokuGrid],
+    solver_type: SudokuSolverType,
+    time_limit: float,
+    output: Path,
+    address: tuple[str, int] = ("127.0.0.1", DEFAULT_PORT),
+    authkey: bytes = AUTHKEY,
+    chunk_size: int = 16,
+    local_workers: int = 0,
+    lease_grace: float = LEASE_GRACE,
+    max_attempts: int = MAX_ATTEMPTS,
+    **options,
+) -> Counter[SolveStatus]:
+    """
+    Solves a corpus on the workers connecting to this coordinator
+    (see `src.distributed.worker.work`) and writes all the results
+    into a single file, a JSON line per puzzle in the order they arrive:
+
+    ```
+    {"index": 7, "status": "solved", "elapsed": 0.01, "solution": [[...], ...],
+     "worker": "node2:4242"}
+    ```
+
+    (see `SolveResult.to_json`), the worker is empty for the puzzles given up.
+
+    Usage
+    -----
+        `python -m src.distributed coordinator puzzles/*.txt -o results.jsonl`
+        `python -m src.distributed worker --connect coordinator-host:50123`
+
+    Parameters
+    -----------
+    puzzles: Sequence[SudokuGrid]
+        the corpus, e.g. a list or a `PuzzleCorpus`
+    solver_type: SudokuSolverType
+        the solver used for every puzzle
+    time_limit: float
+        amount of time (in seconds) available for every puzzle
+    output: Path
+        a path of the results file
+    address: tuple[str, int]
+        the host and the port to listen on, port `0` picks a free one;
+        the manager protocol unpickles what it receives, so a host other
+        than the loopback requires a key of its own (see `SUDOKU_AUTHKEY`)
+    authkey: bytes
+        key authenticating the workers
+    chunk_size: int
+        how many puzzles are handed out at once
+    local_workers: int
+        number of the worker processes started on this machine,
+        each solving a puzzle at a time, they are killed once
+        every puzzle has a result
+    lease_grace: float
+        how long (in seconds) past the time limit a worker may stay silent
+    max_attempts: int
+        how many times a chunk is handed out
+    **options: Any
+        options passed to `solver_type.solve`, they are sent to the workers
+
+    Returns
+    --------
+    counts: Counter[SolveStatus]
+        how many puzzles got every status
+
+    Raises
+    -------
+    value_error: ValueError
+        when listening on a host other than the loopback
+        with the default `authkey`
+    """
+    if authkey == DEFAULT_AUTHKEY and not _is_loopback(address[0]):
+        raise ValueError(
+            f"listening on {address[0] or 'every interface'} requires "
+            "a key of its own, set the SUDOKU_AUTHKEY environment variable"
+        )
+    counts: Counter[SolveStatus] = Counter()
+    with open(output, "w") as results:
+
+        def on_result(result: SolveResult, worker: str) -> None:
+            counts[result.status] += 1
+            results.write(result.to_json(worker=worker) + "\n")
+            results.flush()
+
+        queue = WorkQueue(
+            puzzles,
+            solver_type,
+            time_limit,
+            chunk_size,
+            on_result,
+            lease_grace,
+            max_attempts,
+            options,
+        )
+        if queue.finished():
+            return counts
+        CoordinatorManager.register("work_queue", callable=lambda: queue)
+        server = CoordinatorManager(address, authkey).get_server()
+        server.stop_event = threading.Event()
+        accepter = threading.Thread(target=_accept, args=(server,), daemon=True)
+        accepter.start()
+
+        context = multiprocessing.get_context()
+        host, port = server.address
+        local_address = ("127.0.0.1", port) if host == "0.0.0.0" else (host, port)
+        workers = [
+            context.Process(target=work, args=(local_address, authkey, 1))
+            for _ in range(local_workers)
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            queue.wait()
+        finally:
+            _stop(server, accepter, local_address)
+            for worker in workers:
+                worker.kill()
+                worker.join()
+    return counts
+
+
+def _is_loopback(host: str) -> bool:
+    """
+    Parameters
+    -----------
+    host: str
+        a host name or an IP address, `""` stands for every interface
+
+    Returns
+    --------
+    loopback: bool
+        whether every address of the host is a loopback one
+    """
+    if not host:
+        return False
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, 0)}
+    except socket.gaierror:
+        return False
+    return all(ipaddress.ip_address(address).is_loopback for address in addresses)
+
+
+def _accept(server: Server) -> None:
+    """
+    Serves the connecting workers until `server.stop_event` is set.
+    Unlike `Server.serve_forever` it returns once stopped (see `_stop`),
+    so the listening socket can be closed and its port reused.
+
+    Parameters
+    -----------
+    server: Server
+        the manager server of the coordinator
+    """
+    while not server.stop_event.is_set():
+        try:
+            connection = server.listener.accept()
+        except OSError:
+            continue
+        if server.stop_event.is_set():
+            connection.close()
+            return
+        threading.Thread(
+            target=server.handle_request, args=(connection,), daemon=True
+        ).start()
+
+
+def _stop(server: Server, accepter: threading.Thread, address: tuple[str, int]) -> None:
+    """
+    Stops serving the workers and closes the listening socket.
+
+    Parameters
+    -----------
+    server: Server
+        the manager server of the coordinator
+    accepter: threading.Thread
+        the thread running `_accept`
+    address: tuple[str, int]
+        an address the server can be reached at from this machine
+    """
+    server.stop_event.set()
+    # wakes the accepter up, it is blocked in `accept` until a connection comes
+    with contextlib.suppress(OSError):
+        socket.create_connection(address, timeout=1.0).close()
+    accepter.join()
+    server.listener.close()
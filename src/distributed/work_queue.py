@@ -0,0 +1,313 @@
+from __future__ import annotations
+from collections import deque
+from dataclasses import dataclass
+from itertools import batched
+import math
+from multiprocessing.managers import BaseManager
+import os
+import threading
+from timeit import default_timer as timer
+from typing import Callable, Sequence
+from src.model.grid import SudokuGrid
+from src.solvers.batch import SolveResult, SolveStatus
+from src.solvers.solver_type import SudokuSolverType
+
+
+DEFAULT_PORT = 50123
+"""TCP port the coordinator listens on by default"""
+
+DEFAULT_AUTHKEY = b"sudolver"
+"""key authenticating the workers unless the SUDOKU_AUTHKEY environment
+   variable is set, it is public, so it is accepted on the loopback only"""
+
+AUTHKEY = os.environb.get(b"SUDOKU_AUTHKEY", DEFAULT_AUTHKEY)
+"""key authenticating the workers"""
+
+LEASE_GRACE = 30.0
+"""how long (in seconds) past the time limit of a puzzle a worker may stay
+   silent before its chunk is considered lost and handed out again"""
+
+MAX_ATTEMPTS = 3
+"""how many times a chunk is handed out before its puzzles are given up"""
+
+
+class CoordinatorManager(BaseManager):
+    """
+    Serves the `WorkQueue` of a coordinator to the workers.
+    The workers connect with the same class, calling `work_queue()`
+    to get a proxy of the queue.
+    """
+
+
+@dataclass(slots=True)
+class _Chunk:
+    """
+    A part of the corpus handed out to the workers as a whole.
+
+    Attributes:
+    -----------
+    id: int
+        identifier of the chunk
+    remaining: list[int]
+        indices of the puzzles without a result yet
+    attempts: int
+        how many times the chunk has been handed out
+    worker: str | None
+        name of the worker holding the chunk, `None` while waiting
+    deadline: float
+        when the lease of the worker expires, unless it reports a result
+    """
+
+    id: int
+    remaining: list[int]
+    attempts: int = 0
+    worker: str | None = None
+    deadline: float = math.inf
+
+
+class WorkQueue:
+    """
+    The chunks of a corpus, handed out to the workers by a coordinator.
+
+    A worker takes a chunk, solves its puzzles and reports every result
+    as soon as it is ready. A chunk is leased to a single worker: every result
+    it reports renews the lease for another time limit plus `lease_grace`.
+    A chunk whose lease expires (the worker has died, hung or lost
+    the connection) is handed out again, with the puzzles still lacking
+    a result only. After `max_attempts` the remaining puzzles of the chunk
+    are given up with the `ERROR` status. A result reported for a puzzle
+    already having one is ignored, so a late worker cannot duplicate them.
+
+    The methods are called concurrently by the threads of the manager
+    serving the workers, a lock guards the whole state.
+
+    Attributes:
+    -----------
+    solver_type: SudokuSolverType
+        the solver used for every puzzle
+    time_limit: float
+        amount of time (in seconds) available for every puzzle
+    options: dict
+        options passed to `solver_type.solve`
+    lease_grace: float
+        how long (in seconds) past the time limit a worker may stay silent
+    max_attempts: int
+        how many times a chunk is handed out
+
+    Protected Attributes:
+    ---------------------
+    _puzzles: Sequence[SudokuGrid]
+        the corpus
+    _chunks: dict[int, _Chunk]
+        the chunks with puzzles lacking a result, by their identifiers
+    _waiting: deque[int]
+        identifiers of the chunks not held by any worker
+    _on_result: Callable[[SolveResult, str], None]
+        receives every result with the name of the worker
+    _lock: threading.Lock
+        guards the state of the queue
+    _done: threading.Event
+        set once every puzzle has a result
+    """
+
+    solver_type: SudokuSolverType
+    time_limit: float
+    options: dict
+    lease_grace: float
+    max_attempts: int
+    _puzzles: Sequence[SudokuGrid]
+    _chunks: dict[int, _Chunk]
+    _waiting: deque[int]
+    _on_result: Callable[[SolveResult, str], None]
+    _lock: threading.Lock
+    _done: threading.Event
+
+    def __init__(
+        self,
+        puzzles: Sequence[SudokuGrid],
+        solver_type: SudokuSolverType,
+        time_limit: float,
+        chunk_size: int,
+        on_result: Callable[[SolveResult, str], None],
+        lease_grace: float = LEASE_GRACE,
+        max_attempts: int = MAX_ATTEMPTS,
+        options: dict | None = None,
+    ):
+        """
+        Initialize the queue, splitting the corpus into chunks.
+
+        Parameters
+        -----------
+        puzzles: Sequence[SudokuGrid]
+            the corpus, e.g. a list or a `PuzzleCorpus`
+        solver_type: SudokuSolverType
+            the solver used for every puzzle
+        time_limit: float
+            amount of time (in seconds) available for every puzzle
+        chunk_size: int
+            how many puzzles are handed out at once
+        on_result: Callable[[SolveResult, str], None]
+            receives every result with the name of the worker
+        lease_grace: float
+            how long (in seconds) past the time limit a worker may stay silent
+        max_attempts: int
+            how many times a chunk is handed out
+        options: dict | None
+            options passed to `solver_type.solve`
+        """
+        if chunk_size < 1:
+            raise ValueError("a chunk must hold at least one puzzle")
+        self.solver_type = solver_type
+        self.time_limit = time_limit
+        self.options = options or {}
+        self.lease_grace = lease_grace
+        self.max_attempts = max_attempts
+        self._puzzles = puzzles
+        self._chunks = {
+            chunk_id: _Chunk(chunk_id, list(indices))
+            for chunk_id, indices in enumerate(batched(range(len(puzzles)), chunk_size))
+        }
+        self._waiting = deque(self._chunks)
+        self._on_result = on_result
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        if not self._chunks:
+            self._done.set()
+
+    def job(self) -> tuple[SudokuSolverType, float, dict]:
+        """
+        Returns
+        --------
+        job: tuple[SudokuSolverType, float, dict]
+            the solver, the time limit and the options of every puzzle
+        """
+        return self.solver_type, self.time_limit, self.options
+
+    def take(self, worker: str) -> tuple[int, list[tuple[int, SudokuGrid]]] | None:
+        """
+        Leases the next chunk to a worker.
+
+        Parameters
+        -----------
+        worker: str
+            name of the worker
+
+        Returns
+        --------
+        chunk: tuple[int, list[tuple[int, SudokuGrid]]] | None
+            the identifier of the chunk with the indices and the puzzles
+            (in the compact dtype) lacking a result,
+            `None` if no chunk is waiting at the moment (see `finished`)
+        """
+        with self._lock:
+            self._reclaim_expired()
+            while self._waiting:
+                chunk = self._chunks.get(self._waiting.popleft())
+                if chunk is None:
+                    continue
+                chunk.attempts += 1
+                chunk.worker = worker
+                chunk.deadline = timer() + self._lease()
+                puzzles = [
+                    (index, self._puzzles[index].compact()) for index in chunk.remaining
+                ]
+                return chunk.id, puzzles
+            return None
+
+    def report(self, worker: str, chunk_id: int, result: SolveResult) -> bool:
+        """
+        Records the result of a puzzle of a chunk and renews the lease.
+
+        Parameters
+        -----------
+        worker: str
+            name of the worker
+        chunk_id: int
+            identifier of the chunk of the puzzle
+        result: SolveResult
+            the result, `index` is the index of the puzzle in the corpus
+
+        Returns
+        --------
+        wanted: bool
+            whether the worker still holds the chunk,
+            otherwise it should drop the chunk
+        """
+        with self._lock:
+            chunk = self._chunks.get(chunk_id)
+            if chunk is None or result.index not in chunk.remaining:
+                return False
+            chunk.remaining.remove(result.index)
+            self._on_result(result, worker)
+            if not chunk.remaining:
+                self._finish(chunk)
+                return False
+            if chunk.worker != worker:
+                return False
+            chunk.deadline = timer() + self._lease()
+            return True
+
+    def finished(self) -> bool:
+        """
+        Returns
+        --------
+        finished: bool
+            whether every puzzle has a result
+        """
+        return self._done.is_set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        Waits until every puzzle has a result, checking the leases meanwhile.
+
+        Parameters
+        -----------
+        timeout: float | None
+            the longest time (in seconds) to wait, `None` to wait indefinitely
+
+        Returns
+        --------
+        finished: bool
+            whether every puzzle has a result
+        """
+        end = math.inf if timeout is None else timer() + timeout
+        while not self._done.wait(min(1.0, max(end - timer(), 0.0))):
+            if timer() >= end:
+                return False
+            with self._lock:
+                self._reclaim_expired()
+        return True
+
+    def _lease(self) -> float:
+        return self.time_limit + self.lease_grace
+
+    def _reclaim_expired(self) -> None:
+        """
+        Puts the chunks with expired leases back in the queue,
+        or gives them up after `max_attempts`.
+        """
+        now = timer()
+        for chunk in list(self._chunks.values()):
+            if chunk.worker is None or chunk.deadline >= now:
+                continue
+            if chunk.attempts >= self.max_attempts:
+                self._give_up(chunk)
+            else:
+                chunk.worker = None
+                chunk.deadline = math.inf
+                self._waiting.append(chunk.id)
+
+    def _give_up(self, chunk: _Chunk) -> None:
+        """
+        Reports the remaining puzzles of a chunk lost too many times as errors.
+        """
+        error = f"the chunk has been lost {chunk.attempts} times"
+        for index in chunk.remaining:
+            self._on_result(SolveResult(index, SolveStatus.ERROR, None, 0.0, error), "")
+        chunk.remaining.clear()
+        self._finish(chunk)
+
+    def _finish(self, chunk: _Chunk) -> None:
+        del self._chunks[chunk.id]
+        if not self._chunks:
+            self._done.set()
@@ -0,0 +1,86 @@
+from __future__ import annotations
+import contextlib
+from dataclasses import replace
+import os
+import socket
+import time
+from src.distributed.work_queue import AUTHKEY, CoordinatorManager
+from src.solvers.batch import solve_many
+
+
+IDLE_POLL = 0.5
+"""how long (in seconds) a worker waits before asking again
+   when every remaining chunk is held by the other workers"""
+
+
+def work(
+    address: tuple[str, int],
+    authkey: bytes = AUTHKEY,
+    processes: int | None = None,
+    name: str | None = None,
+) -> int:
+    """
+    Solves the chunks of a coordinator (see `src.distributed.coordinator`)
+    until every puzzle of its corpus has a result. Every result is reported
+    as soon as it is ready. A worker losing its chunk (e.g. after stalling
+    past its lease) drops the chunk and takes the next one.
+
+    Usage
+    -----
+        `python -m src.distributed worker --connect coordinator-host:50123 -w 8`
+
+    Parameters
+    -----------
+    address: tuple[str, int]
+        the host and the port of the coordinator
+    authkey: bytes
+        key authenticating the worker, the same as the one of the coordinator
+    processes: int | None
+        number of the processes solving the puzzles of a chunk,
+        by default the number of CPUs, see `solve_many`
+    name: str | None
+        name of the worker in the results, by default the host and the PID
+
+    Returns
+    --------
+    reported: int
+        number of the results reported by this worker
+    """
+    CoordinatorManager.register("work_queue")
+    manager = CoordinatorManager(address, authkey)
+    manager.connect()
+    queue = manager.work_queue()  # type: ignore[attr-defined]
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    reported = 0
+    try:
+        solver_type, time_limit, options = queue.job()
+        while not queue.finished():
+            chunk = queue.take(name)
+            if chunk is None:
+                time.sleep(IDLE_POLL)
+                continue
+            chunk_id, puzzles = chunk
+            indices = [index for index, _ in puzzles]
+            results = solve_many(
+                (puzzle for _, puzzle in puzzles),
+                solver_type,
+                time_limit,
+                workers=processes,
+                ordered=False,
+                **options,
+            )
+            with contextlib.closing(results):
+                for result in results:
+                    solution = result.solution
+                    result = replace(
+                        result,
+                        index=indices[result.index],
+                        solution=None if solution is None else solution.compact(),
+                    )
+                    reported += 1
+                    if not queue.report(name, chunk_id, result):
+                        break
+    except (EOFError, ConnectionError):
+        # the coordinator stops serving once every puzzle has a result
+        pass
+    return reported
@@ -0,0 +1,265 @@
+from __future__ import annotations
+import argparse
+from dataclasses import dataclass
+import os
+import pathlib
+import sys
+from typing import Iterable, Iterator
+import numpy as np
+import numpy.typing as npt
+from src.model.grid import SudokuGrid, compact_dtype
+from src.model.loading import load_many
+from src.utils.group_by import group_by
+
+
+CORPUS_MAGIC = b"SUDOKUS1"
+"""first bytes of every corpus file, the last one is the format version"""
+
+CORPUS_SUFFIX = ".sudokus"
+"""the usual extension of the corpus files"""
+
+ALIGNMENT = 64
+"""every group of grids starts at an offset divisible by this number of bytes"""
+
+_HEADER = np.dtype([("magic", "S8"), ("groups", "<u8")])
+"""the file header: the magic bytes and the number of the groups"""
+
+_GROUP = np.dtype(
+    [("size", "<u4"), ("itemsize", "<u4"), ("count", "<u8"), ("offset", "<u8")]
+)
+"""an entry of the group table following the header: the size of the grids,
+   the number of bytes per cell, the number of the grids and the offset
+   of the first of them in the file"""
+
+
+@dataclass(frozen=True, slots=True)
+class PuzzleCorpus:
+    """
+    A collection of puzzles stored in a compact binary file.
+    The grids of the same size are stacked into a single array of `uint8`
+    (or `uint16` for grids larger than 255x255, see `compact_dtype`),
+    so a cell takes 1 or 2 bytes instead of 8, and the file is memory-mapped
+    instead of being parsed: opening a corpus only reads its header,
+    the grids are paged in on their first use.
+
+    File layout (all the numbers are little-endian):
+
+    ```
+    header        magic "SUDOKUS1" (8 bytes), number of the groups (uint64)
+    group table   for every group: size (uint32), bytes per cell (uint32),
+                  number of the grids (uint64), offset of the grids (uint64)
+    grids         for every group: an array of shape (count, size, size),
+                  starting at an offset aligned to 64 bytes
+    ```
+
+    The puzzles are numbered group after group, by increasing size,
+    in the order they were written within a group.
+
+    Usage
+    -----
+        `PuzzleCorpus.write("corpus.sudokus", load_many("puzzles/*.txt"))`
+        `corpus = PuzzleCorpus.open("corpus.sudokus")`
+        `for puzzle in corpus: ...`
+        `grids = corpus.grids(9)  # shape (count, 9, 9)`
+
+    or from the command line:
+        `python -m src.model.corpus puzzles/*.txt --output corpus.sudokus`
+
+    Attributes:
+    -----------
+    groups: dict[int, npt.NDArray[np.unsignedinteger]]
+        read-only stacked grids of every size
+
+    Properties:
+    -----------
+    sizes: list[int]
+        sizes of the grids in the corpus
+    """
+
+    groups: dict[int, npt.NDArray[np.unsignedinteger]]
+
+    @property
+    def sizes(self) -> list[int]:
+        """
+        Returns
+        --------
+        sizes: list[int]
+            sizes of the grids in the corpus, in increasing order
+        """
+        return list(self.groups)
+
+    def grids(self, size: int) -> npt.NDArray[np.unsignedinteger]:
+        """
+        Returns all the grids of the given size without copying them.
+
+        Parameters
+        -----------
+        size: int
+            size of the grids
+
+        Returns
+        --------
+        grids: npt.NDArray[np.unsignedinteger]
+            a read-only array of shape (count, size, size),
+            empty if there are no such grids
+        """
+        if size not in self.groups:
+            return np.zeros((0, size, size), dtype=compact_dtype(size))
+        return self.groups[size]
+
+    def __len__(self) -> int:
+        return sum(len(grids) for grids in self.groups.values())
+
+    def __getitem__(self, index: int) -> SudokuGrid:
+        """
+        Returns a single puzzle of the corpus.
+
+        Parameters
+        -----------
+        index: int
+            number of the puzzle, negative numbers count from the end
+
+        Returns
+        --------
+        puzzle: SudokuGrid
+            a read-only view of the puzzle, see `SudokuGrid.copy`
+            to get a writable one
+        """
+        if index < 0:
+            index += len(self)
+        if index >= 0:
+            for grids in self.groups.values():
+                if index < len(grids):
+                    return SudokuGrid(grids[index])
+                index -= len(grids)
+        raise IndexError("puzzle index out of range")
+
+    def __iter__(self) -> Iterator[SudokuGrid]:
+        for grids in self.groups.values():
+            for grid in grids:
+                yield SudokuGrid(grid)
+
+    @staticmethod
+    def open(path: str | os.PathLike) -> PuzzleCorpus:
+        """
+        Memory-maps a corpus file.
+
+        Parameters
+        -----------
+        path: str | os.PathLike
+            a path of the corpus file
+
+        Returns
+        --------
+        corpus: PuzzleCorpus
+            the corpus viewing the file, the file stays mapped
+            as long as any of its grids is referenced
+
+        Raises
+        -------
+        value_error: ValueError
+            when the file is not a valid corpus
+        """
+        data = np.asarray(np.memmap(path, dtype=np.uint8, mode="r"))
+        if data.size < _HEADER.itemsize:
+            raise ValueError(f"{path} is not a puzzle corpus")
+        header = data[: _HEADER.itemsize].view(_HEADER)[0]
+        if header["magic"] != CORPUS_MAGIC:
+            raise ValueError(f"{path} is not a puzzle corpus")
+
+        table_end = _HEADER.itemsize + int(header["groups"]) * _GROUP.itemsize
+        if data.size < table_end:
+            raise ValueError(f"{path} is truncated")
+        table = data[_HEADER.itemsize : table_end].view(_GROUP)
+
+        groups = {}
+        for size, itemsize, count, offset in table.tolist():
+            dtype = np.dtype(f"<u{itemsize}")
+            end = offset + count * size * size * dtype.itemsize
+            if end > data.size:
+                raise ValueError(f"{path} is truncated")
+            grids = data[offset:end].view(dtype).reshape(count, size, size)
+            groups[size] = grids
+        return PuzzleCorpus(dict(sorted(groups.items())))
+
+    @staticmethod
+    def write(path: str | os.PathLike, puzzles: Iterable[SudokuGrid]) -> None:
+        """
+        Writes puzzles into a corpus file, the grids are grouped by size
+        and stored in the compact dtypes.
+
+        Parameters
+        -----------
+        path: str | os.PathLike
+            a path of the corpus file, overwritten if it exists
+        puzzles: Iterable[SudokuGrid]
+            the puzzles to be written
+        """
+        grouped = group_by(puzzles, lambda puzzle: puzzle.size)
+        groups = []
+        offset = _HEADER.itemsize + len(grouped) * _GROUP.itemsize
+        for size in sorted(grouped):
+            dtype = compact_dtype(size).newbyteorder("<")
+            grids = np.stack([puzzle[:, :] for puzzle in grouped[size]]).astype(dtype)
+            offset += -offset % ALIGNMENT
+            groups.append((size, dtype.itemsize, len(grids), offset, grids))
+            offset += grids.nbytes
+
+        header = np.array([(CORPUS_MAGIC, len(groups))], dtype=_HEADER)
+        table = np.array([group[:4] for group in groups], dtype=_GROUP)
+        with open(path, "wb") as f:
+            f.write(header.tobytes())
+            f.write(table.tobytes())
+            for *_, offset, grids in groups:
+                f.write(bytes(offset - f.tell()))
+                f.write(grids.tobytes())
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parses the command line arguments of the converter.
+    Run `python -m src.model.corpus -h` to learn about them.
+
+    Returns
+    --------
+    parsed_args: argparse.Namespace
+        parsed arguments
+    """
+    arg_parser = argparse.ArgumentParser(
+        prog="sudolver-corpus",
+        description="Converts puzzle text files into a binary corpus.",
+    )
+    arg_parser.add_argument(
+        "--output",
+        "-o",
+        type=pathlib.Path,
+        required=True,
+        help=f"the corpus file to be written, usually with the {CORPUS_SUFFIX} suffix",
+    )
+    arg_parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=None,
+        help="number of threads reading the text files",
+    )
+    arg_parser.add_argument(
+        "puzzle_paths",
+        type=pathlib.Path,
+        nargs="+",
+        help="paths to the puzzle text files",
+    )
+    return arg_parser.parse_args()
+
+
+def main() -> int:
+    args = parse_arguments()
+    PuzzleCorpus.write(args.output, load_many(args.puzzle_paths, args.workers))
+    corpus = PuzzleCorpus.open(args.output)
+    for size in corpus.sizes:
+        print(f"{size}x{size}: {len(corpus.grids(size))} puzzles")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
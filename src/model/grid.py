@@ -1,8 +1,33 @@
 from __future__ import annotations
 from dataclasses import dataclass
 import math
+import os
 import numpy as np
 import numpy.typing as npt
+from src.model.topology import GridTopology
+
+
+Candidates = npt.NDArray[np.bool_]
+"""Type representing candidates of the grid cells, a boolean array
+   of shape (size, size, size), `candidates[row, col, val - 1]` tells
+   whether `val` can still be put in the cell (row, col)"""
+
+
+def compact_dtype(size: int) -> np.dtype:
+    """
+    Returns the smallest unsigned type holding every value of a grid.
+
+    Parameters
+    -----------
+    size: int
+        size of the grid
+
+    Returns
+    --------
+    dtype: np.dtype
+        `uint8` for grids up to 255x255, `uint16` for larger ones
+    """
+    return np.dtype(np.uint8) if size <= np.iinfo(np.uint8).max else np.dtype(np.uint16)
 
 
 @dataclass(frozen=True, slots=True)
@@ -61,9 +86,14 @@ class SudokuGrid:
 
     Protected Attributes:
     ---------------------
-    _array: npt.NDArray[np.uint]
+    _array: npt.NDArray[np.unsignedinteger]
         Underlying representation of the grid.
-        Uses dtype=np.uint to ensure its values are non-negative integer numbers.
+        Uses an unsigned dtype to ensure its values are non-negative integer numbers,
+        `np.uint` by default, compact grids (see `compact`) use `uint8`/`uint16`.
+        A signed array given to the constructor is converted to `np.uint`,
+        provided it has no negative values.
+        It may be a read-only view, e.g. of a memory-mapped corpus
+        (see `src.model.corpus`), copies of the grid are always writable.
 
     Properties:
     -----------
@@ -71,6 +101,8 @@ class SudokuGrid:
         size of the grid
     block_size: int
         size of the single block
+    topology: GridTopology
+        precomputed structure of the grids of this size
 
     Methods:
     --------
@@ -86,19 +118,37 @@ class SudokuGrid:
         returns a block of the grid with the given index
     copy() -> SudokuGrid:
         returns a copy of the grid
+    compact() -> SudokuGrid:
+        returns a copy of the grid using the smallest dtype
+    value_counts() -> tuple[npt.NDArray, npt.NDArray, npt.NDArray]:
+        counts every value in every row, column and block
+    candidates(packed: bool = False) -> Candidates:
+        returns values which can be put in every cell
+    assign(candidates: Candidates, coords: tuple[int, int], value: int) -> None:
+        puts a value in a cell and updates the candidates
+    clear(candidates: Candidates, coords: tuple[int, int]) -> None:
+        empties a cell and updates the candidates
 
     Static Methods:
     ---------------
     from_text(lines: list[str]) -> SudokuGrid:
         creates the grid from a textual representation
+    from_file(path: str | os.PathLike) -> SudokuGrid:
+        reads the grid from a text file
     """
 
-    _array: npt.NDArray[np.uint]
+    _array: npt.NDArray[np.unsignedinteger]
 
     def __post_init__(self) -> None:
         rows, columns = self._array.shape
         if self._array.ndim != 2 or rows != columns or not math.sqrt(rows).is_integer():
             raise ValueError
+        if self._array.dtype.kind == "i":
+            if (self._array < 0).any():
+                raise ValueError
+            object.__setattr__(self, "_array", self._array.astype(np.uint))
+        elif self._array.dtype.kind != "u":
+            raise ValueError
 
     @property
     def size(self) -> int:
@@ -122,7 +172,19 @@ class SudokuGrid:
         size: int
             the size of a single block, e.g. 3 for a 9x9 grid.
         """
-        return int(math.sqrt(self._array.shape[0]))
+        return self.topology.block_size
+
+    @property
+    def topology(self) -> GridTopology:
+        """
+        Returns the precomputed structure of the grid.
+
+        Returns
+        --------
+        topology: GridTopology
+            the topology shared by all the grids of this size
+        """
+        return GridTopology.of(self._array.shape[0])
 
     def __getitem__(self, coords):
         """
@@ -192,10 +254,7 @@ class SudokuGrid:
         block_index: int
             index of the block the specified cell belongs to
         """
-        a = cell_column // self.block_size
-        b = cell_row // self.block_size
-        b *= self.block_size
-        return a+b
+        return int(self.topology.cell_blocks[cell_row, cell_column])
 
     def block(self, block_index: int) -> npt.NDArray[np.uint]:
         """
@@ -211,12 +270,11 @@ class SudokuGrid:
         block: npt.NDArray[np.uint]
             a numpy array with values from the specified block
         """
-        a = block_index
-        block_row = (block_index // self.block_size) * self.block_size
-        block_col = (block_index % self.block_size) * self.block_size
+        topology = self.topology
+        block_row, block_col = topology.block_corners[block_index]
         return self._array[
-               block_row : block_row + self.block_size,
-               block_col : block_col + self.block_size
+               block_row : block_row + topology.block_size,
+               block_col : block_col + topology.block_size
                ]
 
     def copy(self) -> SudokuGrid:
@@ -230,6 +288,133 @@ class SudokuGrid:
         """
         return SudokuGrid(self._array.copy())
 
+    def compact(self) -> SudokuGrid:
+        """
+        Creates a copy of the grid using the smallest dtype for its size
+        (see `compact_dtype`), e.g. 1 byte per cell instead of 8 for a 9x9 grid.
+
+        Returns
+        -------
+        copy: SudokuGrid
+            a compact copy of the current grid
+        """
+        return SudokuGrid(self._array.astype(compact_dtype(self.size)))
+
+    def value_counts(self) -> tuple[npt.NDArray, npt.NDArray, npt.NDArray]:
+        """
+        Counts every value in every row, column and block of the grid.
+        All the values must be at most the size of the grid.
+
+        Returns
+        --------
+        counts: tuple[npt.NDArray, npt.NDArray, npt.NDArray]
+            counts in the rows, columns and blocks, `counts[unit, val - 1]`
+            is the number of cells of the unit containing `val`
+        """
+        topology = self.topology
+        size = topology.size
+        grid = self._array.astype(np.intp)
+        counts = []
+        for units in (topology.cell_rows, topology.cell_cols, topology.cell_blocks):
+            keys = (units * (size + 1) + grid).ravel()
+            unit_counts = np.bincount(keys, minlength=size * (size + 1))
+            counts.append(unit_counts.reshape(size, size + 1)[:, 1:])
+        return counts[0], counts[1], counts[2]
+
+    def candidates(self, packed: bool = False) -> Candidates:
+        """
+        Returns values which can be put in every cell. An empty cell gets
+        every value missing from its row, column and block, a filled cell
+        only its own value. It is computed for the whole grid at once:
+        the values taken in the units are broadcast to the cells through
+        a (block row, row in block, block column, column in block) view.
+
+        Parameters
+        -----------
+        packed: bool
+            pack the values of every cell into bits (see `numpy.packbits`)
+
+        Returns
+        --------
+        candidates: Candidates
+            an array of shape (size, size, size),
+            or (size, size, ceil(size / 8)) of `uint8` if packed
+        """
+        size, block_size = self.size, self.topology.block_size
+        row_counts, col_counts, block_counts = self.value_counts()
+        blocks = (block_size, block_size, block_size, block_size, size)
+        taken = (
+            (row_counts > 0).reshape(block_size, block_size, 1, 1, size)
+            | (col_counts > 0).reshape(1, 1, block_size, block_size, size)
+            | (block_counts > 0).reshape(block_size, 1, block_size, 1, size)
+        )
+        candidates = ~np.broadcast_to(taken, blocks).reshape(size, size, size)
+        rows, cols = np.nonzero(self._array)
+        candidates[rows, cols] = False
+        candidates[rows, cols, self._array[rows, cols].astype(np.intp) - 1] = True
+        return np.packbits(candidates, axis=2) if packed else candidates
+
+    def assign(
+        self, candidates: Candidates, coords: tuple[int, int], value: int
+    ) -> None:
+        """
+        Puts a value in an empty cell and removes it from the candidates
+        of the cell's row, column and block, in O(size) time.
+
+        Parameters
+        -----------
+        candidates: Candidates
+            unpacked candidates of the grid, updated in place
+        coords: tuple[int, int]
+            coordinates (row, col) of the cell
+        value: int
+            a value from `1` to the size of the grid
+        """
+        topology = self.topology
+        row, col = coords
+        self._array[row, col] = value
+        candidates[row, :, value - 1] = False
+        candidates[:, col, value - 1] = False
+        block = topology.units[2 * topology.size + topology.cell_blocks[row, col]]
+        candidates.reshape(-1, topology.size)[block, value - 1] = False
+        candidates[row, col] = False
+        candidates[row, col, value - 1] = True
+
+    def clear(self, candidates: Candidates, coords: tuple[int, int]) -> None:
+        """
+        Empties a cell and gives its value back to the candidates
+        of the cells which no longer see it, in O(size^2) time.
+
+        Parameters
+        -----------
+        candidates: Candidates
+            unpacked candidates of the grid, updated in place
+        coords: tuple[int, int]
+            coordinates (row, col) of the cell
+        """
+        row, col = coords
+        value = int(self._array[row, col])
+        self._array[row, col] = 0
+        if value == 0:
+            return
+
+        topology = self.topology
+        size, block_size = topology.size, topology.block_size
+        placed = self._array == value
+        block_placed = placed.reshape(block_size, block_size, block_size, block_size)
+        block_placed = block_placed.any(axis=(1, 3)).ravel()
+        free = (
+            (self._array == 0)
+            & ~placed.any(axis=1)[:, None]
+            & ~placed.any(axis=0)[None, :]
+            & ~block_placed[topology.cell_blocks]
+        )
+        candidates[:, :, value - 1] = free | placed
+
+        seen = np.zeros(size + 1, dtype=bool)
+        seen[self._array.ravel()[topology.units[topology.cell_units[row, col]]]] = True
+        candidates[row, col] = ~seen[1:]
+
     def __str__(self) -> str:
         """
         Prints the grid in a pretty format, e.g.
@@ -298,6 +483,9 @@ class SudokuGrid:
         0,7,5,0,0,0,2,4,0
         ```
 
+        The lines are only checked for their widths, the numbers
+        are parsed by NumPy from a single buffer.
+
         Parameters
         -----------
         lines: list[str]
@@ -311,20 +499,38 @@ class SudokuGrid:
         if not lines:
             raise ValueError()
 
-        size = len(lines[0].split(','))
+        size = lines[0].count(',') + 1
 
         if not math.sqrt(size).is_integer():
             raise ValueError()
 
-        block_size = int(math.sqrt(size))
-        merged = []
-
         for line in lines:
-            nums = line.split(',')
-            if len(nums) != size:
+            if line.count(',') != size - 1:
                 raise ValueError
-            for num in nums:
-                merged.append(int(num))
 
-        grid = np.array(merged, dtype=np.uint).reshape(size, size)
-        return SudokuGrid(grid)
\ No newline at end of file
+        # trailing newlines are whitespace around the separators, which is ignored
+        merged = np.fromstring(','.join(lines), dtype=np.int64, sep=',')
+        if merged.size != size * len(lines) or (merged < 0).any():
+            raise ValueError
+
+        grid = merged.astype(np.uint).reshape(size, size)
+        return SudokuGrid(grid)
+
+    @staticmethod
+    def from_file(path: str | os.PathLike) -> SudokuGrid:
+        """
+        Reads a grid from a file with the textual representation
+        (see `from_text`).
+
+        Parameters
+        -----------
+        path: str | os.PathLike
+            a path of the file
+
+        Returns
+        ---------
+        grid: SudokuGrid
+            a new sudoku grid
+        """
+        with open(path) as f:
+            return SudokuGrid.from_text(f.read().splitlines())
\ No newline at end of file
@@ -0,0 +1,248 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from enum import StrEnum, auto
+import glob
+import itertools
+import math
+import os
+from pathlib import Path
+from typing import Iterable, Iterator
+import numpy as np
+import numpy.typing as npt
+from src.model.grid import SudokuGrid
+
+
+PuzzlePaths = str | os.PathLike | Iterable[str | os.PathLike]
+"""Type representing puzzle files: a single path, a glob pattern
+   (e.g. `"puzzles/sudokuN3*.txt"`) or a collection of paths"""
+
+
+class PuzzleFormat(StrEnum):
+    """
+    Layout of a stream of puzzles (see `read_puzzles`).
+
+    GRIDS
+        grids in the format of `SudokuGrid.from_text`, one after another,
+        optionally separated by blank lines (which end an incomplete grid)
+    LINES
+        a puzzle per line: all its values comma-separated, row by row,
+        or for grids up to 9x9 a string of digits with `0` or `.`
+        for the empty cells, e.g. `4.07...` (81 characters for 9x9)
+    AUTO
+        `LINES` if the first line is a string of digits, `GRIDS` otherwise;
+        a line of comma-separated values is taken for a row of a grid,
+        as it cannot be told apart from a whole (smaller) puzzle
+    """
+
+    GRIDS = auto()
+    LINES = auto()
+    AUTO = auto()
+
+
+def puzzle_paths(paths_or_glob: PuzzlePaths) -> list[Path]:
+    """
+    Expands the puzzle files into a list of paths.
+
+    Parameters
+    -----------
+    paths_or_glob: PuzzlePaths
+        a path, a glob pattern or a collection of paths
+
+    Returns
+    --------
+    paths: list[Path]
+        the paths, a glob pattern is expanded in the sorted order
+    """
+    if isinstance(paths_or_glob, (str, os.PathLike)):
+        pattern = os.fspath(paths_or_glob)
+        if glob.has_magic(pattern):
+            return [Path(path) for path in sorted(glob.glob(pattern))]
+        return [Path(pattern)]
+    return [Path(path) for path in paths_or_glob]
+
+
+def load_many(
+    paths_or_glob: PuzzlePaths,
+    workers: int | None = None,
+    stacked: bool = False,
+) -> list[SudokuGrid] | npt.NDArray[np.uint]:
+    """
+    Reads a whole corpus of puzzles, see `SudokuGrid.from_text` for the format.
+
+    Usage
+    -----
+        `puzzles = load_many("puzzles/sudokuN3*.txt", workers=8)`
+        `grids = load_many(paths, stacked=True)  # shape (len(paths), size, size)`
+
+    Parameters
+    -----------
+    paths_or_glob: PuzzlePaths
+        a path, a glob pattern or a collection of paths
+    workers: int | None
+        number of threads reading the files, by default they are read
+        one after another
+    stacked: bool
+        return a single array with all the grids stacked,
+        all of them must have the same size then
+
+    Returns
+    --------
+    puzzles: list[SudokuGrid] | npt.NDArray[np.uint]
+        the puzzles in the order of the paths
+
+    Raises
+    -------
+    value_error: ValueError
+        when a file does not contain a valid grid
+        or the stacked grids differ in size
+    """
+    paths = puzzle_paths(paths_or_glob)
+    if workers is None or workers <= 1 or len(paths) <= 1:
+        puzzles = [SudokuGrid.from_file(path) for path in paths]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            puzzles = list(executor.map(SudokuGrid.from_file, paths))
+
+    if not stacked:
+        return puzzles
+    if len({puzzle.size for puzzle in puzzles}) > 1:
+        raise ValueError("only grids of the same size can be stacked")
+    if not puzzles:
+        return np.zeros((0, 0, 0), dtype=np.uint)
+    return np.stack([puzzle[:, :] for puzzle in puzzles])
+
+
+def read_puzzles(
+    lines: Iterable[str],
+    puzzle_format: PuzzleFormat = PuzzleFormat.AUTO,
+    strict: bool = True,
+) -> Iterator[SudokuGrid | ValueError]:
+    """
+    Reads puzzles lazily from a stream of lines, e.g. an open file:
+    only the lines of the puzzle being read are kept in memory.
+    A stream read with `strict=False` goes on past an invalid puzzle,
+    its error takes the place of the puzzle (see `solve_stream`).
+
+    Usage
+    -----
+        `with open("corpus.txt") as lines:`
+        `    for puzzle in read_puzzles(lines):`
+        `        ...`
+
+    Parameters
+    -----------
+    lines: Iterable[str]
+        the lines of the stream
+    puzzle_format: PuzzleFormat
+        layout of the puzzles in the stream
+    strict: bool
+        raise the error of an invalid puzzle instead of yielding it
+
+    Returns
+    --------
+    puzzles: Iterator[SudokuGrid | ValueError]
+        the puzzles in the order of the stream, and the errors
+        of the invalid ones when not `strict`
+
+    Raises
+    -------
+    value_error: ValueError
+        when a puzzle is not valid and `strict`,
+        the message gives its line number
+    """
+    numbered: Iterator[tuple[int, str]] = (
+        (number, line.strip()) for number, line in enumerate(lines, start=1)
+    )
+    if puzzle_format == PuzzleFormat.AUTO:
+        first = next(((number, line) for number, line in numbered if line), None)
+        if first is None:
+            return
+        puzzle_format = PuzzleFormat.GRIDS if "," in first[1] else PuzzleFormat.LINES
+        numbered = itertools.chain([first], numbered)
+
+    chunks: Iterator[tuple[int, list[str]]]
+    match puzzle_format:
+        case PuzzleFormat.LINES:
+            chunks = ((number, [line]) for number, line in numbered if line)
+        case PuzzleFormat.GRIDS:
+            chunks = _grid_rows(numbered)
+        case _:
+            raise NotImplementedError()
+    for number, rows in chunks:
+        try:
+            if puzzle_format == PuzzleFormat.LINES:
+                puzzle = _puzzle_from_line(rows[0])
+            else:
+                puzzle = SudokuGrid.from_text(rows)
+        except ValueError:
+            error = ValueError(f"line {number}: not a valid puzzle")
+            if strict:
+                raise error
+            yield error
+        else:
+            yield puzzle
+
+
+def _grid_rows(
+    numbered: Iterable[tuple[int, str]],
+) -> Iterator[tuple[int, list[str]]]:
+    """
+    Splits a stream in the `PuzzleFormat.GRIDS` layout into grids.
+    A grid ends after as many rows as its first one has values,
+    at a blank line, or at a row of another width, which starts the next grid,
+    so an invalid grid does not take the lines of the following ones.
+
+    Parameters
+    -----------
+    numbered: Iterable[tuple[int, str]]
+        the stripped lines of the stream with their line numbers
+
+    Returns
+    --------
+    grids: Iterator[tuple[int, list[str]]]
+        the line number and the rows of every grid
+    """
+    start = 0
+    rows: list[str] = []
+    for number, line in numbered:
+        width = line.count(",") + 1
+        if rows and (not line or width != rows[0].count(",") + 1):
+            yield start, rows
+            rows = []
+        if not line:
+            continue
+        if not rows:
+            start = number
+        rows.append(line)
+        if len(rows) == width:
+            yield start, rows
+            rows = []
+    if rows:
+        yield start, rows
+
+
+def _puzzle_from_line(line: str) -> SudokuGrid:
+    """
+    Parameters
+    -----------
+    line: str
+        a puzzle written in a single line, see `PuzzleFormat.LINES`
+
+    Returns
+    --------
+    puzzle: SudokuGrid
+        the puzzle
+    """
+    if "," in line:
+        values = np.fromstring(line, dtype=np.int64, sep=",")
+        if values.size != line.count(",") + 1 or (values < 0).any():
+            raise ValueError
+    else:
+        digits = np.frombuffer(line.replace(".", "0").encode(), dtype=np.uint8)
+        values = digits - ord("0")
+        if (values > 9).any():
+            raise ValueError
+    size = math.isqrt(values.size)
+    if size * size != values.size:
+        raise ValueError
+    return SudokuGrid(values.astype(np.uint).reshape(size, size))
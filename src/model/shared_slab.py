@@ -0,0 +1,261 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+import sys
+from typing import Iterable
+import numpy as np
+from src.model.grid import SudokuGrid, compact_dtype
+
+
+SLOT_ALIGNMENT = 8
+"""every slot starts at an offset divisible by this number of bytes"""
+
+_attached: SharedGridSlab | None = None
+"""the slab most recently attached by this (worker) process"""
+
+
+def attach_shared_memory(name: str) -> SharedMemory:
+    """
+    Attaches to a shared memory block created by another process,
+    leaving its cleanup to the creator.
+
+    Python 3.13 is told not to track the block. Older versions register
+    every attached block with the resource tracker, but the worker processes
+    share the tracker of their parent, where the block is registered already
+    (the registrations form a set), so nothing is left to undo: unregistering
+    the block here would drop the registration of its creator instead.
+
+    Parameters
+    -----------
+    name: str
+        name of the block
+
+    Returns
+    --------
+    memory: SharedMemory
+        the attached block
+    """
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+    return SharedMemory(name=name)
+
+
+@dataclass(frozen=True, slots=True)
+class GridSlot:
+    """
+    A descriptor of a puzzle stored in a `SharedGridSlab`.
+    It is all a worker process receives, so sending a puzzle costs
+    the same few bytes no matter its size.
+
+    The slot holds the puzzle followed by room for its solution,
+    both in the compact dtype of their size (see `compact_dtype`).
+
+    Attributes:
+    -----------
+    offset: int
+        offset (in bytes) of the puzzle in the slab
+    size: int
+        size of the grid
+
+    Properties:
+    -----------
+    nbytes: int
+        number of bytes taken by a single grid
+    """
+
+    offset: int
+    size: int
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Returns
+        --------
+        nbytes: int
+            number of bytes taken by the puzzle (and by the solution)
+        """
+        return self.size * self.size * compact_dtype(self.size).itemsize
+
+
+class SharedGridSlab:
+    """
+    A block of shared memory holding a batch of puzzles and their solutions.
+    The process creating the slab writes the puzzles once, the workers
+    attach to it by name and read the puzzles and write the solutions
+    in place, so the grids are never pickled.
+
+    Usage
+    -----
+        In the main process:
+        `with SharedGridSlab.create(puzzles) as slab:`
+        `    executor.map(work, repeat(slab.name), slab.slots)`
+        `    solutions = [slab.solution(slot) for slot in slab.slots]`
+
+        In a worker process:
+        `slab = SharedGridSlab.attach(name)`
+        `slab.store(slot, solve(slab.puzzle(slot)))`
+
+    Attributes:
+    -----------
+    slots: list[GridSlot]
+        descriptors of the puzzles, in the order they were given
+
+    Properties:
+    -----------
+    name: str
+        name of the shared memory block, used to attach to it
+
+    Protected Attributes:
+    ---------------------
+    _memory: SharedMemory
+        the shared memory block
+    _owner: bool
+        whether the slab has been created by this process,
+        only the owner removes the block
+    """
+
+    slots: list[GridSlot]
+    _memory: SharedMemory
+    _owner: bool
+
+    def __init__(self, memory: SharedMemory, slots: list[GridSlot], owner: bool):
+        self._memory = memory
+        self.slots = slots
+        self._owner = owner
+
+    @property
+    def name(self) -> str:
+        return self._memory.name
+
+    @staticmethod
+    def create(puzzles: Iterable[SudokuGrid]) -> SharedGridSlab:
+        """
+        Allocates a slab and copies the puzzles into it.
+
+        Parameters
+        -----------
+        puzzles: Iterable[SudokuGrid]
+            the puzzles to be shared
+
+        Returns
+        --------
+        slab: SharedGridSlab
+            a new slab owned by the calling process,
+            all the solutions are empty (filled with zeros)
+        """
+        puzzles = list(puzzles)
+        slots = []
+        offset = 0
+        for puzzle in puzzles:
+            slot = GridSlot(offset, puzzle.size)
+            slots.append(slot)
+            offset += 2 * slot.nbytes
+            offset += -offset % SLOT_ALIGNMENT
+
+        # a shared memory block cannot be empty
+        memory = SharedMemory(create=True, size=max(offset, 1))
+        slab = SharedGridSlab(memory, slots, owner=True)
+        for slot, puzzle in zip(slots, puzzles):
+            slab._grid(slot, 0)[:] = puzzle[:, :]
+            slab._grid(slot, slot.nbytes)[:] = 0
+        return slab
+
+    @staticmethod
+    def attach(name: str) -> SharedGridSlab:
+        """
+        Attaches to a slab created by another process. The slab stays
+        attached until another one is, so the workers solving many chunks
+        of the same batch attach only once.
+
+        Parameters
+        -----------
+        name: str
+            name of the slab (see `SharedGridSlab.name`)
+
+        Returns
+        --------
+        slab: SharedGridSlab
+            the slab, without its slots (they come with the work)
+        """
+        global _attached
+        if _attached is None or _attached.name != name:
+            if _attached is not None:
+                _attached.close()
+            _attached = SharedGridSlab(attach_shared_memory(name), [], owner=False)
+        return _attached
+
+    def puzzle(self, slot: GridSlot) -> SudokuGrid:
+        """
+        Returns
+        --------
+        puzzle: SudokuGrid
+            a read-only view of the puzzle in the slot
+        """
+        grid = self._grid(slot, 0)
+        grid.flags.writeable = False
+        return SudokuGrid(grid)
+
+    def solution(self, slot: GridSlot) -> SudokuGrid | None:
+        """
+        Returns
+        --------
+        solution: SudokuGrid | None
+            a copy of the solution stored in the slot,
+            `None` if none has been stored
+        """
+        grid = self._grid(slot, slot.nbytes)
+        if not grid.any():
+            return None
+        return SudokuGrid(grid.copy())
+
+    def store(self, slot: GridSlot, solution: SudokuGrid) -> None:
+        """
+        Writes a solution into the slot.
+
+        Parameters
+        -----------
+        slot: GridSlot
+            the slot of the solved puzzle
+        solution: SudokuGrid
+            a complete grid of the same size
+        """
+        self._grid(slot, slot.nbytes)[:] = solution[:, :]
+
+    def close(self) -> None:
+        """
+        Detaches from the slab, the owner also frees the memory.
+        No views of the grids may be used afterward.
+        """
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+    def __enter__(self) -> SharedGridSlab:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def _grid(self, slot: GridSlot, offset: int) -> np.ndarray:
+        """
+        Views a grid of the slot without copying it.
+
+        Parameters
+        -----------
+        slot: GridSlot
+            the slot of the grid
+        offset: int
+            offset of the grid within the slot,
+            `0` for the puzzle and `slot.nbytes` for the solution
+
+        Returns
+        --------
+        grid: np.ndarray
+            a view of the grid in the shared memory
+        """
+        return np.ndarray(
+            (slot.size, slot.size),
+            dtype=compact_dtype(slot.size),
+            buffer=self._memory.buf,
+            offset=slot.offset + offset,
+        )
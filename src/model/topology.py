@@ -0,0 +1,101 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import functools
+import math
+import numpy as np
+import numpy.typing as npt
+
+
+@dataclass(frozen=True, slots=True)
+class GridTopology:
+    """
+    Precomputed structure of a sudoku grid of a given size.
+    It depends only on the size, so a single instance per size
+    is shared by all grids and solvers (see `GridTopology.of`).
+    All the arrays are read-only.
+
+    Cells are identified either by their coordinates (row, col)
+    or by their flat index `row * size + col`. Units are numbered:
+    rows `0 .. size - 1`, columns `size .. 2 * size - 1`
+    and blocks `2 * size .. 3 * size - 1`.
+
+    Usage
+    -----
+        `topology = GridTopology.of(9)`
+        `block = topology.cell_blocks[row, col]`
+
+    Attributes:
+    -----------
+    size: int
+        size of the grid, e.g. 9 for a 9x9 grid
+    block_size: int
+        size of a single block, e.g. 3 for a 9x9 grid
+    cell_rows: npt.NDArray[np.intp]
+        row of every cell, shape (size, size)
+    cell_cols: npt.NDArray[np.intp]
+        column of every cell, shape (size, size)
+    cell_blocks: npt.NDArray[np.intp]
+        block index of every cell, shape (size, size)
+    block_corners: npt.NDArray[np.intp]
+        coordinates (row, col) of the top-left cell of every block,
+        shape (size, 2)
+    units: npt.NDArray[np.intp]
+        flat indices of the cells of every unit, shape (3 * size, size)
+    cell_units: npt.NDArray[np.intp]
+        the row, column and block unit of every cell, shape (size, size, 3)
+    """
+
+    size: int
+    block_size: int
+    cell_rows: npt.NDArray[np.intp]
+    cell_cols: npt.NDArray[np.intp]
+    cell_blocks: npt.NDArray[np.intp]
+    block_corners: npt.NDArray[np.intp]
+    units: npt.NDArray[np.intp]
+    cell_units: npt.NDArray[np.intp]
+
+    @staticmethod
+    @functools.cache
+    def of(size: int) -> GridTopology:
+        """
+        Returns the topology of the grids of the given size.
+
+        Parameters
+        -----------
+        size: int
+            size of the grid, it must be a square number
+
+        Returns
+        --------
+        topology: GridTopology
+            the topology shared by all the grids of the size
+        """
+        block_size = math.isqrt(size)
+        if block_size * block_size != size:
+            raise ValueError(f"size {size} is not a square number")
+
+        cell_rows, cell_cols = np.indices((size, size), dtype=np.intp)
+        cell_blocks = (cell_rows // block_size) * block_size + cell_cols // block_size
+        block_corners = np.stack(
+            [
+                np.arange(size) // block_size * block_size,
+                np.arange(size) % block_size * block_size,
+            ],
+            axis=1,
+        )
+        cells = cell_rows * size + cell_cols
+        block_cells = cells.reshape(block_size, block_size, block_size, block_size)
+        units = np.concatenate(
+            [
+                cells,
+                cells.T,
+                block_cells.transpose(0, 2, 1, 3).reshape(size, size),
+            ]
+        )
+        cell_units = np.stack(
+            [cell_rows, cell_cols + size, cell_blocks + 2 * size], axis=2
+        )
+        arrays = (cell_rows, cell_cols, cell_blocks, block_corners, units, cell_units)
+        for array in arrays:
+            array.flags.writeable = False
+        return GridTopology(size, block_size, *arrays)
@@ -0,0 +1,131 @@
+import argparse
+import asyncio
+import contextlib
+import signal
+import sys
+from src.server.server import (
+    BATCH_WINDOW,
+    INLINE_SIZES,
+    MAX_BATCH,
+    MAX_SIZE,
+    WARM_SIZES,
+    SolveServer,
+)
+from src.solvers.solver_type import SudokuSolverType
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parses the command line arguments of the server.
+    Run `python -m src.server -h` to learn about them.
+
+    Returns
+    --------
+    parsed_args: argparse.Namespace
+        parsed arguments
+    """
+    arg_parser = argparse.ArgumentParser(
+        prog="sudolver-server",
+        description="Solves sudoku puzzles sent over a Unix or TCP socket.",
+    )
+    address = arg_parser.add_mutually_exclusive_group(required=True)
+    address.add_argument(
+        "--socket",
+        "-s",
+        type=str,
+        help="path of the Unix socket to listen on",
+    )
+    address.add_argument(
+        "--port",
+        "-p",
+        type=int,
+        help="TCP port to listen on",
+    )
+    arg_parser.add_argument(
+        "--host",
+        type=str,
+        default="127.0.0.1",
+        help="host to listen on with --port",
+    )
+    arg_parser.add_argument(
+        "--solver",
+        type=SudokuSolverType,
+        choices=list(SudokuSolverType),
+        default=SudokuSolverType.SAT,
+        help="the solver of the requests not choosing one",
+    )
+    arg_parser.add_argument(
+        "--time-limit",
+        "-t",
+        type=float,
+        default=10.0,
+        help="time limit (in seconds) of the requests not setting one",
+    )
+    arg_parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=None,
+        help="number of the worker processes, by default the number of CPUs",
+    )
+    arg_parser.add_argument(
+        "--batch-window",
+        type=float,
+        default=BATCH_WINDOW,
+        help="how long (in seconds) to collect a batch while all workers are busy",
+    )
+    arg_parser.add_argument(
+        "--max-batch",
+        type=int,
+        default=MAX_BATCH,
+        help="the largest number of requests dispatched at once",
+    )
+    arg_parser.add_argument(
+        "--warm-sizes",
+        type=int,
+        nargs="*",
+        default=list(WARM_SIZES),
+        help="grid sizes whose SAT templates the workers encode in advance",
+    )
+    arg_parser.add_argument(
+        "--inline-sizes",
+        type=int,
+        nargs="*",
+        default=list(INLINE_SIZES),
+        help="grid sizes of the lone requests solved without a worker round trip",
+    )
+    arg_parser.add_argument(
+        "--max-size",
+        type=int,
+        default=MAX_SIZE,
+        help="the largest grid size of a request, larger ones are refused unread",
+    )
+    return arg_parser.parse_args()
+
+
+async def serve(args: argparse.Namespace) -> None:
+    serving = asyncio.current_task()
+    assert serving is not None
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, serving.cancel)
+    async with SolveServer(
+        args.solver,
+        args.time_limit,
+        args.workers,
+        args.batch_window,
+        args.max_batch,
+        tuple(args.warm_sizes),
+        tuple(args.inline_sizes),
+        args.max_size,
+    ) as server:
+        await server.serve(args.socket, args.host, args.port)
+
+
+def main() -> int:
+    args = parse_arguments()
+    with contextlib.suppress(KeyboardInterrupt, asyncio.CancelledError):
+        asyncio.run(serve(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+from __future__ import annotations
+import itertools
+import socket
+from typing import Iterable, Iterator
+from src.model.grid import SudokuGrid
+from src.server.protocol import (
+    RESPONSE_HEADER,
+    SolveRequest,
+    grid_nbytes,
+    response_from_binary,
+    response_from_json,
+)
+from src.solvers.batch import SolveResult
+from src.solvers.solver_type import SudokuSolverType
+
+
+PIPELINE_DEPTH = 64
+"""how many requests `SudokuClient.solve_many` keeps in flight by default"""
+
+
+class SudokuClient:
+    """
+    A blocking client of the solve server (see `SolveServer`).
+    It keeps a single connection open, so it should not be shared
+    between threads.
+
+    Usage
+    -----
+        `with SudokuClient(path="/tmp/sudoku.sock") as client:`
+        `    result = client.solve(grid)`
+        `    for result in client.solve_many(grids, SudokuSolverType.SAT, 1.0):`
+        `        print(result.index, result.status)`
+
+    Attributes:
+    -----------
+    binary: bool
+        whether the requests are sent as binary frames, otherwise as JSON lines
+
+    Protected Attributes:
+    ---------------------
+    _socket: socket.socket
+        the connection to the server
+    _stream: BinaryIO
+        buffered reader of the connection
+    _ids: Iterator[int]
+        identifiers of the next requests
+    """
+
+    binary: bool
+
+    def __init__(
+        self,
+        path: str | None = None,
+        host: str = "127.0.0.1",
+        port: int | None = None,
+        binary: bool = True,
+    ):
+        """
+        Connects to the server.
+
+        Parameters
+        -----------
+        path: str | None
+            path of the Unix socket of the server
+        host: str
+            host of the server, used without a `path`
+        port: int | None
+            TCP port of the server, required without a `path`
+        binary: bool
+            send the requests as binary frames, otherwise as JSON lines
+        """
+        if path is not None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(path)
+        elif port is not None:
+            self._socket = socket.create_connection((host, port))
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            raise ValueError("either a socket path or a port is required")
+        self.binary = binary
+        self._stream = self._socket.makefile("rb")
+        self._ids = itertools.count()
+
+    def solve(
+        self,
+        puzzle: SudokuGrid,
+        solver_type: SudokuSolverType | None = None,
+        time_limit: float | None = None,
+    ) -> SolveResult:
+        """
+        Solves a single puzzle.
+
+        Parameters
+        -----------
+        puzzle: SudokuGrid
+            a sudoku puzzle to be solved
+        solver_type: SudokuSolverType | None
+            the solver to be used, by default the one of the server
+        time_limit: float | None
+            time limit (in seconds), by default the one of the server
+
+        Returns
+        --------
+        result: SolveResult
+            the result of the puzzle, `index` is `0`
+        """
+        [result] = self.solve_many([puzzle], solver_type, time_limit)
+        return result
+
+    def solve_many(
+        self,
+        puzzles: Iterable[SudokuGrid],
+        solver_type: SudokuSolverType | None = None,
+        time_limit: float | None = None,
+        depth: int = PIPELINE_DEPTH,
+    ) -> Iterator[SolveResult]:
+        """
+        Solves a stream of puzzles, keeping up to `depth` requests in flight,
+        so the server can batch them.
+
+        Parameters
+        -----------
+        puzzles: Iterable[SudokuGrid]
+            the puzzles to be solved, taken lazily
+        solver_type: SudokuSolverType | None
+            the solver to be used, by default the one of the server
+        time_limit: float | None
+            time limit (in seconds), by default the one of the server
+        depth: int
+            the largest number of the requests in flight
+
+        Returns
+        --------
+        results: Iterator[SolveResult]
+            a result for every puzzle, as soon as it arrives,
+            `index` is the position of the puzzle in `puzzles`
+
+        Raises
+        -------
+        value_error: ValueError
+            when the server rejects a request
+        connection_error: ConnectionError
+            when the server closes the connection
+        """
+        positions: dict[int, int] = {}
+        remaining = enumerate(puzzles)
+        while True:
+            for position, puzzle in itertools.islice(remaining, depth - len(positions)):
+                request_id = next(self._ids) % 2**32
+                positions[request_id] = position
+                request = SolveRequest(request_id, puzzle, solver_type, time_limit)
+                self._socket.sendall(
+                    request.to_binary() if self.binary else request.to_json()
+                )
+            if not positions:
+                return
+            result = self._receive()
+            if result.index not in positions:
+                raise ValueError(f"the server has rejected a request: {result.error}")
+            position = positions.pop(result.index)
+            yield SolveResult(
+                position, result.status, result.solution, result.elapsed, result.error
+            )
+
+    def _receive(self) -> SolveResult:
+        """
+        Returns
+        --------
+        result: SolveResult
+            the next response of the server, indexed by the id of its request
+        """
+        if not self.binary:
+            line = self._stream.readline()
+            if not line:
+                raise ConnectionError("the server has closed the connection")
+            return response_from_json(line)
+        header = self._read(RESPONSE_HEADER.size)
+        size = RESPONSE_HEADER.unpack(header)[-1]
+        return response_from_binary(header, self._read(grid_nbytes(size)))
+
+    def _read(self, nbytes: int) -> bytes:
+        data = self._stream.read(nbytes)
+        if len(data) < nbytes:
+            raise ConnectionError("the server has closed the connection")
+        return data
+
+    def close(self) -> None:
+        self._stream.close()
+        self._socket.close()
+
+    def __enter__(self) -> SudokuClient:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
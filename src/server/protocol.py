@@ -0,0 +1,248 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import json
+import struct
+import numpy as np
+from src.model.grid import SudokuGrid, compact_dtype
+from src.solvers.batch import SolveResult, SolveStatus
+from src.solvers.solver_type import SudokuSolverType
+
+
+BINARY_MARKER = 0xB5
+"""first byte of every binary frame, a JSON line never starts with it"""
+
+REQUEST_HEADER = struct.Struct("<BIBfH")
+"""a binary request: marker, id, solver (index in `SudokuSolverType`),
+   time limit and size, followed by the grid in the compact dtype"""
+
+RESPONSE_HEADER = struct.Struct("<BIBfH")
+"""a binary response: marker, id, status (index in `SolveStatus`),
+   elapsed time and size (`0` without a solution), followed by the solution"""
+
+SOLVER_TYPES = list(SudokuSolverType)
+"""solver types by their binary codes"""
+
+STATUSES = list(SolveStatus)
+"""statuses by their binary codes"""
+
+
+@dataclass(frozen=True, slots=True)
+class SolveRequest:
+    """
+    A request to solve a puzzle, sent to the solve server.
+
+    Two encodings are accepted, a JSON line (NDJSON):
+
+    ```
+    {"id": 7, "puzzle": [[0, 1, ...], ...], "solver": "sat", "time_limit": 10.0}
+    ```
+
+    with `solver` and `time_limit` optional, or a binary frame
+    (see `REQUEST_HEADER`), cheaper for large grids.
+    The response uses the encoding of the request.
+
+    Attributes:
+    -----------
+    id: int
+        an identifier chosen by the client, repeated in the response
+    puzzle: SudokuGrid
+        the puzzle to be solved
+    solver_type: SudokuSolverType | None
+        the solver to be used, `None` for the server default
+    time_limit: float | None
+        time limit (in seconds), `None` for the server default
+    """
+
+    id: int
+    puzzle: SudokuGrid
+    solver_type: SudokuSolverType | None = None
+    time_limit: float | None = None
+
+    def to_json(self) -> bytes:
+        request: dict = {"id": self.id, "puzzle": self.puzzle[:, :].tolist()}
+        if self.solver_type is not None:
+            request["solver"] = str(self.solver_type)
+        if self.time_limit is not None:
+            request["time_limit"] = self.time_limit
+        return json.dumps(request, separators=(",", ":")).encode() + b"\n"
+
+    def to_binary(self) -> bytes:
+        solver_type = self.solver_type or SudokuSolverType.SAT
+        header = REQUEST_HEADER.pack(
+            BINARY_MARKER,
+            self.id,
+            SOLVER_TYPES.index(solver_type),
+            self.time_limit or 0.0,
+            self.puzzle.size,
+        )
+        return header + _grid_bytes(self.puzzle)
+
+    @staticmethod
+    def from_json(line: bytes) -> SolveRequest:
+        """
+        Parameters
+        -----------
+        line: bytes
+            a JSON line
+
+        Returns
+        --------
+        request: SolveRequest
+            the decoded request
+
+        Raises
+        -------
+        value_error: ValueError
+            when the line is not a valid request
+        """
+        try:
+            request = json.loads(line)
+            puzzle = SudokuGrid(np.array(request["puzzle"], dtype=np.uint))
+            solver = request.get("solver")
+            time_limit = request.get("time_limit")
+            return SolveRequest(
+                int(request["id"]),
+                puzzle,
+                None if solver is None else SudokuSolverType(solver),
+                None if time_limit is None else float(time_limit),
+            )
+        except (KeyError, TypeError, OverflowError) as error:
+            raise ValueError(f"invalid request: {error!r}")
+
+    @staticmethod
+    def from_binary(header: bytes, grid: bytes) -> SolveRequest:
+        """
+        Parameters
+        -----------
+        header: bytes
+            the header of the frame (see `REQUEST_HEADER`)
+        grid: bytes
+            the grid following the header
+
+        Returns
+        --------
+        request: SolveRequest
+            the decoded request
+        """
+        _, request_id, solver, time_limit, size = REQUEST_HEADER.unpack(header)
+        return SolveRequest(
+            request_id,
+            _grid_from_bytes(grid, size),
+            SOLVER_TYPES[solver],
+            time_limit or None,
+        )
+
+
+def response_to_json(result: SolveResult) -> bytes:
+    """
+    Encodes a result as a JSON line:
+
+    ```
+    {"id": 7, "status": "solved", "elapsed": 0.01, "solution": [[...], ...]}
+    ```
+
+    with `error` in place of `solution` for the `error` status.
+
+    Parameters
+    -----------
+    result: SolveResult
+        the result, its `index` is the id of the request
+
+    Returns
+    --------
+    line: bytes
+        the encoded response
+    """
+    response: dict = {
+        "id": result.index,
+        "status": str(result.status),
+        "elapsed": result.elapsed,
+    }
+    if result.solution is not None:
+        response["solution"] = result.solution[:, :].tolist()
+    if result.error is not None:
+        response["error"] = result.error
+    return json.dumps(response, separators=(",", ":")).encode() + b"\n"
+
+
+def error_to_json(error: str) -> bytes:
+    """
+    Encodes the response to a JSON line which is not a valid request,
+    its `id` is `null`, as the id of the request is unknown.
+
+    Parameters
+    -----------
+    error: str
+        description of the problem
+
+    Returns
+    --------
+    line: bytes
+        the encoded response
+    """
+    response = {"id": None, "status": str(SolveStatus.ERROR), "error": error}
+    return json.dumps(response, separators=(",", ":")).encode() + b"\n"
+
+
+def response_from_json(line: bytes) -> SolveResult:
+    response = json.loads(line)
+    solution = response.get("solution")
+    return SolveResult(
+        response["id"],
+        SolveStatus(response["status"]),
+        None if solution is None else SudokuGrid(np.array(solution, dtype=np.uint)),
+        response.get("elapsed", 0.0),
+        response.get("error"),
+    )
+
+
+def response_to_binary(result: SolveResult) -> bytes:
+    """
+    Encodes a result as a binary frame (see `RESPONSE_HEADER`),
+    the error message is not sent.
+
+    Parameters
+    -----------
+    result: SolveResult
+        the result, its `index` is the id of the request
+
+    Returns
+    --------
+    frame: bytes
+        the encoded response
+    """
+    solution = result.solution
+    header = RESPONSE_HEADER.pack(
+        BINARY_MARKER,
+        result.index,
+        STATUSES.index(result.status),
+        result.elapsed,
+        0 if solution is None else solution.size,
+    )
+    return header if solution is None else header + _grid_bytes(solution)
+
+
+def response_from_binary(header: bytes, grid: bytes) -> SolveResult:
+    _, response_id, status, elapsed, size = RESPONSE_HEADER.unpack(header)
+    solution = _grid_from_bytes(grid, size) if size else None
+    return SolveResult(response_id, STATUSES[status], solution, elapsed)
+
+
+def grid_nbytes(size: int) -> int:
+    """
+    Returns
+    --------
+    nbytes: int
+        number of bytes of a grid of the given size in a binary frame
+    """
+    return size * size * compact_dtype(size).itemsize
+
+
+def _grid_bytes(grid: SudokuGrid) -> bytes:
+    dtype = compact_dtype(grid.size).newbyteorder("<")
+    return np.ascontiguousarray(grid[:, :], dtype=dtype).tobytes()
+
+
+def _grid_from_bytes(data: bytes, size: int) -> SudokuGrid:
+    dtype = compact_dtype(size).newbyteorder("<")
+    return SudokuGrid(np.frombuffer(data, dtype=dtype).reshape(size, size).copy())
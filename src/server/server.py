@@ -0,0 +1,610 @@
+from __future__ import annotations
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import contextlib
+from dataclasses import replace
+import os
+from typing import Collection
+import numpy as np
+from src.model.grid import SudokuGrid
+from src.server.protocol import (
+    BINARY_MARKER,
+    REQUEST_HEADER,
+    SolveRequest,
+    error_to_json,
+    grid_nbytes,
+    response_to_binary,
+    response_to_json,
+)
+from src.solvers.batch import SolveResult, SolveStatus, _solve_one
+from src.solvers.sat_template import SatTemplatePool
+from src.solvers.solver_type import SudokuSolverType
+
+
+BATCH_WINDOW = 0.0005
+"""how long (in seconds) the server collects more requests for a batch
+   while all the workers are busy"""
+
+MAX_BATCH = 64
+"""the largest number of requests dispatched at once"""
+
+WARM_SIZES = (4, 9, 16)
+"""grid sizes whose SAT templates the workers encode in advance"""
+
+INLINE_SIZES = (4, 9)
+"""grid sizes solved by the server process itself while its inline thread
+   is free, a worker round trip takes longer than solving such a grid"""
+
+MAX_SIZE = 64
+"""the largest grid size (e.g. 64 for a 64x64 grid) a request may carry"""
+
+_warm_sizes: frozenset[int] = frozenset()
+"""grid sizes with warm SAT templates in this (worker) process"""
+
+
+class SolveServer:
+    """
+    A resident server solving puzzles sent over a Unix or TCP socket.
+
+    Starting the interpreter and importing numpy and pysat takes longer than
+    solving a 9x9 puzzle, so the server keeps a pool of warm worker processes:
+    they have the solvers imported and the SAT templates (see `SatTemplatePool`)
+    of `warm_sizes` encoded before the first request.
+
+    The requests (see `SolveRequest`, JSON lines or binary frames, both may be
+    mixed on one connection) are dispatched in micro-batches: while a worker
+    is idle, the requests queued so far go out at once; while all of them
+    are busy, the requests arriving within `batch_window` (or until a worker
+    frees up) are collected together. The requests of a batch with the same
+    solver and time limit are split evenly between the workers, a single task
+    per worker, so a burst of small puzzles costs a few round trips
+    to the workers, not one per puzzle. A lone request for a grid
+    of `inline_sizes` skips the workers altogether: it is solved by a thread
+    of the server process against its own warm templates, unless that thread
+    is still busy with the previous one. Every response is sent as soon as
+    its share is done, so responses on a connection may come out of order;
+    they carry the ids of their requests.
+
+    A request for a grid larger than `max_size` is answered with an error,
+    a binary one before its grid is read, closing the connection.
+
+    Usage
+    -----
+        `python -m src.server --socket /tmp/sudoku.sock`
+
+    or from asyncio code:
+        `async with SolveServer(workers=4) as server:`
+        `    await server.serve(path="/tmp/sudoku.sock")`
+
+    Attributes:
+    -----------
+    solver_type: SudokuSolverType
+        the solver used for the requests not choosing one
+    time_limit: float
+        the time limit (in seconds) of the requests not setting one
+    workers: int
+        number of the worker processes
+    batch_window: float
+        how long (in seconds) a batch collects more requests
+        while all the workers are busy
+    max_batch: int
+        the largest number of requests dispatched at once
+    warm_sizes: tuple[int, ...]
+        grid sizes solved against warm SAT templates
+    inline_sizes: tuple[int, ...]
+        grid sizes of the lone requests solved by the server process itself
+    max_size: int
+        the largest grid size a request may carry
+
+    Protected Attributes:
+    ---------------------
+    _executor: ProcessPoolExecutor | None
+        the worker processes, started by `start`
+    _inline: ThreadPoolExecutor | None
+        the thread solving the lone small requests, started by `start`
+    _inline_busy: bool
+        whether the inline thread is solving a request
+    _template_pool: SatTemplatePool
+        the warm SAT templates of the inline thread
+    _queue: asyncio.Queue
+        requests waiting for a batch, with the futures of their results
+    _dispatcher: asyncio.Task | None
+        the task collecting the batches
+    _busy: int
+        number of the shares of the batches being solved
+    _idle: asyncio.Event
+        set while fewer shares than workers are being solved
+    """
+
+    solver_type: SudokuSolverType
+    time_limit: float
+    workers: int
+    batch_window: float
+    max_batch: int
+    warm_sizes: tuple[int, ...]
+    inline_sizes: tuple[int, ...]
+    max_size: int
+    _executor: ProcessPoolExecutor | None
+    _inline: ThreadPoolExecutor | None
+    _inline_busy: bool
+    _template_pool: SatTemplatePool
+    _queue: asyncio.Queue[tuple[SolveRequest, asyncio.Future[SolveResult]]]
+    _dispatcher: asyncio.Task | None
+    _busy: int
+    _idle: asyncio.Event
+
+    def __init__(
+        self,
+        solver_type: SudokuSolverType = SudokuSolverType.SAT,
+        time_limit: float = 10.0,
+        workers: int | None = None,
+        batch_window: float = BATCH_WINDOW,
+        max_batch: int = MAX_BATCH,
+        warm_sizes: tuple[int, ...] = WARM_SIZES,
+        inline_sizes: tuple[int, ...] = INLINE_SIZES,
+        max_size: int = MAX_SIZE,
+    ):
+        """
+        Initialize the server, the workers are started by `start`.
+
+        Parameters
+        -----------
+        solver_type: SudokuSolverType
+            the solver used for the requests not choosing one
+        time_limit: float
+            the time limit (in seconds) of the requests not setting one
+        workers: int | None
+            number of the worker processes, by default the number of CPUs
+        batch_window: float
+            how long (in seconds) a batch collects more requests
+            while all the workers are busy
+        max_batch: int
+            the largest number of requests dispatched at once
+        warm_sizes: tuple[int, ...]
+            grid sizes solved against warm SAT templates
+        inline_sizes: tuple[int, ...]
+            grid sizes of the lone requests solved by the server process itself,
+            empty to send every request to the workers
+        max_size: int
+            the largest grid size a request may carry
+        """
+        if max_batch < 1:
+            raise ValueError("a batch must hold at least one request")
+        self.solver_type = solver_type
+        self.time_limit = time_limit
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.warm_sizes = warm_sizes
+        self.inline_sizes = inline_sizes
+        self.max_size = max_size
+        self._executor = None
+        self._inline = None
+        self._inline_busy = False
+        self._template_pool = SatTemplatePool(solvers_per_size=1)
+        self._queue = asyncio.Queue()
+        self._dispatcher = None
+        self._busy = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    async def start(self) -> None:
+        """
+        Starts the worker processes and the inline thread
+        and waits until all of them are warm.
+        """
+        loop = asyncio.get_running_loop()
+        self._executor = ProcessPoolExecutor(
+            self.workers, initializer=_warm_up, initargs=(self.warm_sizes,)
+        )
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(self._executor, os.getpid)
+                for _ in range(self.workers)
+            )
+        )
+        self._inline = ThreadPoolExecutor(1, thread_name_prefix="inline")
+        await loop.run_in_executor(
+            self._inline, _warm_templates, self._template_pool, self.inline_sizes
+        )
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def serve(
+        self,
+        path: str | None = None,
+        host: str = "127.0.0.1",
+        port: int | None = None,
+    ) -> None:
+        """
+        Accepts connections until cancelled.
+
+        Parameters
+        -----------
+        path: str | None
+            path of a Unix socket to listen on
+        host: str
+            host of a TCP socket to listen on, used without a `path`
+        port: int | None
+            port of a TCP socket to listen on, required without a `path`
+        """
+        if self._executor is None:
+            await self.start()
+        if path is not None:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path)
+            server = await asyncio.start_unix_server(self._handle, path=path)
+        elif port is not None:
+            server = await asyncio.start_server(self._handle, host, port)
+        else:
+            raise ValueError("either a socket path or a port is required")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if path is not None:
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(path)
+
+    async def solve(self, request: SolveRequest) -> SolveResult:
+        """
+        Solves a single request as a part of the next batch,
+        or right away on the inline thread if it is a lone small request.
+
+        Parameters
+        -----------
+        request: SolveRequest
+            the request to be solved
+
+        Returns
+        --------
+        result: SolveResult
+            the result of the request, its `index` is the id of the request
+        """
+        result = asyncio.get_running_loop().create_future()
+        if self._queue.empty() and self._inlines(request.puzzle):
+            self._submit(
+                [(request, result)],
+                request.solver_type or self.solver_type,
+                request.time_limit or self.time_limit,
+            )
+        else:
+            self._queue.put_nowait((request, result))
+        return await result
+
+    async def close(self) -> None:
+        """
+        Stops dispatching the batches and shuts the workers down.
+        """
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._dispatcher
+            self._dispatcher = None
+        if self._executor is not None:
+            await asyncio.to_thread(self._executor.shutdown, True, cancel_futures=True)
+            self._executor = None
+        if self._inline is not None:
+            await asyncio.to_thread(self._inline.shutdown, True, cancel_futures=True)
+            self._inline = None
+
+    async def __aenter__(self) -> SolveServer:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """
+        Serves a single connection: reads the requests until the client
+        closes it and answers each of them in its own encoding.
+
+        Parameters
+        -----------
+        reader: asyncio.StreamReader
+            the incoming side of the connection
+        writer: asyncio.StreamWriter
+            the outgoing side of the connection
+        """
+        answering: set[asyncio.Task] = set()
+        try:
+            while True:
+                try:
+                    first = await reader.readexactly(1)
+                except asyncio.IncompleteReadError:
+                    break
+                if first[0] == BINARY_MARKER:
+                    header = first + await reader.readexactly(REQUEST_HEADER.size - 1)
+                    _, request_id, _, _, size = REQUEST_HEADER.unpack(header)
+                    if size > self.max_size:
+                        # the grid is not read, so the next frame cannot be found
+                        failure = SolveResult(
+                            request_id,
+                            SolveStatus.ERROR,
+                            None,
+                            0.0,
+                            f"grid size {size} exceeds the limit of {self.max_size}",
+                        )
+                        writer.write(response_to_binary(failure))
+                        break
+                    grid = await reader.readexactly(grid_nbytes(size))
+                    binary = True
+                else:
+                    line = first + await reader.readline()
+                    if not line.strip():
+                        continue
+                    binary = False
+                try:
+                    if binary:
+                        request = SolveRequest.from_binary(header, grid)
+                    else:
+                        request = SolveRequest.from_json(line)
+                    if request.puzzle.size > self.max_size:
+                        raise ValueError(
+                            f"grid size {request.puzzle.size} "
+                            f"exceeds the limit of {self.max_size}"
+                        )
+                except (ValueError, IndexError) as error:
+                    if binary:
+                        failure = SolveResult(
+                            request_id, SolveStatus.ERROR, None, 0.0, repr(error)
+                        )
+                        writer.write(response_to_binary(failure))
+                    else:
+                        writer.write(error_to_json(repr(error)))
+                    continue
+                task = asyncio.create_task(self._answer(request, binary, writer))
+                answering.add(task)
+                task.add_done_callback(answering.discard)
+            if answering:
+                await asyncio.wait(answering)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            for task in answering:
+                task.cancel()
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _answer(
+        self, request: SolveRequest, binary: bool, writer: asyncio.StreamWriter
+    ) -> None:
+        """
+        Solves a request and writes its response.
+
+        Parameters
+        -----------
+        request: SolveRequest
+            the request to be solved
+        binary: bool
+            whether the request came as a binary frame
+        writer: asyncio.StreamWriter
+            the connection to write the response to
+        """
+        result = await self.solve(request)
+        if writer.is_closing():
+            return
+        writer.write(response_to_binary(result) if binary else response_to_json(result))
+        await writer.drain()
+
+    async def _dispatch(self) -> None:
+        """
+        Collects the queued requests into batches and dispatches them.
+        """
+        while True:
+            batch = [await self._queue.get()]
+            if self._busy >= self.workers:
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._idle.wait(), self.batch_window)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            groups: dict[
+                tuple[SudokuSolverType, float],
+                list[tuple[SolveRequest, asyncio.Future[SolveResult]]],
+            ] = {}
+            for request, result in batch:
+                solver_type = request.solver_type or self.solver_type
+                time_limit = request.time_limit or self.time_limit
+                groups.setdefault((solver_type, time_limit), []).append(
+                    (request, result)
+                )
+            for (solver_type, time_limit), group in groups.items():
+                for share in np.array_split(
+                    np.arange(len(group)), min(self.workers, len(group))
+                ):
+                    self._submit(
+                        [group[position] for position in share.tolist()],
+                        solver_type,
+                        time_limit,
+                    )
+
+    def _inlines(self, puzzle: SudokuGrid) -> bool:
+        """
+        Parameters
+        -----------
+        puzzle: SudokuGrid
+            the puzzle of a lone request
+
+        Returns
+        --------
+        inlines: bool
+            whether the inline thread is free and solves grids of the size
+        """
+        return (
+            self._inline is not None
+            and not self._inline_busy
+            and puzzle.size in self.inline_sizes
+        )
+
+    def _submit(
+        self,
+        share: list[tuple[SolveRequest, asyncio.Future[SolveResult]]],
+        solver_type: SudokuSolverType,
+        time_limit: float,
+    ) -> None:
+        """
+        Sends a share of a batch to a worker, or to the inline thread
+        if it is a lone request for a grid of `inline_sizes`.
+
+        Parameters
+        -----------
+        share: list[tuple[SolveRequest, asyncio.Future[SolveResult]]]
+            the requests with the futures of their results
+        solver_type: SudokuSolverType
+            the solver used for the requests
+        time_limit: float
+            the time limit (in seconds) of every request
+        """
+        assert self._executor is not None and self._inline is not None
+        requests = [(request.id, request.puzzle) for request, _ in share]
+        inline = len(requests) == 1 and self._inlines(requests[0][1])
+        if inline:
+            self._inline_busy = True
+            solving = asyncio.get_running_loop().run_in_executor(
+                self._inline,
+                _solve_requests,
+                requests,
+                solver_type,
+                time_limit,
+                self._template_pool,
+                self.inline_sizes,
+            )
+        else:
+            self._busy += 1
+            if self._busy >= self.workers:
+                self._idle.clear()
+            solving = asyncio.wrap_future(
+                self._executor.submit(_solve_batch, requests, solver_type, time_limit)
+            )
+
+        def resolve(solving: asyncio.Future[list[SolveResult]]) -> None:
+            if inline:
+                self._inline_busy = False
+            else:
+                self._busy -= 1
+                if self._busy < self.workers:
+                    self._idle.set()
+            if solving.cancelled():
+                return
+            error = solving.exception()
+            for position, (request, result) in enumerate(share):
+                if result.done():
+                    continue
+                if error is None:
+                    result.set_result(solving.result()[position])
+                else:
+                    result.set_result(
+                        SolveResult(
+                            request.id, SolveStatus.ERROR, None, 0.0, repr(error)
+                        )
+                    )
+
+        solving.add_done_callback(resolve)
+
+
+def _warm_up(sizes: tuple[int, ...]) -> None:
+    """
+    Prepares a worker process: imports the solvers by solving
+    a small puzzle and encodes the SAT templates of the given sizes.
+
+    Parameters
+    -----------
+    sizes: tuple[int, ...]
+        grid sizes whose templates are encoded
+    """
+    _warm_templates(SatTemplatePool.shared(), sizes)
+    global _warm_sizes
+    _warm_sizes = frozenset(sizes)
+
+
+def _warm_templates(pool: SatTemplatePool, sizes: tuple[int, ...]) -> None:
+    """
+    Imports the solvers by solving a small puzzle
+    and encodes the SAT templates of the given sizes.
+
+    Parameters
+    -----------
+    pool: SatTemplatePool
+        the pool of the templates
+    sizes: tuple[int, ...]
+        grid sizes whose templates are encoded
+    """
+    for size in sizes:
+        with pool.acquire(size):
+            pass
+    empty = SudokuGrid(np.zeros((4, 4), dtype=np.uint))
+    SudokuSolverType.SAT.solve(empty, 1.0)
+
+
+def _solve_batch(
+    requests: list[tuple[int, SudokuGrid]],
+    solver_type: SudokuSolverType,
+    time_limit: float,
+) -> list[SolveResult]:
+    """
+    Solves a share of a batch in a worker process. The SAT solver uses
+    the warm templates for the grid sizes having them.
+
+    Parameters
+    -----------
+    requests: list[tuple[int, SudokuGrid]]
+        the ids of the requests with their puzzles
+    solver_type: SudokuSolverType
+        the solver used for every puzzle
+    time_limit: float
+        amount of time (in seconds) available for every puzzle
+
+    Returns
+    --------
+    results: list[SolveResult]
+        the results of the requests, indexed by their ids,
+        with the solutions in the compact dtype
+    """
+    return _solve_requests(
+        requests, solver_type, time_limit, SatTemplatePool.shared(), _warm_sizes
+    )
+
+
+def _solve_requests(
+    requests: list[tuple[int, SudokuGrid]],
+    solver_type: SudokuSolverType,
+    time_limit: float,
+    template_pool: SatTemplatePool,
+    warm_sizes: Collection[int],
+) -> list[SolveResult]:
+    """
+    Solves the requests one by one, the SAT solver uses
+    the templates of the pool for the warm grid sizes.
+
+    Parameters
+    -----------
+    requests: list[tuple[int, SudokuGrid]]
+        the ids of the requests with their puzzles
+    solver_type: SudokuSolverType
+        the solver used for every puzzle
+    time_limit: float
+        amount of time (in seconds) available for every puzzle
+    template_pool: SatTemplatePool
+        the warm SAT templates
+    warm_sizes: Collection[int]
+        grid sizes whose templates are warm in the pool
+
+    Returns
+    --------
+    results: list[SolveResult]
+        the results of the requests, indexed by their ids,
+        with the solutions in the compact dtype
+    """
+    results = []
+    for request_id, puzzle in requests:
+        options = {}
+        if solver_type == SudokuSolverType.SAT and puzzle.size in warm_sizes:
+            options["template_pool"] = template_pool
+        result = _solve_one(request_id, puzzle, solver_type, time_limit, options)
+        if result.solution is not None:
+            result = replace(result, solution=result.solution.compact())
+        results.append(result)
+    return results
@@ -0,0 +1,422 @@
+from __future__ import annotations
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import contextlib
+from dataclasses import dataclass
+from enum import StrEnum, auto
+from multiprocessing.shared_memory import SharedMemory
+import os
+import threading
+from timeit import default_timer as timer
+from typing import AsyncIterator, Iterable
+from src.model.grid import SudokuGrid
+from src.model.shared_slab import attach_shared_memory
+from src.solvers.batch import SolveResult, SolveStatus
+from src.solvers.feasibility import InfeasiblePuzzleError
+from src.solvers.solver import POLL_INTERVAL
+from src.solvers.solver_type import SudokuSolverType
+
+
+_attached_flags: dict[str, SharedMemory] = {}
+"""cancellation flags attached by this (worker) process, by name"""
+
+
+class ExecutorKind(StrEnum):
+    """
+    Where an `AsyncSolverPool` runs the solvers.
+
+    THREAD
+        threads of the calling process, the solvers share its GIL,
+        which suits the SAT solvers (the engines release it)
+    PROCESS
+        worker processes, the puzzles and solutions are pickled
+    """
+
+    THREAD = auto()
+    PROCESS = auto()
+
+
+@dataclass(frozen=True, slots=True)
+class _SharedFlag:
+    """
+    A cancellation flag of a solver running in a worker process:
+    a byte of a shared memory block, set by the event loop's process.
+
+    Attributes:
+    -----------
+    name: str
+        name of the shared memory block
+    index: int
+        position of the byte in the block
+    """
+
+    name: str
+    index: int
+
+    def is_set(self) -> bool:
+        if self.name not in _attached_flags:
+            _attached_flags[self.name] = attach_shared_memory(self.name)
+        return _attached_flags[self.name].buf[self.index] != 0
+
+
+class AsyncSolverPool:
+    """
+    Runs the solvers for asyncio code without blocking the event loop.
+
+    At most `max_concurrency` puzzles are solved at once, the others wait
+    for a free slot. Cancelling the task awaiting a puzzle stops its solver:
+    the SAT engine is interrupted and the backtracking solvers fail their
+    next `_timeout()` check (see `SudokuSolver.cancel`), and the slot
+    is freed only once the solver has actually stopped.
+
+    Usage
+    -----
+        `async with AsyncSolverPool(ExecutorKind.PROCESS, 8) as pool:`
+        `    solution = await pool.solve(grid, SudokuSolverType.SAT, 10.0)`
+        `    async for result in pool.solve_many(grids, SudokuSolverType.SAT, 10.0):`
+        `        ...`
+
+    or with a shared pool of threads:
+        `solution = await solve_async(grid, SudokuSolverType.SAT, 10.0)`
+
+    Attributes:
+    -----------
+    kind: ExecutorKind
+        where the solvers run
+    max_concurrency: int
+        how many puzzles are solved at once
+
+    Protected Attributes:
+    ---------------------
+    _executor: Executor
+        the executor running the solvers
+    _slots: asyncio.Semaphore
+        free slots for the puzzles
+    _flags: SharedMemory | None
+        cancellation flags of the slots for the `PROCESS` executor
+    _free_flags: list[int]
+        indices of the flags of the free slots
+    """
+
+    kind: ExecutorKind
+    max_concurrency: int
+    _executor: Executor
+    _slots: asyncio.Semaphore
+    _flags: SharedMemory | None
+    _free_flags: list[int]
+
+    def __init__(
+        self,
+        kind: ExecutorKind = ExecutorKind.THREAD,
+        max_concurrency: int | None = None,
+    ):
+        """
+        Initialize the pool.
+
+        Parameters
+        -----------
+        kind: ExecutorKind
+            where the solvers run
+        max_concurrency: int | None
+            how many puzzles are solved at once, by default the number of CPUs
+        """
+        self.kind = kind
+        self.max_concurrency = max_concurrency or os.cpu_count() or 1
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._free_flags = list(range(self.max_concurrency))
+        match kind:
+            case ExecutorKind.THREAD:
+                self._executor = ThreadPoolExecutor(self.max_concurrency)
+                self._flags = None
+            case ExecutorKind.PROCESS:
+                self._executor = ProcessPoolExecutor(self.max_concurrency)
+                self._flags = SharedMemory(create=True, size=self.max_concurrency)
+            case _:
+                raise NotImplementedError()
+
+    async def solve(
+        self,
+        puzzle: SudokuGrid,
+        solver_type: SudokuSolverType,
+        time_limit: float,
+        **options,
+    ) -> SudokuGrid | None:
+        """
+        Solves a puzzle like `SudokuSolverType.solve`, without blocking.
+
+        Parameters
+        -----------
+        puzzle: SudokuGrid
+            a sudoku puzzle to be solved
+        solver_type: SudokuSolverType
+            the solver to be used
+        time_limit: float
+            amount of time (in seconds) available to the solver,
+            the time spent waiting for a free slot is not counted
+        **options: Any
+            options passed to `solver_type.solve`
+
+        Returns
+        --------
+        solution: SudokuGrid | None
+            `None` if the puzzle has no solution, otherwise the solution
+
+        Raises
+        -------
+        timeout_error: TimeoutError
+            when the available time runs out
+        cancelled_error: asyncio.CancelledError
+            when the awaiting task is cancelled
+        """
+        async with self._slots:
+            flag_index = self._free_flags.pop()
+            if self._flags is None:
+                cancelled: threading.Event | _SharedFlag = threading.Event()
+            else:
+                self._flags.buf[flag_index] = 0
+                cancelled = _SharedFlag(self._flags.name, flag_index)
+            solving = asyncio.wrap_future(
+                self._executor.submit(
+                    _solve, puzzle, solver_type, time_limit, options, cancelled
+                )
+            )
+            try:
+                return await asyncio.shield(solving)
+            except asyncio.CancelledError:
+                if self._flags is None:
+                    cancelled.set()
+                else:
+                    self._flags.buf[flag_index] = 1
+                with contextlib.suppress(Exception):
+                    await solving
+                raise
+            finally:
+                self._free_flags.append(flag_index)
+
+    async def solve_many(
+        self,
+        puzzles: Iterable[SudokuGrid],
+        solver_type: SudokuSolverType,
+        time_limit: float,
+        **options,
+    ) -> AsyncIterator[SolveResult]:
+        """
+        Solves a batch of puzzles, at most `max_concurrency` of them at once.
+        The puzzles are taken from the iterable only when a slot is free.
+
+        Parameters
+        -----------
+        puzzles: Iterable[SudokuGrid]
+            the puzzles to be solved
+        solver_type: SudokuSolverType
+            the solver used for every puzzle
+        time_limit: float
+            amount of time (in seconds) available for every puzzle
+        **options: Any
+            options passed to `solver_type.solve`
+
+        Returns
+        --------
+        results: AsyncIterator[SolveResult]
+            a result for every puzzle, as soon as it is ready,
+            closing the iterator cancels the puzzles being solved
+        """
+        remaining = enumerate(puzzles)
+        running: set[asyncio.Task[SolveResult]] = set()
+        try:
+            while True:
+                for index, puzzle in remaining:
+                    running.add(
+                        asyncio.create_task(
+                            self._solve_result(
+                                index, puzzle, solver_type, time_limit, options
+                            )
+                        )
+                    )
+                    if len(running) >= self.max_concurrency:
+                        break
+                if not running:
+                    return
+                done, running = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+
+    async def _solve_result(
+        self,
+        index: int,
+        puzzle: SudokuGrid,
+        solver_type: SudokuSolverType,
+        time_limit: float,
+        options: dict,
+    ) -> SolveResult:
+        """
+        Solves a puzzle of a batch, turning every outcome into a result.
+
+        Returns
+        --------
+        result: SolveResult
+            the result of the puzzle
+        """
+        start = timer()
+        try:
+            solution = await self.solve(puzzle, solver_type, time_limit, **options)
+        except TimeoutError:
+            return SolveResult(index, SolveStatus.TIMEOUT, None, timer() - start)
+        except InfeasiblePuzzleError as error:
+            elapsed = timer() - start
+            return SolveResult(index, SolveStatus.UNSAT, None, elapsed, str(error))
+        except Exception as error:
+            elapsed = timer() - start
+            return SolveResult(index, SolveStatus.ERROR, None, elapsed, repr(error))
+        status = SolveStatus.UNSAT if solution is None else SolveStatus.SOLVED
+        return SolveResult(index, status, solution, timer() - start)
+
+    def close(self) -> None:
+        """
+        Waits for the running solvers and releases the executor.
+        """
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        if self._flags is not None:
+            self._flags.close()
+            self._flags.unlink()
+
+    async def __aenter__(self) -> AsyncSolverPool:
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await asyncio.to_thread(self.close)
+
+
+_default_pool: AsyncSolverPool | None = None
+"""a pool of threads used when no pool is given"""
+
+
+def _pool(pool: AsyncSolverPool | None) -> AsyncSolverPool:
+    global _default_pool
+    if pool is not None:
+        return pool
+    if _default_pool is None:
+        _default_pool = AsyncSolverPool(ExecutorKind.THREAD)
+    return _default_pool
+
+
+async def solve_async(
+    puzzle: SudokuGrid,
+    solver_type: SudokuSolverType,
+    time_limit: float,
+    pool: AsyncSolverPool | None = None,
+    **options,
+) -> SudokuGrid | None:
+    """
+    Solves a puzzle without blocking the event loop, see `AsyncSolverPool.solve`.
+
+    Parameters
+    -----------
+    puzzle: SudokuGrid
+        a sudoku puzzle to be solved
+    solver_type: SudokuSolverType
+        the solver to be used
+    time_limit: float
+        amount of time (in seconds) available to the solver
+    pool: AsyncSolverPool | None
+        the pool running the solver, by default a shared pool of threads
+    **options: Any
+        options passed to `solver_type.solve`
+
+    Returns
+    --------
+    solution: SudokuGrid | None
+        `None` if the puzzle has no solution, otherwise the solution
+    """
+    return await _pool(pool).solve(puzzle, solver_type, time_limit, **options)
+
+
+async def solve_many_async(
+    puzzles: Iterable[SudokuGrid],
+    solver_type: SudokuSolverType,
+    time_limit: float,
+    pool: AsyncSolverPool | None = None,
+    **options,
+) -> AsyncIterator[SolveResult]:
+    """
+    Solves a batch of puzzles without blocking the event loop,
+    see `AsyncSolverPool.solve_many`.
+
+    Parameters
+    -----------
+    puzzles: Iterable[SudokuGrid]
+        the puzzles to be solved
+    solver_type: SudokuSolverType
+        the solver used for every puzzle
+    time_limit: float
+        amount of time (in seconds) available for every puzzle
+    pool: AsyncSolverPool | None
+        the pool running the solvers, by default a shared pool of threads
+    **options: Any
+        options passed to `solver_type.solve`
+
+    Returns
+    --------
+    results: AsyncIterator[SolveResult]
+        a result for every puzzle, as soon as it is ready
+    """
+    results = _pool(pool).solve_many(puzzles, solver_type, time_limit, **options)
+    async with contextlib.aclosing(results):
+        async for result in results:
+            yield result
+
+
+def _solve(
+    puzzle: SudokuGrid,
+    solver_type: SudokuSolverType,
+    time_limit: float,
+    options: dict,
+    cancelled: threading.Event | _SharedFlag,
+) -> SudokuGrid | None:
+    """
+    Solves a puzzle in a thread or a worker process of the executor.
+
+    Parameters
+    -----------
+    puzzle: SudokuGrid
+        a sudoku puzzle to be solved
+    solver_type: SudokuSolverType
+        the solver to be used
+    time_limit: float
+        amount of time (in seconds) available to the solver
+    options: dict
+        options passed to `solver_type.solve`
+    cancelled: threading.Event | _SharedFlag
+        the cancellation flag of the puzzle, a shared flag
+        is copied into an event by a watcher thread
+
+    Returns
+    --------
+    solution: SudokuGrid | None
+        `None` if the puzzle has no solution, otherwise the solution
+    """
+    if isinstance(cancelled, threading.Event):
+        return solver_type.solve(puzzle, time_limit, cancelled=cancelled, **options)
+
+    event = threading.Event()
+    finished = threading.Event()
+
+    def watch() -> None:
+        while not finished.wait(POLL_INTERVAL):
+            if cancelled.is_set():
+                event.set()
+                return
+
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    try:
+        return solver_type.solve(puzzle, time_limit, cancelled=event, **options)
+    finally:
+        finished.set()
+        watcher.join()
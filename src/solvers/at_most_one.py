@@ -0,0 +1,45 @@
+from __future__ import annotations
+from enum import StrEnum, auto
+
+
+class AtMostOneEncoding(StrEnum):
+    """
+    Encodings of the "at most one of these propositions is true" constraint.
+
+    PAIRWISE:
+        forbids every pair of propositions, O(n^2) clauses, no auxiliary variables
+    SEQUENTIAL:
+        Sinz's sequential counter, 3n-4 clauses and n-1 auxiliary variables
+    PRODUCT:
+        Chen's 2-product encoding, ~2n clauses and ~2*sqrt(n) auxiliary variables
+    COMMANDER:
+        Klieber and Kwon's commander encoding with groups of three propositions
+    AUTO:
+        pairwise for small groups, commander for the larger ones
+
+    Methods:
+    --------
+    resolve(self, group_size: int) -> AtMostOneEncoding:
+        returns the concrete encoding used for a group of the given size
+    """
+
+    AUTO = auto()
+    PAIRWISE = auto()
+    SEQUENTIAL = auto()
+    PRODUCT = auto()
+    COMMANDER = auto()
+
+    def resolve(self, group_size: int) -> AtMostOneEncoding:
+        if self != AtMostOneEncoding.AUTO:
+            return self
+        if group_size <= PAIRWISE_LIMIT:
+            return AtMostOneEncoding.PAIRWISE
+        return AtMostOneEncoding.COMMANDER
+
+
+PAIRWISE_LIMIT = 6
+"""the largest group encoded pairwise by `AtMostOneEncoding.AUTO`
+   and the recursion base of the product and commander encodings"""
+
+COMMANDER_GROUP_SIZE = 3
+"""number of propositions controlled by a single commander variable"""
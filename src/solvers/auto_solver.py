@@ -0,0 +1,267 @@
+from __future__ import annotations
+from dataclasses import asdict, dataclass
+import json
+import math
+import os
+from pathlib import Path
+from typing import Iterable
+import numpy as np
+from src.model.grid import SudokuGrid
+from src.solvers.cube_solver import CubeAndConquerSatSudokuSolver
+from src.solvers.first_fail_solver import FirstFailSudokuSolver
+from src.solvers.sat_solver import SatSudokuSolver
+from src.solvers.solver import SudokuSolver
+
+
+SELECTABLE_SOLVERS: dict[str, type[SudokuSolver]] = {
+    "first_fail": FirstFailSudokuSolver,
+    "sat": SatSudokuSolver,
+    "cube_and_conquer": CubeAndConquerSatSudokuSolver,
+}
+"""solvers the automatic selection chooses from,
+   named like the members of `SudokuSolverType`"""
+
+DEFAULT_SOLVER = "sat"
+"""the solver chosen without a selection table"""
+
+SELECTION_PATH = Path(
+    os.environ.get("SUDOKU_SOLVER_SELECTION", "solver_selection.json")
+)
+"""where the selection table is stored,
+   can be overridden by the SUDOKU_SOLVER_SELECTION environment variable"""
+
+_loaded_tables: dict[Path, tuple[float, list[tuple[PuzzleFeatures, str]]]] = {}
+"""selection tables already read, with the modification times of their files"""
+
+
+@dataclass(frozen=True, slots=True)
+class PuzzleFeatures:
+    """
+    Cheap features of a puzzle predicting which solver is the fastest.
+    They take a single pass over the candidates of the grid.
+
+    Attributes:
+    -----------
+    size: int
+        size of the grid
+    fill_ratio: float
+        fraction of the filled cells
+    mean_candidates: float
+        average number of the candidates of an empty cell,
+        relative to the size of the grid
+    max_candidates: float
+        the largest number of the candidates of an empty cell,
+        relative to the size of the grid
+    naked_singles: float
+        fraction of the empty cells having a single candidate
+
+    Properties:
+    -----------
+    vector: np.ndarray
+        the features as a point, for measuring distances between puzzles
+    """
+
+    size: int
+    fill_ratio: float
+    mean_candidates: float
+    max_candidates: float
+    naked_singles: float
+
+    @property
+    def vector(self) -> np.ndarray:
+        """
+        Returns
+        --------
+        vector: np.ndarray
+            the features, with the size on a logarithmic scale,
+            so all of them have comparable ranges
+        """
+        return np.array(
+            [
+                math.log2(self.size),
+                self.fill_ratio,
+                self.mean_candidates,
+                self.max_candidates,
+                self.naked_singles,
+            ]
+        )
+
+    @staticmethod
+    def of(puzzle: SudokuGrid) -> PuzzleFeatures:
+        """
+        Computes the features of a puzzle.
+
+        Parameters
+        -----------
+        puzzle: SudokuGrid
+            a sudoku puzzle
+
+        Returns
+        --------
+        features: PuzzleFeatures
+            the features of the puzzle
+        """
+        size = puzzle.size
+        empty = np.asarray(puzzle[:, :]) == 0
+        counts = puzzle.candidates().sum(axis=2, dtype=np.int32)[empty]
+        if counts.size == 0:
+            return PuzzleFeatures(size, 1.0, 0.0, 0.0, 0.0)
+        return PuzzleFeatures(
+            size,
+            1.0 - counts.size / (size * size),
+            float(counts.mean()) / size,
+            float(counts.max()) / size,
+            float(np.count_nonzero(counts == 1)) / counts.size,
+        )
+
+
+class AutoSudokuSolver(SudokuSolver):
+    """
+    A solver picking the solver predicted to be the fastest for the puzzle.
+    The prediction is the fastest solver of the most similar puzzle
+    (the nearest one by `PuzzleFeatures`) in a selection table
+    fitted from the benchmark timings (see `benchmark.py --fit-auto`).
+
+    Usage
+    -----
+        `solution = SudokuSolverType.AUTO.solve(grid, 10.0)`
+
+    Protected Attributes:
+    ---------------------
+    _solver_name: str
+        name of the chosen solver (a key of `SELECTABLE_SOLVERS`)
+    """
+
+    _solver_name: str
+
+    def __init__(self, puzzle: SudokuGrid, time_limit: float):
+        super().__init__(puzzle, time_limit)
+        self._solver_name = select_solver(PuzzleFeatures.of(puzzle))
+
+    def run_algorithm(self) -> SudokuGrid | None:
+        return self._chosen_solver().run_algorithm()
+
+    def count_solutions_up_to(self, limit: int) -> int:
+        return self._chosen_solver().count_solutions_up_to(limit)
+
+    def _chosen_solver(self) -> SudokuSolver:
+        """
+        Returns
+        --------
+        solver: SudokuSolver
+            the chosen solver of the puzzle, with the remaining time,
+            the restrictions and the cancellation of this solver
+        """
+        solver_class = SELECTABLE_SOLVERS[self._solver_name]
+        solver = solver_class(self._puzzle, self._remaining_time())
+        if self._candidates is not None:
+            solver.restrict(self._candidates)
+        solver._cancelled = self._cancelled
+        return solver
+
+
+def fit_selection(
+    timings: Iterable[tuple[PuzzleFeatures, dict[str, float]]],
+) -> list[tuple[PuzzleFeatures, str]]:
+    """
+    Fits the selection table: the fastest solver of every timed puzzle.
+
+    Parameters
+    -----------
+    timings: Iterable[tuple[PuzzleFeatures, dict[str, float]]]
+        features of the puzzles with the times of the solvers,
+        a solver failing on the puzzle should have an infinite time
+
+    Returns
+    --------
+    table: list[tuple[PuzzleFeatures, str]]
+        features of the puzzles solved by any solver with the fastest one
+    """
+    table = []
+    for features, took in timings:
+        best = min(took, key=lambda name: took[name], default=None)
+        if best is not None and math.isfinite(took[best]):
+            table.append((features, best))
+    return table
+
+
+def save_selection(
+    table: list[tuple[PuzzleFeatures, str]], path: Path = SELECTION_PATH
+) -> None:
+    """
+    Saves the selection table.
+
+    Parameters
+    -----------
+    table: list[tuple[PuzzleFeatures, str]]
+        features of the puzzles with their fastest solvers
+    path: Path
+        a path of the selection file
+    """
+    selection = {
+        "puzzles": [
+            {"features": asdict(features), "solver": solver}
+            for features, solver in table
+        ]
+    }
+    path.write_text(json.dumps(selection, indent=2) + "\n")
+
+
+def load_selection(path: Path = SELECTION_PATH) -> list[tuple[PuzzleFeatures, str]]:
+    """
+    Loads the selection table. The file is read again only after it changes.
+
+    Parameters
+    -----------
+    path: Path
+        a path of the selection file
+
+    Returns
+    --------
+    table: list[tuple[PuzzleFeatures, str]]
+        features of the puzzles with their fastest solvers,
+        empty if there is no (valid) table
+    """
+    try:
+        modified = path.stat().st_mtime
+    except FileNotFoundError:
+        return []
+    if path in _loaded_tables and _loaded_tables[path][0] == modified:
+        return _loaded_tables[path][1]
+
+    try:
+        selection = json.loads(path.read_text())
+        table = [
+            (PuzzleFeatures(**entry["features"]), entry["solver"])
+            for entry in selection["puzzles"]
+            if entry["solver"] in SELECTABLE_SOLVERS
+        ]
+    except (ValueError, KeyError, TypeError):
+        table = []
+    _loaded_tables[path] = (modified, table)
+    return table
+
+
+def select_solver(features: PuzzleFeatures, path: Path = SELECTION_PATH) -> str:
+    """
+    Predicts the fastest solver for a puzzle.
+
+    Parameters
+    -----------
+    features: PuzzleFeatures
+        features of the puzzle
+    path: Path
+        a path of the selection file
+
+    Returns
+    --------
+    solver: str
+        name of the fastest solver of the nearest puzzle in the table,
+        `DEFAULT_SOLVER` without a table
+    """
+    table = load_selection(path)
+    if not table:
+        return DEFAULT_SOLVER
+    points = np.stack([known.vector for known, _ in table])
+    distances = np.linalg.norm(points - features.vector, axis=1)
+    return table[int(distances.argmin())][1]
@@ -0,0 +1,395 @@
+from __future__ import annotations
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from enum import StrEnum, auto
+import json
+from itertools import batched, islice
+import math
+import os
+from timeit import default_timer as timer
+from typing import Iterable, Iterator
+from src.model.grid import SudokuGrid
+from src.model.shared_slab import GridSlot, SharedGridSlab
+from src.solvers.feasibility import InfeasiblePuzzleError
+from src.solvers.solver_type import SudokuSolverType
+
+
+CHUNKS_PER_WORKER = 4
+"""how many chunks every worker gets by default, more chunks balance
+   the work better but cost more round trips to the workers"""
+
+IN_FLIGHT_PER_WORKER = 2
+"""how many puzzles of a stream every worker gets by default, one being
+   solved and one waiting, so a worker never idles between the puzzles"""
+
+
+class SolveStatus(StrEnum):
+    """
+    Outcome of solving a single puzzle of a batch.
+
+    SOLVED
+        a solution has been found
+    UNSAT
+        the puzzle has no solution
+    TIMEOUT
+        the time limit has run out
+    ERROR
+        the solver has failed, e.g. the puzzle is invalid
+    """
+
+    SOLVED = auto()
+    UNSAT = auto()
+    TIMEOUT = auto()
+    ERROR = auto()
+
+
+@dataclass(frozen=True, slots=True)
+class SolveResult:
+    """
+    Result of solving a single puzzle of a batch.
+
+    Attributes:
+    -----------
+    index: int
+        position of the puzzle in the batch
+    status: SolveStatus
+        outcome of the solving
+    solution: SudokuGrid | None
+        the solution, if it has been found
+    elapsed: float
+        time (in seconds) spent on the puzzle
+    error: str | None
+        description of the failure for the `ERROR` status,
+        or why the puzzle has no solution for an `UNSAT` one rejected without solving
+    """
+
+    index: int
+    status: SolveStatus
+    solution: SudokuGrid | None
+    elapsed: float
+    error: str | None = None
+
+    def to_json(self, **fields) -> str:
+        """
+        Encodes the result as a single JSON line (without the newline), e.g.
+
+        ```
+        {"index": 7, "status": "solved", "elapsed": 0.01, "solution": [[...], ...]}
+        ```
+
+        with `error` in place of `solution` for the `error` status
+        (and for the `unsat` puzzles rejected without solving).
+
+        Parameters
+        -----------
+        **fields: Any
+            further fields of the line, e.g. the source of the puzzle
+
+        Returns
+        --------
+        line: str
+            the encoded result
+        """
+        line: dict = {
+            "index": self.index,
+            "status": str(self.status),
+            "elapsed": self.elapsed,
+        }
+        if self.solution is not None:
+            line["solution"] = self.solution[:, :].tolist()
+        if self.error is not None:
+            line["error"] = self.error
+        return json.dumps(line | fields, separators=(",", ":"))
+
+
+def solve_many(
+    puzzles: Iterable[SudokuGrid],
+    solver_type: SudokuSolverType,
+    time_limit: float,
+    workers: int | None = None,
+    ordered: bool = True,
+    chunk_size: int | None = None,
+    **options,
+) -> Iterator[SolveResult]:
+    """
+    Solves a batch of puzzles with a pool of worker processes.
+    The puzzles are shared with the workers through a `SharedGridSlab`
+    and sent in chunks, so a task carries only the descriptors of its puzzles.
+    With a single worker the puzzles are solved one by one
+    in the calling process, without starting any.
+
+    Usage
+    -----
+        `for result in solve_many(puzzles, SudokuSolverType.SAT, 10.0, workers=8):`
+        `    print(result.index, result.status, result.elapsed)`
+
+    Parameters
+    -----------
+    puzzles: Iterable[SudokuGrid]
+        the puzzles to be solved
+    solver_type: SudokuSolverType
+        the solver used for every puzzle
+    time_limit: float
+        amount of time (in seconds) available for every puzzle
+    workers: int | None
+        number of the worker processes, by default the number of CPUs
+    ordered: bool
+        yield the results in the order of the puzzles,
+        otherwise as soon as they are ready
+    chunk_size: int | None
+        how many puzzles are sent to a worker at once, by default
+        the puzzles are split into `CHUNKS_PER_WORKER` chunks per worker
+    **options: Any
+        options passed to `solver_type.solve`
+
+    Returns
+    --------
+    results: Iterator[SolveResult]
+        a result for every puzzle
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for index, puzzle in enumerate(puzzles):
+            yield _solve_one(index, puzzle, solver_type, time_limit, options)
+        return
+
+    with SharedGridSlab.create(puzzles) as slab:
+        slots = list(enumerate(slab.slots))
+        if not slots:
+            return
+        if chunk_size is None:
+            chunk_size = math.ceil(len(slots) / (workers * CHUNKS_PER_WORKER))
+
+        executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            pending = {
+                executor.submit(
+                    _solve_chunk, slab.name, chunk, solver_type, time_limit, options
+                ): chunk
+                for chunk in batched(slots, chunk_size)
+            }
+            ready: dict[int, SolveResult] = {}
+            next_index = 0
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk = pending.pop(future)
+                    for (index, slot), (status, elapsed, error) in zip(
+                        chunk, future.result()
+                    ):
+                        solved = status == SolveStatus.SOLVED
+                        solution = slab.solution(slot) if solved else None
+                        result = SolveResult(index, status, solution, elapsed, error)
+                        if not ordered:
+                            yield result
+                        else:
+                            ready[index] = result
+                while next_index in ready:
+                    yield ready.pop(next_index)
+                    next_index += 1
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def solve_stream(
+    puzzles: Iterable[SudokuGrid | Exception],
+    solver_type: SudokuSolverType,
+    time_limit: float,
+    workers: int | None = None,
+    window: int | None = None,
+    ordered: bool = False,
+    **options,
+) -> Iterator[SolveResult]:
+    """
+    Solves a stream of puzzles of any length in bounded memory.
+    Unlike `solve_many` the puzzles are not gathered up front: a puzzle
+    is taken from the iterable only when fewer than `window` puzzles are
+    in flight (sent to a worker, or solved but waiting for their turn
+    when `ordered`), so a slow consumer holds back the reading as well.
+    An exception in place of a puzzle (e.g. a record which could not be
+    parsed, see `read_puzzles`) becomes an `ERROR` result and the stream
+    goes on. An exception raised by the iterable itself stops the reading,
+    it is re-raised once the puzzles in flight have yielded their results.
+
+    Usage
+    -----
+        `with open("corpus.txt") as lines:`
+        `    puzzles = read_puzzles(lines, strict=False)`
+        `    for result in solve_stream(puzzles, SudokuSolverType.SAT, 10.0):`
+        `        print(result.index, result.status)`
+
+    Parameters
+    -----------
+    puzzles: Iterable[SudokuGrid | Exception]
+        the puzzles to be solved, taken lazily,
+        or the errors of the puzzles which could not be read
+    solver_type: SudokuSolverType
+        the solver used for every puzzle
+    time_limit: float
+        amount of time (in seconds) available for every puzzle
+    workers: int | None
+        number of the worker processes, by default the number of CPUs,
+        a single worker solves the puzzles in the calling process
+    window: int | None
+        the largest number of the puzzles in flight,
+        by default `IN_FLIGHT_PER_WORKER` per worker
+    ordered: bool
+        yield the results in the order of the puzzles,
+        otherwise as soon as they are ready
+    **options: Any
+        options passed to `solver_type.solve`
+
+    Returns
+    --------
+    results: Iterator[SolveResult]
+        a result for every puzzle
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for index, puzzle in enumerate(puzzles):
+            if isinstance(puzzle, Exception):
+                yield _unreadable(index, puzzle)
+            else:
+                yield _solve_one(index, puzzle, solver_type, time_limit, options)
+        return
+
+    window = window or workers * IN_FLIGHT_PER_WORKER
+    remaining: Iterator[tuple[int, SudokuGrid | Exception]] = enumerate(puzzles)
+    failure: Exception | None = None
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending: set[Future[SolveResult]] = set()
+        ready: dict[int, SolveResult] = {}
+        next_index = 0
+        while True:
+            free = window - len(pending) - len(ready)
+            finished: list[SolveResult] = []
+            try:
+                for index, puzzle in islice(remaining, max(free, 0)):
+                    if isinstance(puzzle, Exception):
+                        finished.append(_unreadable(index, puzzle))
+                        continue
+                    pending.add(
+                        executor.submit(
+                            _solve_one, index, puzzle, solver_type, time_limit, options
+                        )
+                    )
+            except Exception as error:
+                failure = error
+                remaining = iter(())
+            if not pending and not ready and not finished:
+                break
+            if pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                finished.extend(future.result() for future in done)
+            for result in finished:
+                if not ordered:
+                    yield result
+                else:
+                    ready[result.index] = result
+            while next_index in ready:
+                yield ready.pop(next_index)
+                next_index += 1
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    if failure is not None:
+        raise failure
+
+
+def _solve_one(
+    index: int,
+    puzzle: SudokuGrid,
+    solver_type: SudokuSolverType,
+    time_limit: float,
+    options: dict,
+) -> SolveResult:
+    """
+    Solves a single puzzle, turning every outcome into a result.
+
+    Parameters
+    -----------
+    index: int
+        position of the puzzle in the batch
+    puzzle: SudokuGrid
+        the puzzle to be solved
+    solver_type: SudokuSolverType
+        the solver to be used
+    time_limit: float
+        amount of time (in seconds) available to the solver
+    options: dict
+        options passed to `solver_type.solve`
+
+    Returns
+    --------
+    result: SolveResult
+        the result of the puzzle
+    """
+    start = timer()
+    try:
+        solution = solver_type.solve(puzzle, time_limit, **options)
+    except TimeoutError:
+        return SolveResult(index, SolveStatus.TIMEOUT, None, timer() - start)
+    except InfeasiblePuzzleError as error:
+        elapsed = timer() - start
+        return SolveResult(index, SolveStatus.UNSAT, None, elapsed, str(error))
+    except Exception as error:
+        elapsed = timer() - start
+        return SolveResult(index, SolveStatus.ERROR, None, elapsed, repr(error))
+    status = SolveStatus.UNSAT if solution is None else SolveStatus.SOLVED
+    return SolveResult(index, status, solution, timer() - start)
+
+
+def _unreadable(index: int, error: Exception) -> SolveResult:
+    """
+    Parameters
+    -----------
+    index: int
+        position of the puzzle in the stream
+    error: Exception
+        the error raised while reading the puzzle
+
+    Returns
+    --------
+    result: SolveResult
+        the `ERROR` result of the puzzle
+    """
+    return SolveResult(index, SolveStatus.ERROR, None, 0.0, str(error))
+
+
+def _solve_chunk(
+    name: str,
+    chunk: tuple[tuple[int, GridSlot], ...],
+    solver_type: SudokuSolverType,
+    time_limit: float,
+    options: dict,
+) -> list[tuple[SolveStatus, float, str | None]]:
+    """
+    Solves a chunk of the puzzles in a worker process,
+    the solutions are stored in the slab.
+
+    Parameters
+    -----------
+    name: str
+        name of the slab holding the puzzles
+    chunk: tuple[tuple[int, GridSlot], ...]
+        positions in the batch and slots of the puzzles
+    solver_type: SudokuSolverType
+        the solver to be used
+    time_limit: float
+        amount of time (in seconds) available for every puzzle
+    options: dict
+        options passed to `solver_type.solve`
+
+    Returns
+    --------
+    outcomes: list[tuple[SolveStatus, float, str | None]]
+        the status, the time and the error of every puzzle
+    """
+    slab = SharedGridSlab.attach(name)
+    outcomes = []
+    for index, slot in chunk:
+        result = _solve_one(index, slab.puzzle(slot), solver_type, time_limit, options)
+        if result.solution is not None:
+            slab.store(slot, result.solution)
+        outcomes.append((result.status, result.elapsed, result.error))
+    return outcomes
@@ -0,0 +1,298 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import hashlib
+import json
+import math
+import os
+from pathlib import Path
+import tempfile
+import time
+import numpy as np
+import numpy.typing as npt
+from src.model.grid import Candidates, SudokuGrid
+from src.solvers.at_most_one import AtMostOneEncoding
+from src.solvers.vectorized_cnf import PropositionTable, VectorizedSudokuCNF
+
+
+MAGIC = b"SCNF"
+"""first bytes of every cache file"""
+
+FORMAT_VERSION = 1
+"""version of the cache file layout, part of the cache key"""
+
+ALIGNMENT = 64
+"""every array in a cache file starts at a multiple of this many bytes"""
+
+STALE_TEMPORARY_AGE = 600.0
+"""age (in seconds) after which a temporary file of an unfinished store
+   is considered abandoned by a crashed writer and removed"""
+
+
+@dataclass(frozen=True, slots=True)
+class CNFCache:
+    """
+    An on-disk cache of the sudoku encodings.
+
+    Every entry is a single binary file named after a content hash
+    of the puzzle and the encoding options. The file contains:
+    - `MAGIC` and the length of the header (4 bytes, little endian)
+    - a JSON header describing the arrays stored in the file,
+      their offsets are relative to the end of the header
+    - the proposition table and the clause blocks, aligned to `ALIGNMENT`
+
+    On a hit the arrays are memory-mapped, so loading costs no encoding
+    and almost no copying. The least recently used entries are evicted
+    whenever the directory grows over `max_bytes`.
+
+    Usage
+    -----
+        `cache = CNFCache(Path(".cnf_cache"))`
+        `sudoku_cnf = cache.encode(grid)`
+
+    Attributes:
+    -----------
+    directory: Path
+        a directory containing the cache files
+    max_bytes: int
+        the largest total size of the cache files
+    """
+
+    directory: Path
+    max_bytes: int = 1 << 30
+
+    def encode(
+        self,
+        puzzle: SudokuGrid,
+        encoding: AtMostOneEncoding = AtMostOneEncoding.AUTO,
+        candidates: Candidates | None = None,
+    ) -> VectorizedSudokuCNF:
+        """
+        Returns the cached encoding of the puzzle,
+        encodes and stores the puzzle if it is not in the cache yet.
+
+        Parameters
+        ----------
+        puzzle: SudokuGrid
+            a sudoku puzzle to be encoded
+        encoding: AtMostOneEncoding
+            encoding of the "at most one" constraints
+        candidates: Candidates | None
+            restrictions of the cell values, part of the cache key
+
+        Returns
+        -------
+        encoding: VectorizedSudokuCNF
+            Conjunctive Normal Form encoding of the specified puzzle
+        """
+        sudoku_cnf = self.load(puzzle, encoding, candidates)
+        if sudoku_cnf is None:
+            sudoku_cnf = VectorizedSudokuCNF.encode(puzzle, encoding, candidates)
+            self.store(sudoku_cnf, encoding, candidates)
+        return sudoku_cnf
+
+    def load(
+        self,
+        puzzle: SudokuGrid,
+        encoding: AtMostOneEncoding,
+        candidates: Candidates | None = None,
+    ) -> VectorizedSudokuCNF | None:
+        """
+        Loads a cached encoding of the puzzle.
+
+        Parameters
+        ----------
+        puzzle: SudokuGrid
+            a sudoku puzzle whose encoding is requested
+        encoding: AtMostOneEncoding
+            encoding of the "at most one" constraints
+        candidates: Candidates | None
+            restrictions of the cell values
+
+        Returns
+        -------
+        encoding: VectorizedSudokuCNF | None
+            `None` if the encoding is not cached, otherwise a memory-mapped encoding,
+            a damaged cache file counts as a miss and is removed
+        """
+        path = self._path(puzzle, encoding, candidates)
+        try:
+            sudoku_cnf = _read_entry(path, puzzle)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError):
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path)
+        return sudoku_cnf
+
+    def store(
+        self,
+        sudoku_cnf: VectorizedSudokuCNF,
+        encoding: AtMostOneEncoding,
+        candidates: Candidates | None = None,
+    ) -> None:
+        """
+        Stores the encoding in the cache and evicts the least recently used
+        entries if the cache grows too large.
+
+        Parameters
+        ----------
+        sudoku_cnf: VectorizedSudokuCNF
+            an encoding containing all its clauses, i.e. not a streamed one
+        encoding: AtMostOneEncoding
+            encoding of the "at most one" constraints used by `sudoku_cnf`
+        candidates: Candidates | None
+            restrictions of the cell values used by `sudoku_cnf`
+        """
+        propositions = sudoku_cnf.propositions
+        arrays: list[npt.NDArray] = [
+            propositions.rows,
+            propositions.cols,
+            propositions.blocks,
+            propositions.vals,
+            *sudoku_cnf.clauses,
+        ]
+        descriptions = []
+        offset = 0
+        for array in arrays:
+            descriptions.append([array.dtype.str, list(array.shape), offset])
+            offset = _aligned(offset + array.nbytes)
+        header = json.dumps(
+            {"top_id": sudoku_cnf.top_id, "arrays": descriptions}
+        ).encode()
+        data_start = _aligned(len(MAGIC) + 4 + len(header))
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(sudoku_cnf.puzzle, encoding, candidates)
+        with tempfile.NamedTemporaryFile(
+            dir=self.directory, suffix=".tmp", delete=False
+        ) as f:
+            try:
+                f.write(MAGIC)
+                f.write(len(header).to_bytes(4, "little"))
+                f.write(header)
+                for (_, _, offset), array in zip(descriptions, arrays):
+                    f.seek(data_start + offset)
+                    f.write(np.ascontiguousarray(array).tobytes())
+            except BaseException:
+                f.close()
+                os.unlink(f.name)
+                raise
+        os.replace(f.name, path)
+        self._evict()
+
+    def _path(
+        self,
+        puzzle: SudokuGrid,
+        encoding: AtMostOneEncoding,
+        candidates: Candidates | None = None,
+    ) -> Path:
+        """
+        Returns a path of the cache file of the given puzzle.
+
+        Parameters
+        ----------
+        puzzle: SudokuGrid
+            a sudoku puzzle
+        encoding: AtMostOneEncoding
+            encoding of the "at most one" constraints
+        candidates: Candidates | None
+            restrictions of the cell values
+
+        Returns
+        --------
+        path: Path
+            a path named after the content hash of the puzzle and the options
+        """
+        digest = hashlib.sha256()
+        digest.update(f"{FORMAT_VERSION}:{encoding}:{puzzle.size}:".encode())
+        digest.update(np.ascontiguousarray(puzzle[:, :], dtype="<u4").tobytes())
+        if candidates is not None:
+            digest.update(np.packbits(candidates).tobytes())
+        return self.directory.joinpath(f"{digest.hexdigest()}.cnf")
+
+    def _evict(self) -> None:
+        """
+        Removes the least recently used cache files until the cache
+        fits within `max_bytes`, and the temporary files left behind
+        by the writers which have crashed.
+        """
+        stale = time.time() - STALE_TEMPORARY_AGE
+        for path in self.directory.glob("*.tmp"):
+            try:
+                if path.stat().st_mtime < stale:
+                    path.unlink(missing_ok=True)
+            except FileNotFoundError:
+                continue
+
+        entries = []
+        for path in self.directory.glob("*.cnf"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+def _read_entry(path: Path, puzzle: SudokuGrid) -> VectorizedSudokuCNF:
+    """
+    Memory-maps a cache file.
+
+    Parameters
+    ----------
+    path: Path
+        a path of the cache file
+    puzzle: SudokuGrid
+        the puzzle encoded in the file
+
+    Returns
+    -------
+    encoding: VectorizedSudokuCNF
+        the memory-mapped encoding
+
+    Raises
+    -------
+    value_error: ValueError
+        when the file is not a complete cache entry,
+        e.g. it has been truncated
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("not a cache file")
+        header_length = int.from_bytes(f.read(4), "little")
+        header = json.loads(f.read(header_length))
+        file_size = os.fstat(f.fileno()).st_size
+
+    data_start = _aligned(len(MAGIC) + 4 + header_length)
+    descriptions = [
+        (np.dtype(dtype), tuple(shape), data_start + offset)
+        for dtype, shape, offset in header["arrays"]
+    ]
+    if len(descriptions) < 4:
+        raise ValueError("the proposition table is missing")
+    end = max(
+        offset + dtype.itemsize * math.prod(shape)
+        for dtype, shape, offset in descriptions
+    )
+    if end > file_size:
+        raise ValueError("the cache file is truncated")
+
+    arrays = [
+        np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape)
+        if math.prod(shape) > 0
+        else np.empty(shape, dtype=dtype)
+        for dtype, shape, offset in descriptions
+    ]
+    propositions = PropositionTable(*arrays[:4])
+    return VectorizedSudokuCNF(arrays[4:], propositions, puzzle, header["top_id"])
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
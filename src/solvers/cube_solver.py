@@ -0,0 +1,302 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+import numpy as np
+from pysat.solvers import Solver  # type: ignore[import-untyped]
+from src.model.grid import Candidates, SudokuGrid
+from src.solvers.at_most_one import AtMostOneEncoding
+from src.solvers.sat_backend import SatBackend
+from src.solvers.sat_solver import SatSudokuSolver
+from src.solvers.solver import POLL_INTERVAL
+from src.solvers.vectorized_cnf import PropositionTable
+
+
+CUBES_PER_WORKER = 4
+"""how many cubes should be created for every worker,
+   more cubes balance the work better but cost more solver calls"""
+
+_worker_solver: Solver | None = None
+"""a solver loaded with the puzzle, one per worker process"""
+
+_worker_backend: SatBackend | None = None
+"""the SAT engine of the worker solver"""
+
+_worker_stop: threading.Event | None = None
+"""an event shared by all the workers, set when the search should stop"""
+
+
+class CubeAndConquerSatSudokuSolver(SatSudokuSolver):
+    """
+    A parallel SAT-based sudoku solver using the cube-and-conquer approach:
+    - https://en.wikipedia.org/wiki/Cube-and-conquer
+
+    The most constrained empty cells (the ones with the fewest candidates)
+    are fixed to every combination of their candidates. Each combination
+    (a "cube") is a list of assumptions solved by one of the worker processes.
+    Every worker encodes the puzzle once and keeps its solver warm for all
+    the cubes it receives. As soon as a worker finds a model, the other
+    workers are interrupted and the pending cubes are cancelled.
+
+    Small puzzles are not worth the start of the workers, so the solver
+    falls back to the sequential SAT solver whenever there is a single cube
+    (e.g. every empty cell has only one candidate) or a single worker.
+
+    Usage
+    -----
+        `solution = SudokuSolverType.CUBE_AND_CONQUER.solve(grid, 60.0, workers=8)`
+
+    Protected Attributes:
+    ---------------------
+    _workers: int
+        number of the worker processes
+    """
+
+    _workers: int
+
+    def __init__(
+        self,
+        puzzle: SudokuGrid,
+        time_limit: float,
+        workers: int | None = None,
+        **options,
+    ):
+        """
+        Initialize the solver.
+
+        Parameters
+        -----------
+        puzzle: SudokuGrid
+            a sudoku puzzle to be solved
+        time_limit: float
+            amount of time (in seconds) available to the solver
+        workers: int | None
+            number of the worker processes, by default the number of CPUs
+        options:
+            options of `SatSudokuSolver`, used by every worker
+        """
+        super().__init__(puzzle, time_limit, **options)
+        self._workers = workers or os.cpu_count() or 1
+
+    def run_algorithm(self) -> SudokuGrid | None:
+        propositions = PropositionTable.from_grid(self._puzzle, self._candidates)
+        cubes = self._cubes(propositions)
+        if self._workers == 1 or len(cubes) <= 1:
+            return super().run_algorithm()
+
+        context = multiprocessing.get_context()
+        stop = context.Event()
+        deadline = time.time() + self._remaining_time()
+        executor = ProcessPoolExecutor(
+            max_workers=min(self._workers, len(cubes)),
+            mp_context=context,
+            initializer=_start_worker,
+            initargs=(
+                self._puzzle,
+                self._candidates,
+                self._encoding,
+                self._backend,
+                stop,
+                deadline,
+            ),
+        )
+        # a cancelled solver stops the workers the same way a found model does
+        watcher = threading.Thread(target=self._watch, args=(stop,), daemon=True)
+        watcher.start()
+        timed_out = False
+        try:
+            futures = [executor.submit(_solve_cube, cube, deadline) for cube in cubes]
+            interrupted = False
+            for future in as_completed(futures, timeout=self._remaining_time()):
+                solved, model = future.result()
+                if solved:
+                    return propositions.decode(self._puzzle, model)
+                interrupted = interrupted or solved is None
+            if interrupted:
+                raise TimeoutError
+            return None
+        except TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            stop.set()
+            watcher.join()
+            # the workers notice the stop event within a clause chunk
+            # or a poll interval, a timed out solver does not wait for them
+            executor.shutdown(wait=not timed_out, cancel_futures=True)
+
+    def _watch(self, stop: threading.Event) -> None:
+        """
+        Sets the stop event of the workers once the solver is cancelled.
+
+        Parameters
+        -----------
+        stop: threading.Event
+            the event shared by the workers, also set when the search ends
+        """
+        while not stop.wait(POLL_INTERVAL):
+            if self._cancelled.is_set():
+                stop.set()
+
+    def _cubes(self, propositions: PropositionTable) -> list[list[int]]:
+        """
+        Splits the search into cubes by fixing the values of the most
+        constrained empty cells. Cubes putting the same value twice
+        in a row, a column or a block are left out.
+
+        Parameters
+        -----------
+        propositions: PropositionTable
+            propositions of the puzzle encoding
+
+        Returns
+        --------
+        cubes: list[list[int]]
+            identifiers of the propositions assumed by every cube,
+            empty if some empty cell has no candidates
+        """
+        size = self._puzzle.size
+        cells = propositions.rows * size + propositions.cols
+        candidates = np.bincount(cells, minlength=size * size)
+        empty = np.flatnonzero(np.asarray(self._puzzle[:, :]).ravel() == 0)
+        if empty.size == 0 or candidates[empty].min() == 0:
+            return []
+
+        fixed: list[int] = []
+        count = 1
+        for cell in empty[np.argsort(candidates[empty], kind="stable")]:
+            if count >= self._workers * CUBES_PER_WORKER:
+                break
+            fixed.append(cell)
+            count *= int(candidates[cell])
+
+        ids = propositions.ids.tolist()
+        return [
+            list(cube)
+            for cube in itertools.product(
+                *([ids[i] for i in np.flatnonzero(cells == cell)] for cell in fixed)
+            )
+            if self._consistent(propositions, np.asarray(cube) - 1)
+        ]
+
+    @staticmethod
+    def _consistent(propositions: PropositionTable, indices: np.ndarray) -> bool:
+        """
+        Checks whether the propositions can hold together.
+
+        Parameters
+        -----------
+        propositions: PropositionTable
+            propositions of the puzzle encoding
+        indices: np.ndarray
+            indices of the propositions in the table
+
+        Returns
+        --------
+        consistent: bool
+            `False` if two propositions put the same value
+            in the same row, column or block
+        """
+        vals = propositions.vals[indices]
+        for units in (propositions.rows, propositions.cols, propositions.blocks):
+            keys = units[indices].astype(np.int64) * (vals.max() + 1) + vals
+            if np.unique(keys).size < keys.size:
+                return False
+        return True
+
+
+def _start_worker(
+    puzzle: SudokuGrid,
+    candidates: Candidates | None,
+    encoding: AtMostOneEncoding,
+    backend: SatBackend,
+    stop: threading.Event,
+    deadline: float,
+) -> None:
+    """
+    Encodes the puzzle into the solver of a worker process. The encoding
+    stops at the deadline or once the search stops, the worker is left
+    without a solver then and reports every cube as interrupted.
+
+    Parameters
+    -----------
+    puzzle: SudokuGrid
+        the puzzle being solved
+    candidates: Candidates | None
+        restrictions of the cell values
+    encoding: AtMostOneEncoding
+        encoding of the "at most one" constraints
+    backend: SatBackend
+        a SAT engine
+    stop: threading.Event
+        an event set when the search should stop
+    deadline: float
+        the deadline as a `time.time()` timestamp
+    """
+    global _worker_solver, _worker_backend, _worker_stop
+    _worker_backend = backend
+    _worker_stop = stop
+    solver = Solver(name=backend)
+    sat_solver = SatSudokuSolver(
+        puzzle, deadline - time.time(), encoding=encoding, backend=backend
+    )
+    sat_solver._cancelled = stop
+    if candidates is not None:
+        sat_solver.restrict(candidates)
+    try:
+        sat_solver._encode_into(solver)
+    except TimeoutError:
+        solver.delete()
+        return
+    _worker_solver = solver
+
+
+def _solve_cube(cube: list[int], deadline: float) -> tuple[bool | None, list[int]]:
+    """
+    Solves the puzzle under the assumptions of a cube.
+
+    Parameters
+    -----------
+    cube: list[int]
+        identifiers of the propositions assumed to be true
+    deadline: float
+        the deadline as a `time.time()` timestamp
+
+    Returns
+    --------
+    result: tuple[bool | None, list[int]]
+        - `(True, model)` with the true propositions if the cube is satisfiable
+        - `(False, [])` if the cube is unsatisfiable
+        - `(None, [])` if the worker was stopped or the time has run out
+    """
+    assert _worker_stop is not None and _worker_backend is not None
+    solver, stop = _worker_solver, _worker_stop
+    if solver is None or stop.is_set() or time.time() > deadline:
+        return None, []
+
+    if _worker_backend.supports_interrupt:
+        finished = threading.Event()
+
+        def watch() -> None:
+            while not finished.wait(POLL_INTERVAL):
+                if stop.is_set() or time.time() > deadline:
+                    solver.interrupt()
+                    return
+
+        watcher = threading.Thread(target=watch, daemon=True)
+        watcher.start()
+        solved = solver.solve_limited(assumptions=cube, expect_interrupt=True)
+        finished.set()
+        watcher.join()
+        solver.clear_interrupt()
+    else:
+        solved = solver.solve(assumptions=cube)
+
+    if solved:
+        return True, [literal for literal in solver.get_model() if literal > 0]
+    if solved is None or time.time() > deadline:
+        return None, []
+    return False, []
@@ -0,0 +1,141 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from enum import StrEnum, auto
+import numpy as np
+from src.model.grid import SudokuGrid
+
+
+class InfeasibilityReason(StrEnum):
+    """
+    Reasons for rejecting a puzzle without solving it.
+
+    OUT_OF_RANGE
+        a cell contains a value larger than the size of the grid
+    DUPLICATE_GIVEN
+        a row, a column or a block contains the same value twice
+    NO_CANDIDATES
+        an empty cell sees every value in its row, column and block
+    """
+
+    OUT_OF_RANGE = auto()
+    DUPLICATE_GIVEN = auto()
+    NO_CANDIDATES = auto()
+
+
+class InfeasiblePuzzleError(ValueError):
+    """
+    Raised for a puzzle rejected without solving as it has no solution
+    (see `SudokuSolver.solve`), so callers can tell it from a search
+    which has found none.
+
+    Attributes:
+    -----------
+    infeasibility: Infeasibility
+        why the puzzle has no solution
+    """
+
+    infeasibility: Infeasibility
+
+    def __init__(self, infeasibility: Infeasibility) -> None:
+        super().__init__(str(infeasibility))
+        self.infeasibility = infeasibility
+
+
+@dataclass(frozen=True, slots=True)
+class Infeasibility:
+    """
+    A structured reason why a puzzle has no solution.
+
+    Usage
+    -----
+        `infeasibility = Infeasibility.of(grid)`
+        `if infeasibility is not None: print(infeasibility)`
+
+    Attributes:
+    -----------
+    reason: InfeasibilityReason
+        what is wrong with the puzzle
+    cells: tuple[tuple[int, int], ...]
+        coordinates (row, col) of the cells causing the problem
+    value: int
+        the offending value, `0` for `NO_CANDIDATES`
+    """
+
+    reason: InfeasibilityReason
+    cells: tuple[tuple[int, int], ...]
+    value: int
+
+    def __str__(self) -> str:
+        cells = ", ".join(f"({row}, {col})" for row, col in self.cells)
+        match self.reason:
+            case InfeasibilityReason.OUT_OF_RANGE:
+                return f"value {self.value} does not fit in the grid at {cells}"
+            case InfeasibilityReason.DUPLICATE_GIVEN:
+                return f"value {self.value} is given twice in a unit at {cells}"
+            case InfeasibilityReason.NO_CANDIDATES:
+                return f"no value can be put at {cells}"
+            case _:
+                raise NotImplementedError()
+
+    @staticmethod
+    def of(puzzle: SudokuGrid) -> Infeasibility | None:
+        """
+        Checks all the rows, columns and blocks of the puzzle at once.
+        The check is much cheaper than any search, so contradictory
+        puzzles are rejected before a solver even starts.
+
+        Parameters
+        -----------
+        puzzle: SudokuGrid
+            a sudoku puzzle to be checked
+
+        Returns
+        --------
+        infeasibility: Infeasibility | None
+            `None` if the check has found no problem
+            (the puzzle may still have no solution), otherwise the first problem
+        """
+        topology = puzzle.topology
+        size = topology.size
+        grid = np.asarray(puzzle[:, :], dtype=np.intp)
+        out_of_range = grid > size
+        if out_of_range.any():
+            row, col = np.argwhere(out_of_range)[0]
+            return Infeasibility(
+                InfeasibilityReason.OUT_OF_RANGE,
+                ((int(row), int(col)),),
+                int(grid[row, col]),
+            )
+
+        # units[i] = (unit of every cell, count of every value in every unit)
+        units = list(
+            zip(
+                (topology.cell_rows, topology.cell_cols, topology.cell_blocks),
+                puzzle.value_counts(),
+            )
+        )
+
+        for cell_units, counts in units:
+            duplicates = np.argwhere(counts > 1)
+            if duplicates.size:
+                unit, value = duplicates[0]
+                cells = np.argwhere((cell_units == unit) & (grid == value + 1))
+                return Infeasibility(
+                    InfeasibilityReason.DUPLICATE_GIVEN,
+                    tuple((int(row), int(col)) for row, col in cells),
+                    int(value + 1),
+                )
+
+        # the values taken in every unit are packed into bits,
+        # so their unions are computed 8 values at a time
+        taken = np.zeros((size, size, (size + 7) // 8), dtype=np.uint8)
+        for cell_units, counts in units:
+            taken |= np.packbits(counts > 0, axis=1)[cell_units]
+        every_value = np.packbits(np.ones(size, dtype=bool))
+        stuck = (grid == 0) & (taken == every_value).all(axis=2)
+        if stuck.any():
+            row, col = np.argwhere(stuck)[0]
+            return Infeasibility(
+                InfeasibilityReason.NO_CANDIDATES, ((int(row), int(col)),), 0
+            )
+        return None
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from typing import NewType
+import numpy as np
 from src.solvers.solver import SudokuSolver
 from src.model.grid import SudokuGrid
 from src.utils.recursion_limit import recursion_limit_set_to  # noqa
@@ -97,20 +98,16 @@ class State:
         state: State
             a state matching the grid
         """
-        default_domain = set(range(1, grid.size+1))
-        free_variables = set()
-        row_domains = [Domain(default_domain.copy()) for _ in range(grid.size)]
-        col_domains = [Domain(default_domain.copy()) for _ in range(grid.size)]
-        block_domains = [Domain(default_domain.copy()) for _ in range(grid.size)]
-
-        for (row, col), val in grid.enumerate():
-            block = grid.block_index(row, col)
-            if val != 0:
-                row_domains[row].remove(val)
-                col_domains[col].remove(val)
-                block_domains[block].remove(val)
-            else:
-                free_variables.add(Variable((row, col, block)))
+        row_domains, col_domains, block_domains = (
+            [Domain(set((np.flatnonzero(counts == 0) + 1).tolist())) for counts in unit]
+            for unit in grid.value_counts()
+        )
+        rows, cols = np.nonzero(np.asarray(grid[:, :]) == 0)
+        blocks = grid.topology.cell_blocks[rows, cols]
+        free_variables = {
+            Variable(variable)
+            for variable in zip(rows.tolist(), cols.tolist(), blocks.tolist())
+        }
 
         return State(grid, free_variables, row_domains, col_domains, block_domains)
 
@@ -137,6 +134,10 @@ class FirstFailSudokuSolver(SudokuSolver):
         Performs a first-fail depth-first-search to solve the sudoku puzzle.
         It always chooses a variable with the smallest domain and tries it first.
 
+        Once there are no free variables left, the method should return
+        `self._accept_solution()` instead of `True`. This way the same search
+        keeps backtracking for further solutions when they are counted.
+
         Returns
         --------
         solved: bool
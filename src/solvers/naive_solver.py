@@ -68,6 +68,10 @@ class NaiveSudokuSolver(SudokuSolver):
         - https://en.wikipedia.org/wiki/Backtracking
         - https://www.geeksforgeeks.org/introduction-to-backtracking-2/
 
+        Once the grid is complete, the method should return
+        `self._accept_solution()` instead of `True`. This way the same search
+        keeps backtracking for further solutions when they are counted.
+
         Parameters
         -----------
         row: int
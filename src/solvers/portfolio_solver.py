@@ -0,0 +1,222 @@
+from __future__ import annotations
+import contextlib
+import multiprocessing
+import os
+import signal
+import time
+from multiprocessing.connection import Connection, wait
+from multiprocessing.synchronize import Event
+from typing import Iterable
+from src.model.grid import Candidates, SudokuGrid
+from src.solvers.cube_solver import CubeAndConquerSatSudokuSolver
+from src.solvers.sat_solver import SatSudokuSolver
+from src.solvers.solver import POLL_INTERVAL, SudokuSolver
+
+
+DEFAULT_PORTFOLIO: tuple[type[SudokuSolver], ...] = (
+    SatSudokuSolver,
+    CubeAndConquerSatSudokuSolver,
+)
+"""solvers raced by default: the sequential SAT one wins on the small puzzles,
+   the cube-and-conquer one on the large and hard ones (given several CPUs);
+   the backtracking solvers are lab stubs until implemented,
+   race them through `solvers` once they are"""
+
+STOP_GRACE = 0.5
+"""time (in seconds) the losing members get to stop on their own
+   (together with their workers) before their process groups are killed"""
+
+
+class PortfolioSudokuSolver(SudokuSolver):
+    """
+    A solver racing several solvers against each other:
+    - https://en.wikipedia.org/wiki/Algorithm_selection
+
+    Every member of the portfolio runs in its own process
+    (not a daemon one, so members like the cube-and-conquer solver
+    can start their own workers) leading its own process group.
+    The first one to finish wins, the others are cancelled
+    and, if still running after `STOP_GRACE`, killed with their whole group,
+    so no worker of theirs outlives the race.
+    A member proving the puzzle has no solution wins as well,
+    a member failing with an error simply drops out of the race.
+    The members unable to count solutions (see `counts_solutions`)
+    sit the counting races out.
+
+    Usage
+    -----
+        `solution = SudokuSolverType.PORTFOLIO.solve(grid, 10.0)`
+        `solution = SudokuSolverType.PORTFOLIO.solve(`
+        `    grid, 10.0, solvers=[SatSudokuSolver, CubeAndConquerSatSudokuSolver]`
+        `)`
+
+    Protected Attributes:
+    ---------------------
+    _solvers: tuple[type[SudokuSolver], ...]
+        classes of the raced solvers, run with their default options
+    """
+
+    _solvers: tuple[type[SudokuSolver], ...]
+
+    def __init__(
+        self,
+        puzzle: SudokuGrid,
+        time_limit: float,
+        solvers: Iterable[type[SudokuSolver]] = DEFAULT_PORTFOLIO,
+    ):
+        """
+        Initialize the solver.
+
+        Parameters
+        -----------
+        puzzle: SudokuGrid
+            a sudoku puzzle to be solved
+        time_limit: float
+            amount of time (in seconds) available to the whole race
+        solvers: Iterable[type[SudokuSolver]]
+            classes of the solvers to be raced
+        """
+        super().__init__(puzzle, time_limit)
+        self._solvers = tuple(solvers)
+        if not self._solvers:
+            raise ValueError("the portfolio is empty")
+
+    def run_algorithm(self) -> SudokuGrid | None:
+        return self._race(None)
+
+    def count_solutions_up_to(self, limit: int) -> int:
+        return self._race(limit)
+
+    def _race(self, limit: int | None) -> SudokuGrid | None | int:
+        """
+        Runs all the solvers and waits for the first result.
+
+        Parameters
+        -----------
+        limit: int | None
+            `None` to solve the puzzle,
+            otherwise the number of solutions worth counting
+
+        Returns
+        --------
+        result: SudokuGrid | None | int
+            the result of the winner: a solution (or `None`)
+            when solving, a number of solutions when counting
+
+        Raises
+        -------
+        timeout_error: TimeoutError
+            when the time runs out before any solver finishes
+        runtime_error: RuntimeError
+            when every solver fails
+        value_error: ValueError
+            when counting and no solver can count solutions
+        """
+        solvers = [
+            solver_class
+            for solver_class in self._solvers
+            if limit is None or solver_class.counts_solutions
+        ]
+        if not solvers:
+            raise ValueError("no solver of the portfolio can count solutions")
+        context = multiprocessing.get_context()
+        stop = context.Event()
+        racers = {}
+        for solver_class in solvers:
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(
+                target=_run_racer,
+                args=(
+                    solver_class,
+                    self._puzzle,
+                    self._remaining_time(),
+                    self._candidates,
+                    limit,
+                    stop,
+                    sender,
+                ),
+            )
+            process.start()
+            sender.close()
+            racers[receiver] = process
+
+        errors = []
+        try:
+            while racers:
+                if self._timeout():
+                    raise TimeoutError
+                timeout = min(POLL_INTERVAL, self._remaining_time())
+                ready = wait(list(racers), timeout=timeout)
+                for receiver in ready:
+                    try:
+                        finished, result = receiver.recv()
+                    except EOFError:
+                        finished, result = False, "the solver process has died"
+                    receiver.close()
+                    racers.pop(receiver).join()
+                    if finished:
+                        return result
+                    errors.append(result)
+            if all(error == "timeout" for error in errors):
+                raise TimeoutError
+            raise RuntimeError(f"every solver of the portfolio has failed: {errors}")
+        finally:
+            stop.set()
+            grace_end = time.time() + STOP_GRACE
+            for receiver, process in racers.items():
+                process.join(max(0.0, grace_end - time.time()))
+                if process.is_alive():
+                    with contextlib.suppress(ProcessLookupError):
+                        os.killpg(process.pid, signal.SIGKILL)
+                    process.kill()
+                    process.join()
+                receiver.close()
+
+
+def _run_racer(
+    solver_class: type[SudokuSolver],
+    puzzle: SudokuGrid,
+    time_limit: float,
+    candidates: Candidates | None,
+    limit: int | None,
+    stop: Event,
+    sender: Connection,
+) -> None:
+    """
+    Runs a single solver of the portfolio in its own process.
+
+    Parameters
+    -----------
+    solver_class: type[SudokuSolver]
+        class of the solver
+    puzzle: SudokuGrid
+        the puzzle to be solved
+    time_limit: float
+        amount of time (in seconds) left for the solver
+    candidates: Candidates | None
+        restrictions of the cell values
+    limit: int | None
+        `None` to solve the puzzle,
+        otherwise the number of solutions worth counting
+    stop: Event
+        set when the race is over
+    sender: Connection
+        receives `(True, result)` if the solver has finished,
+        or `(False, "timeout")` / `(False, error)` otherwise
+    """
+    os.setpgrp()
+    try:
+        solver = solver_class(puzzle, time_limit)
+        solver._cancelled = stop
+        if candidates is not None:
+            solver.restrict(candidates)
+        if limit is None:
+            sender.send((True, solver.run_algorithm()))
+        else:
+            sender.send((True, solver.count_solutions_up_to(limit)))
+    except TimeoutError:
+        sender.send((False, "timeout"))
+    except Exception as error:
+        sender.send((False, repr(error)))
+    finally:
+        sender.close()
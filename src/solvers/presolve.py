@@ -0,0 +1,301 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from enum import StrEnum, auto
+from typing import Iterable
+import numpy as np
+import numpy.typing as npt
+from src.model.grid import Candidates, SudokuGrid
+from src.model.topology import GridTopology
+
+
+class PresolveRule(StrEnum):
+    """
+    Constraint-propagation rules of the presolve stage:
+    - https://www.sudokuwiki.org/Getting_Started
+
+    Every rule only removes candidates implied by the others,
+    so it never changes the set of solutions of the puzzle.
+
+    NAKED_SINGLES
+        a cell with a single candidate takes it, the value is removed
+        from the candidates of its row, column and block peers
+        (givens are always propagated, even without this rule)
+    HIDDEN_SINGLES
+        a value which fits in only one cell of a unit is put there
+    LOCKED_CANDIDATES
+        pointing: a value limited to one line within a block
+        is removed from the rest of the line,
+        claiming: a value limited to one block within a line
+        is removed from the rest of the block
+    NAKED_PAIRS
+        two cells of a unit having the same two candidates take them both,
+        the values are removed from the rest of the unit
+
+    Methods:
+    --------
+    apply(self, candidates: Candidates) -> None:
+        removes the candidates ruled out by the rule
+    """
+
+    NAKED_SINGLES = auto()
+    HIDDEN_SINGLES = auto()
+    LOCKED_CANDIDATES = auto()
+    NAKED_PAIRS = auto()
+
+    def apply(self, candidates: Candidates) -> None:
+        """
+        Removes the candidates ruled out by the rule.
+
+        Parameters
+        -----------
+        candidates: Candidates
+            candidates of the cells, modified in place
+        """
+        match self:
+            case PresolveRule.NAKED_SINGLES:
+                singles = candidates.sum(axis=2, dtype=np.int16) == 1
+                candidates &= ~_peer_eliminations(singles, candidates)
+            case PresolveRule.HIDDEN_SINGLES:
+                _hidden_singles(candidates)
+            case PresolveRule.LOCKED_CANDIDATES:
+                candidates &= ~_locked_candidates(candidates)
+                transposed = candidates.transpose(1, 0, 2)
+                transposed &= ~_locked_candidates(transposed)
+            case PresolveRule.NAKED_PAIRS:
+                candidates &= ~_naked_pairs(candidates)
+            case _:
+                raise NotImplementedError()
+
+
+DEFAULT_RULES = tuple(PresolveRule)
+"""rules applied by default, all of them"""
+
+
+@dataclass(frozen=True, slots=True)
+class Presolved:
+    """
+    A puzzle reduced by constraint propagation.
+
+    Usage
+    -----
+        `presolved = Presolved.from_grid(grid)`
+        `solution = SudokuSolverType.SAT.solve(grid, 1.0, presolve=True)`
+
+    Attributes:
+    -----------
+    grid: SudokuGrid
+        the puzzle with every cell having a single candidate filled in
+    candidates: Candidates
+        candidates of the cells, a filled cell has only its value
+
+    Properties:
+    -----------
+    infeasible: bool
+        whether the propagation has shown the puzzle has no solution
+    solved: bool
+        whether the propagation alone has solved the puzzle
+    """
+
+    grid: SudokuGrid
+    candidates: Candidates
+
+    @property
+    def infeasible(self) -> bool:
+        """
+        Returns
+        --------
+        infeasible: bool
+            `True` if some cell has no candidates left
+            or some value fits nowhere in a unit
+        """
+        return _infeasible(self.candidates)
+
+    @property
+    def solved(self) -> bool:
+        """
+        Returns
+        --------
+        solved: bool
+            `True` if the grid is a complete solution
+        """
+        return not self.infeasible and bool((self.candidates.sum(axis=2) == 1).all())
+
+    @staticmethod
+    def from_grid(
+        puzzle: SudokuGrid, rules: Iterable[PresolveRule] = DEFAULT_RULES
+    ) -> Presolved:
+        """
+        Applies the rules to the puzzle until none of them removes a candidate
+        or the puzzle turns out infeasible.
+
+        Parameters
+        -----------
+        puzzle: SudokuGrid
+            a sudoku puzzle, it is not modified
+        rules: Iterable[PresolveRule]
+            rules to be applied, in the given order
+
+        Returns
+        --------
+        presolved: Presolved
+            the reduced puzzle with its candidates
+        """
+        rules = tuple(rules)
+        filled = np.asarray(puzzle[:, :]) > 0
+        candidates = puzzle.candidates()
+        # givens keep their own values in the candidates,
+        # this reveals the ones contradicting each other
+        candidates &= ~_peer_eliminations(filled, candidates)
+
+        remaining = -1
+        while remaining != (remaining := np.count_nonzero(candidates)):
+            if _infeasible(candidates):
+                break
+            for rule in rules:
+                rule.apply(candidates)
+
+        solution = puzzle.copy()
+        singles = candidates.sum(axis=2, dtype=np.int16) == 1
+        rows, cols = np.nonzero(singles & ~filled)
+        solution[rows, cols] = candidates[rows, cols].argmax(axis=1) + 1
+        return Presolved(solution, candidates)
+
+
+def _block_view(array: npt.NDArray) -> npt.NDArray:
+    """
+    Reshapes a (size, size, ...) array so its blocks can be reduced.
+
+    Parameters
+    -----------
+    array: npt.NDArray
+        an array indexed by the row and the column of a cell
+
+    Returns
+    --------
+    blocks: npt.NDArray
+        an array indexed by
+        (block row, row within block, block column, column within block, ...)
+    """
+    block_size = GridTopology.of(array.shape[0]).block_size
+    shape = (block_size, block_size, block_size, block_size, *array.shape[2:])
+    return array.reshape(shape)
+
+
+def _unit_counts(marks: Candidates) -> tuple[npt.NDArray, npt.NDArray, npt.NDArray]:
+    """
+    Counts the marked values in every row, column and block.
+    The counts are kept small and only broadcast against the block view
+    (see `_block_view`) of the marks, never copied to every cell.
+
+    Parameters
+    -----------
+    marks: Candidates
+        marked values of the cells
+
+    Returns
+    --------
+    counts: tuple[npt.NDArray, npt.NDArray, npt.NDArray]
+        counts of every value in the rows, the columns and the blocks,
+        broadcastable to the block view of the marks
+    """
+    blocks = _block_view(marks)
+    return (
+        blocks.sum(axis=(2, 3), dtype=np.int16, keepdims=True),
+        blocks.sum(axis=(0, 1), dtype=np.int16, keepdims=True),
+        blocks.sum(axis=(1, 3), dtype=np.int16, keepdims=True),
+    )
+
+
+def _infeasible(candidates: Candidates) -> bool:
+    if not candidates.any(axis=2).all():
+        return True
+    return any(bool((counts == 0).any()) for counts in _unit_counts(candidates))
+
+
+def _peer_eliminations(
+    fixed: npt.NDArray[np.bool_], candidates: Candidates
+) -> Candidates:
+    """
+    Finds the candidates taken by the fixed cells of the same unit.
+
+    Parameters
+    -----------
+    fixed: npt.NDArray[np.bool_]
+        cells whose (only) candidate is their value, shape (size, size)
+    candidates: Candidates
+        candidates of the cells
+
+    Returns
+    --------
+    eliminated: Candidates
+        candidates to be removed
+    """
+    values = candidates & fixed[:, :, None]
+    rows, cols, blocks = _unit_counts(values)
+    # every count includes the cell itself, so the value is taken
+    # by another cell if the counts add up to more than that
+    total = rows + cols + blocks
+    eliminated = np.where(_block_view(values), total > 3, total > 0)
+    return candidates & eliminated.reshape(candidates.shape)
+
+
+def _hidden_singles(candidates: Candidates) -> None:
+    unique = np.zeros(_block_view(candidates).shape, dtype=bool)
+    for counts in _unit_counts(candidates):
+        unique |= counts == 1
+    hidden = candidates & unique.reshape(candidates.shape)
+    cells = hidden.any(axis=2)
+    candidates[cells] = hidden[cells]
+
+
+def _locked_candidates(candidates: Candidates) -> Candidates:
+    """
+    Finds the candidates removed by the pointing and claiming rules
+    applied to the rows, columns are handled by transposing the candidates.
+
+    Parameters
+    -----------
+    candidates: Candidates
+        candidates of the cells
+
+    Returns
+    --------
+    eliminated: Candidates
+        candidates to be removed
+    """
+    size = candidates.shape[0]
+    blocks = _block_view(candidates)
+    # present[block row, row within block, block column, value]
+    present = blocks.any(axis=3)
+    pointing = present & (present.sum(axis=1, keepdims=True) == 1)
+    claiming = present & (present.sum(axis=2, keepdims=True) == 1)
+    eliminated = (pointing.sum(axis=2, keepdims=True) - pointing > 0) | (
+        claiming.sum(axis=1, keepdims=True) - claiming > 0
+    )
+    return (blocks & eliminated[:, :, :, None, :]).reshape(size, size, size)
+
+
+def _naked_pairs(candidates: Candidates) -> Candidates:
+    size = candidates.shape[0]
+    topology = GridTopology.of(size)
+    eliminated = np.zeros_like(candidates)
+    rows, cols = np.nonzero(candidates.sum(axis=2, dtype=np.int16) == 2)
+    if rows.size < 2:
+        return eliminated
+
+    pair_candidates = candidates[rows, cols]
+    first = pair_candidates.argmax(axis=1)
+    second = size - 1 - pair_candidates[:, ::-1].argmax(axis=1)
+    for units in (topology.cell_rows, topology.cell_cols, topology.cell_blocks):
+        keys = (units[rows, cols] * size + first) * size + second
+        unique, inverse, counts = np.unique(
+            keys, return_inverse=True, return_counts=True
+        )
+        for index in np.flatnonzero(counts >= 2):
+            unit, values = divmod(int(unique[index]), size * size)
+            others = units == unit
+            pair = inverse == index
+            others[rows[pair], cols[pair]] = False
+            eliminated[others, values // size] = True
+            eliminated[others, values % size] = True
+    return candidates & eliminated
@@ -0,0 +1,128 @@
+from __future__ import annotations
+from enum import StrEnum
+import json
+import os
+from pathlib import Path
+
+
+class SatBackend(StrEnum):
+    """
+    SAT engines available in python-sat, the values are their pysat names:
+    - https://pysathq.github.io/docs/html/api/solvers.html
+
+    Kissat is left out, as it ignores assumptions.
+
+    Properties:
+    -----------
+    supports_interrupt: bool
+        whether the engine can be interrupted when the time runs out
+    """
+
+    CADICAL = "cadical195"
+    GLUCOSE3 = "glucose3"
+    GLUCOSE4 = "glucose4"
+    GLUCOSE42 = "glucose42"
+    LINGELING = "lingeling"
+    MAPLECHRONO = "maplechrono"
+    MAPLECM = "maplecm"
+    MAPLESAT = "maplesat"
+    MERGESAT = "mergesat3"
+    MINICARD = "minicard"
+    MINISAT = "minisat22"
+
+    @property
+    def supports_interrupt(self) -> bool:
+        """
+        Returns
+        --------
+        supports_interrupt: bool
+            `False` if the time limit can only be checked after solving
+        """
+        return self not in (SatBackend.CADICAL, SatBackend.LINGELING)
+
+
+DEFAULT_BACKEND = SatBackend.MINISAT
+"""backend used when there is no tuning profile, the default of python-sat"""
+
+PROFILE_PATH = Path(os.environ.get("SUDOKU_SAT_PROFILE", "sat_profile.json"))
+"""where the tuning profile is stored,
+   can be overridden by the SUDOKU_SAT_PROFILE environment variable"""
+
+_loaded_profiles: dict[Path, tuple[float, dict[int, SatBackend]]] = {}
+"""profiles already read, together with the modification time of their files"""
+
+
+def save_profile(backends: dict[int, SatBackend], path: Path = PROFILE_PATH) -> None:
+    """
+    Saves the best backend for every grid size.
+
+    Parameters
+    -----------
+    backends: dict[int, SatBackend]
+        the best backend for every grid size
+    path: Path
+        a path of the profile file
+    """
+    profile = {
+        "backends": {
+            str(size): str(backend) for size, backend in sorted(backends.items())
+        }
+    }
+    path.write_text(json.dumps(profile, indent=2) + "\n")
+
+
+def load_profile(path: Path = PROFILE_PATH) -> dict[int, SatBackend]:
+    """
+    Loads the tuning profile. The file is read again only after it changes.
+
+    Parameters
+    -----------
+    path: Path
+        a path of the profile file
+
+    Returns
+    --------
+    backends: dict[int, SatBackend]
+        the best backend for every profiled grid size,
+        empty if there is no (valid) profile
+    """
+    try:
+        modified = path.stat().st_mtime
+    except FileNotFoundError:
+        return {}
+    if path in _loaded_profiles and _loaded_profiles[path][0] == modified:
+        return _loaded_profiles[path][1]
+
+    try:
+        profile = json.loads(path.read_text())
+        backends = {
+            int(size): SatBackend(name) for size, name in profile["backends"].items()
+        }
+    except (ValueError, KeyError, TypeError):
+        backends = {}
+    _loaded_profiles[path] = (modified, backends)
+    return backends
+
+
+def profiled_backend(size: int, path: Path = PROFILE_PATH) -> SatBackend:
+    """
+    Returns the backend chosen by the tuning profile for the given size.
+    Sizes missing from the profile use the closest profiled size.
+
+    Parameters
+    -----------
+    size: int
+        size of the grid
+    path: Path
+        a path of the profile file
+
+    Returns
+    --------
+    backend: SatBackend
+        the best known backend, `DEFAULT_BACKEND` without a profile
+    """
+    backends = load_profile(path)
+    if not backends:
+        return DEFAULT_BACKEND
+    closest = min(backends, key=lambda profiled: (abs(profiled - size), profiled))
+    return backends[closest]
@@ -1,36 +1,30 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import itertools
-from threading import Timer
+import math
+import threading
+import numpy as np
 from typing import Iterable
-from src.solvers.solver import SudokuSolver
-from src.model.grid import SudokuGrid
+from src.solvers.solver import POLL_INTERVAL, SudokuSolver
+from src.model.grid import Candidates, SudokuGrid
 from pysat.formula import CNF  # type: ignore[import-untyped]
 from pysat.solvers import Solver  # type: ignore[import-untyped]
 from src.utils.group_by import group_by
-
-
-@dataclass(frozen=True)
-class Coordinates:
-    """
-    Represent coordinates of a sudoku variable (empty cell).
-    """
-
-    row: int
-    col: int
-    block: int
-
-
-@dataclass(frozen=True)
-class Proposition:
-    """
-    A single proposition:
-    "Sudoku cell at coordinates: `coords` has value `val`"
-    """
-
-    coords: Coordinates
-    val: int
-    id: int
+from src.solvers.at_most_one import (
+    AtMostOneEncoding,
+    PAIRWISE_LIMIT,
+    COMMANDER_GROUP_SIZE,
+)
+from src.solvers.vectorized_cnf import (
+    ClauseBlock,
+    Coordinates,
+    Proposition,
+    PropositionTable,
+    VectorizedSudokuCNF,
+)
+from src.solvers.cnf_cache import CNFCache
+from src.solvers.sat_template import SatTemplatePool
+from src.solvers.sat_backend import SatBackend, profiled_backend
 
 
 @dataclass
@@ -54,60 +48,208 @@ class SudokuCNF:
     Given a solution from a SAT solver (e.g. `solution = solver.get_model()`)
     one can translate it to a SudokuGrid via the `decode` method:
 
-        `solution_grid =  sudoku_cnf.decode()`
+        `solution_grid =  sudoku_cnf.decode(solution)`
+
+    The propositions are kept in a `PropositionTable`, so decoding
+    is a single vectorized assignment.
 
     """
 
     cnf: CNF
     """a `Conjunctive Normal Form` encoding as used by a SAT solver"""
-    propositions: dict[int, Proposition]
-    """mapping from propositions identifiers (as used in the CNF)
-       to the propositions themselves"""
+    propositions: PropositionTable
+    """struct-of-arrays table of the propositions, a read-only
+       `Mapping[int, Proposition]` from their identifiers;
+       a `dict[int, Proposition]` passed here is converted into the table"""
     puzzle: SudokuGrid
     """a puzzle encoded in the CNF"""
+    encoding: AtMostOneEncoding = AtMostOneEncoding.PAIRWISE
+    """encoding used for the "at most one" constraints"""
+    top_id: int = field(init=False)
+    """the largest variable identifier in use, auxiliary variables
+       are allocated after the propositions identifiers"""
 
     def __post_init__(self) -> None:
-        self._every_cell_has_a_single_value()
-        self._every_row_contains_unique_values() 
-        self._every_col_contains_unique_values()
-        self._every_block_contains_unique_values()
+        if isinstance(self.propositions, dict):
+            self.propositions = SudokuCNF._table_from(self.propositions)
+        self.top_id = self.propositions.top_id
+        propositions = self._proposition_objects()
+        self._every_cell_has_a_single_value(propositions)
+        self._every_row_contains_unique_values(propositions)
+        self._every_col_contains_unique_values(propositions)
+        self._every_block_contains_unique_values(propositions)
+
+    def _proposition_objects(self) -> list[Proposition]:
+        """
+        Creates proposition objects used while grouping propositions.
+        They are not kept, the table remains the only representation.
+
+        Returns
+        --------
+        propositions: list[Proposition]
+            all propositions ordered by their identifiers
+        """
+        table = self.propositions
+        return [
+            Proposition(Coordinates(row, col, block), val, prop_id)
+            for prop_id, row, col, block, val in zip(
+                table.ids.tolist(),
+                table.rows.tolist(),
+                table.cols.tolist(),
+                table.blocks.tolist(),
+                table.vals.tolist(),
+            )
+        ]
+
+    @staticmethod
+    def _table_from(propositions: dict[int, Proposition]) -> PropositionTable:
+        """
+        Converts propositions into a table.
+
+        Parameters
+        -----------
+        propositions: dict[int, Proposition]
+            propositions keyed by their identifiers,
+            any positive identifiers may be used
+
+        Returns
+        --------
+        table: PropositionTable
+            the same propositions as a struct of arrays, ordered by the identifiers
+        """
+        ids = sorted(propositions)
+        if ids and ids[0] < 1:
+            raise ValueError("proposition identifiers must be positive")
+        ordered = [propositions[prop_id] for prop_id in ids]
+        contiguous = ids == list(range(1, len(ids) + 1))
+        return PropositionTable(
+            np.array([p.coords.row for p in ordered], dtype=np.int32),
+            np.array([p.coords.col for p in ordered], dtype=np.int32),
+            np.array([p.coords.block for p in ordered], dtype=np.int32),
+            np.array([p.val for p in ordered], dtype=np.int32),
+            None if contiguous else np.array(ids, dtype=np.int32),
+        )
 
     def _at_least_one(self, propositions: Iterable[Proposition]) -> None:
         self.cnf.append([p.id for p in propositions])
 
     def _at_most_one(self, propositions: Iterable[Proposition]) -> None:
-        for p, q in itertools.combinations(propositions, 2):
-            self.cnf.append([-p.id, -q.id])
+        self._at_most_one_of([p.id for p in propositions])
+
+    def _at_most_one_of(self, literals: list[int]) -> None:
+        match self.encoding.resolve(len(literals)):
+            case AtMostOneEncoding.PAIRWISE:
+                self._pairwise(literals)
+            case AtMostOneEncoding.SEQUENTIAL:
+                self._sequential_counter(literals)
+            case AtMostOneEncoding.PRODUCT:
+                self._product(literals)
+            case AtMostOneEncoding.COMMANDER:
+                self._commander(literals)
+            case _:
+                raise NotImplementedError()
+
+    def _new_variable(self) -> int:
+        self.top_id += 1
+        return self.top_id
+
+    def _pairwise(self, literals: list[int]) -> None:
+        for p, q in itertools.combinations(literals, 2):
+            self.cnf.append([-p, -q])
+
+    def _sequential_counter(self, literals: list[int]) -> None:
+        # s_i <=> "one of the first i+1 literals is true"
+        if len(literals) < 2:
+            return
+        counters = [self._new_variable() for _ in literals[:-1]]
+        self.cnf.append([-literals[0], counters[0]])
+        for i in range(1, len(literals) - 1):
+            self.cnf.append([-literals[i], counters[i]])
+            self.cnf.append([-counters[i - 1], counters[i]])
+            self.cnf.append([-literals[i], -counters[i - 1]])
+        self.cnf.append([-literals[-1], -counters[-1]])
+
+    def _product(self, literals: list[int]) -> None:
+        # literals are laid out in a grid, a true literal implies its row
+        # and its column, at most one row and at most one column can be true
+        if len(literals) <= PAIRWISE_LIMIT:
+            self._pairwise(literals)
+            return
+        cols = math.ceil(math.sqrt(len(literals)))
+        rows = math.ceil(len(literals) / cols)
+        row_vars = [self._new_variable() for _ in range(rows)]
+        col_vars = [self._new_variable() for _ in range(cols)]
+        for k, literal in enumerate(literals):
+            self.cnf.append([-literal, row_vars[k // cols]])
+            self.cnf.append([-literal, col_vars[k % cols]])
+        self._product(row_vars)
+        self._product(col_vars)
+
+    def _commander(self, literals: list[int]) -> None:
+        # every group has a commander which is true iff one of its literals is,
+        # at most one literal per group and at most one commander can be true
+        if len(literals) <= PAIRWISE_LIMIT:
+            self._pairwise(literals)
+            return
+        commanders = []
+        for start in range(0, len(literals), COMMANDER_GROUP_SIZE):
+            group = literals[start : start + COMMANDER_GROUP_SIZE]
+            if len(group) == 1:
+                commanders.append(group[0])
+                continue
+            commander = self._new_variable()
+            self._pairwise(group)
+            for literal in group:
+                self.cnf.append([-literal, commander])
+            self.cnf.append([-commander, *group])
+            commanders.append(commander)
+        self._commander(commanders)
 
     def _exactly_one(self, propositions: Iterable[Proposition]) -> None:
         self._at_most_one(propositions)
         self._at_least_one(propositions)
 
-    def _every_cell_has_a_single_value(self):
+    def _every_cell_has_a_single_value(
+        self, propositions: list[Proposition] | None = None
+    ):
         for cell_propositions in group_by(
-            self.propositions.values(), lambda p: p.coords
+            propositions or self._proposition_objects(), lambda p: p.coords
         ).values():
             self._exactly_one(cell_propositions)
 
-    def _every_row_contains_unique_values(self):
+    def _every_row_contains_unique_values(
+        self, propositions: list[Proposition] | None = None
+    ):
         for row_val_proposition in group_by(
-                self.propositions.values(),
-                lambda p: (p.coords.row, p.val)
+            propositions or self._proposition_objects(),
+            lambda p: (p.coords.row, p.val),
         ).values():
             self._at_most_one(row_val_proposition)
 
-    def _every_col_contains_unique_values(self):
-        for col_val_proposition in group_by(self.propositions.values(),
-                                            lambda p: (p.coords.col, p.val)).values():
+    def _every_col_contains_unique_values(
+        self, propositions: list[Proposition] | None = None
+    ):
+        for col_val_proposition in group_by(
+            propositions or self._proposition_objects(),
+            lambda p: (p.coords.col, p.val),
+        ).values():
             self._at_most_one(col_val_proposition)
 
-    def _every_block_contains_unique_values(self):
-        for block_val_proposition in group_by(self.propositions.values(),
-                                              lambda p: (self.puzzle.block_index(p.coords.row, p.coords.col), p.val)).values():
+    def _every_block_contains_unique_values(
+        self, propositions: list[Proposition] | None = None
+    ):
+        for block_val_proposition in group_by(
+            propositions or self._proposition_objects(),
+            lambda p: (p.coords.block, p.val),
+        ).values():
             self._at_most_one(block_val_proposition)
 
     @staticmethod
-    def encode(puzzle: SudokuGrid) -> SudokuCNF:
+    def encode(
+        puzzle: SudokuGrid,
+        encoding: AtMostOneEncoding = AtMostOneEncoding.AUTO,
+        candidates: Candidates | None = None,
+    ) -> SudokuCNF:
         """
         Encodes a given sudoku puzzle into its Conjunctive Normal Form
         suitable for SAT solvers.
@@ -116,6 +258,11 @@ class SudokuCNF:
         ----------
         puzzle: SudokuGrid
             a sudoku puzzle to be encoded
+        encoding: AtMostOneEncoding
+            encoding of the "at most one" constraints,
+            by default it is chosen according to the size of each group
+        candidates: Candidates | None
+            restrictions of the cell values, e.g. found by the presolve
 
         Returns
         -------
@@ -123,8 +270,8 @@ class SudokuCNF:
             Conjunctive Normal Form encoding of the specified puzzle
         """
         cnf = CNF()
-        propositions = SudokuCNF._possible_propositions(puzzle)
-        return SudokuCNF(cnf, propositions, puzzle)
+        propositions = SudokuCNF._possible_propositions(puzzle, candidates)
+        return SudokuCNF(cnf, propositions, puzzle, encoding)
 
     def decode(self, results: list[int]) -> SudokuGrid:
         """
@@ -142,43 +289,18 @@ class SudokuCNF:
         solution: SudokuGrid
             a sudoku grid filled according the SAT results
         """
+        return self.propositions.decode(self.puzzle, results)
 
-        valid_ids = [prop_id for prop_id in results if prop_id >= 0]
-        valid_propositions = [self.propositions[valid_prop_id] for valid_prop_id in valid_ids] 
-        solved_puzzle = self.puzzle.copy()
+    @staticmethod
+    def _possible_propositions(
+        puzzle: SudokuGrid, candidates: Candidates | None = None
+    ) -> PropositionTable:
+        return PropositionTable.from_grid(puzzle, candidates)
 
-        for valid_proposition in valid_propositions:
-            solved_puzzle[valid_proposition.coords.row, valid_proposition.coords.col] = valid_proposition.val
 
-        return solved_puzzle
-
-    @staticmethod
-    def _possible_propositions(puzzle: SudokuGrid) -> dict[int, Proposition]:
-        size = puzzle.size
-        id_counter = 1
-        result = {}
-        default_domain = set(range(1, size + 1))
-        row_taken = {i: set() for i in range(size)}
-        col_taken = {i: set() for i in range(size)}
-        block_taken = {i: set() for i in range(size)}
-        
-        for (row, col), val in puzzle.enumerate():
-            if val != 0:
-                block = puzzle.block_index(row, col)
-                row_taken[row].add(val)
-                col_taken[col].add(val) 
-                block_taken[block].add(val)
-        
-        for (row, col), val in puzzle.enumerate():
-            if val != 0:
-                continue
-            block = puzzle.block_index(row, col)
-            valid = default_domain - (row_taken[row] | col_taken[col] | block_taken[block])
-            for val in valid:
-                result[id_counter] = Proposition(Coordinates(row, col, block), val, id_counter)
-                id_counter += 1
-        
-        return result
+STREAM_CHUNK_SIZE = 1 << 16
+"""the largest number of clauses converted to python lists at once
+   when streaming clauses into a solver"""
 
 
 class SatSudokuSolver(SudokuSolver):
@@ -192,29 +314,274 @@ class SatSudokuSolver(SudokuSolver):
     - python-sat docs: https://pysathq.github.io/docs/html/index.html#supplementary-examples-package
     """
 
-    def __init__(self, puzzle, time_limit):
+    _encoding: AtMostOneEncoding
+    _vectorized: bool
+    _streaming: bool
+    _cache: CNFCache | None
+    _template_pool: SatTemplatePool | None
+    _backend: SatBackend
+    _hint: SudokuGrid | None
+
+    def __init__(
+        self,
+        puzzle,
+        time_limit,
+        encoding: AtMostOneEncoding = AtMostOneEncoding.AUTO,
+        vectorized: bool = True,
+        streaming: bool = True,
+        cache: CNFCache | None = None,
+        template_pool: SatTemplatePool | None = None,
+        backend: SatBackend | None = None,
+        hint: SudokuGrid | None = None,
+    ):
+        """
+        Initialize the solver.
+
+        Parameters
+        -----------
+        puzzle: SudokuGrid
+            a sudoku puzzle to be solved
+        time_limit: float
+            amount of time (in seconds) available to the solver
+        encoding: AtMostOneEncoding
+            encoding of the "at most one" constraints
+        vectorized: bool
+            use `VectorizedSudokuCNF` instead of `SudokuCNF`
+        streaming: bool
+            add the clauses into the solver while they are being built
+        cache: CNFCache | None
+            an on-disk cache of the encodings
+        template_pool: SatTemplatePool | None
+            solve against warm per-size template solvers of the pool
+            (the pool decides about their backend)
+        backend: SatBackend | None
+            a SAT engine, by default the one chosen by the tuning profile
+        hint: SudokuGrid | None
+            a guessed (partial) solution, its values are tried first;
+            not with `template_pool`, as the phases set in a solver
+            cannot be reset and the template solvers are shared
+
+        Raises
+        -------
+        value_error: ValueError
+            when both `template_pool` and `hint` are given
+        """
+        if template_pool is not None and hint is not None:
+            raise ValueError("a hint cannot be set in the template solvers")
         super().__init__(puzzle, time_limit)
+        self._encoding = encoding
+        self._vectorized = vectorized
+        self._streaming = streaming
+        self._cache = cache
+        self._template_pool = template_pool
+        self._backend = backend or profiled_backend(puzzle.size)
+        self._hint = hint
 
     def run_algorithm(self) -> SudokuGrid | None:
-        sudoku_cnf = SudokuCNF.encode(self._puzzle)
+        if self._template_pool is not None:
+            self._backend = self._template_pool.backend
+            with self._template_pool.acquire(
+                self._puzzle.size, self._remaining_time()
+            ) as (solver, template):
+                assumptions = SatTemplatePool.assumptions(
+                    self._puzzle, self._candidates
+                )
+                return self._solve(solver, template, assumptions)
+
+        with Solver(name=self._backend) as solver:
+            sudoku_cnf = self._encode_into(solver)
+            self._set_phases(solver, sudoku_cnf.propositions)
+            return self._solve(solver, sudoku_cnf)
+
+    def _set_phases(self, solver: Solver, propositions: PropositionTable) -> None:
+        """
+        Makes the solver try the values of the hint first.
 
-        def interrupt(s):
-            s.interrupt()
-            raise TimeoutError
+        Parameters
+        -----------
+        solver: Solver
+            a solver loaded with the propositions
+        propositions: PropositionTable
+            propositions of the encoding
+        """
+        if self._hint is None or self._backend == SatBackend.LINGELING:
+            return
+        hinted = np.asarray(self._hint[:, :])[propositions.rows, propositions.cols]
+        solver.set_phases(propositions.ids[hinted == propositions.vals].tolist())
+
+    def count_solutions_up_to(self, limit: int) -> int:
+        """
+        Counts solutions of the puzzle, stopping after `limit` of them.
+        The puzzle is encoded only once, every solution found is excluded
+        by a blocking clause over the propositions of the free cells
+        and the same solver is asked again.
+        The template pool is not used, as blocking clauses would stay in it.
+
+        Parameters
+        -----------
+        limit: int
+            the largest number of solutions worth counting
+
+        Returns
+        --------
+        count: int
+            number of solutions, but no more than `limit`
+        """
+        with Solver(name=self._backend) as solver:
+            sudoku_cnf = self._encode_into(solver)
+            propositions_count = len(sudoku_cnf.propositions)
+            count = 0
+            while count < limit and self._solve_limited(solver):
+                count += 1
+                model = np.asarray(solver.get_model(), dtype=np.int64)
+                true_ids = model[(model > 0) & (model <= propositions_count)]
+                if len(true_ids) == 0:
+                    break
+                solver.add_clause((-true_ids).tolist())
+            return count
+
+    def _encode_into(self, solver: Solver) -> SudokuCNF | VectorizedSudokuCNF:
+        """
+        Encodes the puzzle and adds all its clauses into the solver.
 
-        with Solver(bootstrap_with=sudoku_cnf.cnf) as solver:
-            timer = Timer(self._time_limit, interrupt, [solver])
-            timer.start()
-            try:
-                solved = solver.solve_limited(expect_interrupt=True)
-                timer.cancel()
-                if solved is None:
-                    raise TimeoutError
-                if solved:
-                    return sudoku_cnf.decode(solver.get_model())
-                return None
-            except TimeoutError:
+        Parameters
+        -----------
+        solver: Solver
+            a solver receiving the clauses
+
+        Returns
+        --------
+        sudoku_cnf: SudokuCNF | VectorizedSudokuCNF
+            the encoding used to decode a solution
+        """
+        if self._cache is not None:
+            sudoku_cnf = self._cache.encode(
+                self._puzzle, self._encoding, self._candidates
+            )
+            for block in sudoku_cnf.clauses:
+                self._append_block(solver, block)
+            return sudoku_cnf
+
+        if self._vectorized and self._streaming:
+            return VectorizedSudokuCNF.stream(
+                self._puzzle,
+                lambda block: self._append_block(solver, block),
+                self._encoding,
+                self._candidates,
+            )
+
+        if self._vectorized:
+            sudoku_cnf = VectorizedSudokuCNF.encode(
+                self._puzzle, self._encoding, self._candidates
+            )
+        else:
+            sudoku_cnf = SudokuCNF.encode(
+                self._puzzle, self._encoding, self._candidates
+            )
+        solver.append_formula(sudoku_cnf.cnf)
+        return sudoku_cnf
+
+    def _append_block(self, solver: Solver, block: ClauseBlock) -> None:
+        """
+        Adds a block of clauses into the solver. Large blocks are split
+        into chunks so only a chunk is ever held as python lists.
+        The deadline (and `cancel`) is checked between the chunks,
+        as encoding a large grid may take longer than solving it.
+
+        Parameters
+        -----------
+        solver: Solver
+            a solver receiving the clauses
+        block: ClauseBlock
+            clauses to be added
+
+        Raises
+        -------
+        timeout_error: TimeoutError
+            when the available time runs out
+        """
+        for start in range(0, len(block), STREAM_CHUNK_SIZE):
+            if self._timeout():
+                raise TimeoutError
+            solver.append_formula(block[start : start + STREAM_CHUNK_SIZE].tolist())
+
+    def _solve(
+        self,
+        solver: Solver,
+        sudoku_cnf: SudokuCNF | VectorizedSudokuCNF,
+        assumptions: list[int] | None = None,
+    ) -> SudokuGrid | None:
+        """
+        Runs the solver loaded with the encoded puzzle within the time limit.
+
+        Parameters
+        -----------
+        solver: Solver
+            a solver containing all the clauses of the `sudoku_cnf`
+        sudoku_cnf: SudokuCNF | VectorizedSudokuCNF
+            the encoding used to decode the solution
+        assumptions: list[int] | None
+            propositions assumed to be true while solving
+
+        Returns
+        --------
+        solution: SudokuGrid | None
+            `None` if the puzzle has no solution, otherwise the solution
+        """
+        if self._solve_limited(solver, assumptions):
+            return sudoku_cnf.decode(solver.get_model())
+        return None
+
+    def _solve_limited(
+        self, solver: Solver, assumptions: list[int] | None = None
+    ) -> bool:
+        """
+        Runs the solver until the deadline.
+
+        Parameters
+        -----------
+        solver: Solver
+            a solver containing the clauses
+        assumptions: list[int] | None
+            propositions assumed to be true while solving
+
+        Returns
+        --------
+        solved: bool
+            `True` if the clauses are satisfiable, `False` otherwise
+
+        Raises
+        -------
+        timeout_error: TimeoutError
+            when the available time runs out
+        """
+        if not self._backend.supports_interrupt:
+            solved = solver.solve(assumptions=assumptions or [])
+            if self._timeout():
                 raise TimeoutError
+            return solved
+
+        # a watcher interrupts the engine at the deadline or on `cancel`
+        finished = threading.Event()
+
+        def watch() -> None:
+            while not finished.wait(min(POLL_INTERVAL, self._remaining_time())):
+                if self._timeout():
+                    solver.interrupt()
+                    return
+
+        watcher = threading.Thread(target=watch, daemon=True)
+        watcher.start()
+        try:
+            solved = solver.solve_limited(
+                assumptions=assumptions or [], expect_interrupt=True
+            )
+        finally:
+            finished.set()
+            watcher.join()
+        if solved is None:
+            raise TimeoutError
+        return solved
 
         # Given a sudoku `grid: SudokuGrid` one should use static method `encode`
         #     to create a CNF representation:
@@ -0,0 +1,200 @@
+from __future__ import annotations
+from contextlib import contextmanager
+import functools
+import os
+import threading
+from typing import Iterator
+import numpy as np
+from pysat.solvers import Solver  # type: ignore[import-untyped]
+from src.model.grid import Candidates, SudokuGrid
+from src.solvers.at_most_one import AtMostOneEncoding
+from src.solvers.sat_backend import DEFAULT_BACKEND, SatBackend
+from src.solvers.vectorized_cnf import VectorizedSudokuCNF
+
+
+class SatTemplatePool:
+    """
+    A pool of warm SAT solvers, each loaded with the encoding
+    of an empty grid (the "template") of a given size.
+
+    All sudokus of the same size share the cell, row, column and block
+    constraints, only their givens differ. The givens are passed to
+    the solver as assumptions, so neither the encoding nor the solver
+    has to be rebuilt for every puzzle. The clauses learned while solving
+    one puzzle stay valid for the next ones.
+
+    Thread-safety
+    -------------
+    A pysat solver must not be used by two threads at once, so the pool
+    hands every solver out exclusively (see `acquire`). At most
+    `solvers_per_size` solvers exist for every size, further threads wait
+    until a solver is released. Solvers are created lazily, the template
+    of every size is encoded only once.
+
+    Usage
+    -----
+        `pool = SatTemplatePool.shared()`
+        `solution = SudokuSolverType.SAT.solve(grid, 1.0, template_pool=pool)`
+
+    Attributes:
+    -----------
+    solvers_per_size: int
+        the largest number of solvers kept for a single grid size
+    encoding: AtMostOneEncoding
+        encoding of the "at most one" constraints of the templates
+    backend: SatBackend
+        the SAT engine of the solvers
+    """
+
+    solvers_per_size: int
+    encoding: AtMostOneEncoding
+    backend: SatBackend
+    _lock: threading.Lock
+    _templates: dict[int, VectorizedSudokuCNF]
+    _idle: dict[int, list[Solver]]
+    _slots: dict[int, threading.Semaphore]
+
+    def __init__(
+        self,
+        solvers_per_size: int | None = None,
+        encoding: AtMostOneEncoding = AtMostOneEncoding.AUTO,
+        backend: SatBackend = DEFAULT_BACKEND,
+    ) -> None:
+        """
+        Initialize the pool.
+
+        Parameters
+        -----------
+        solvers_per_size: int | None
+            the largest number of solvers kept for a single grid size,
+            by default the number of CPUs
+        encoding: AtMostOneEncoding
+            encoding of the "at most one" constraints of the templates
+        backend: SatBackend
+            the SAT engine of the solvers
+        """
+        self.solvers_per_size = solvers_per_size or os.cpu_count() or 1
+        self.encoding = encoding
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._templates = {}
+        self._idle = {}
+        self._slots = {}
+
+    @staticmethod
+    @functools.cache
+    def shared() -> SatTemplatePool:
+        """
+        Returns
+        --------
+        pool: SatTemplatePool
+            a pool shared by the whole process
+        """
+        return SatTemplatePool()
+
+    def template(self, size: int) -> VectorizedSudokuCNF:
+        """
+        Returns the encoding of an empty grid of the given size.
+
+        Parameters
+        -----------
+        size: int
+            size of the grid, e.g. 9 for a 9x9 grid
+
+        Returns
+        --------
+        template: VectorizedSudokuCNF
+            encoding of an empty grid, the proposition "cell (row, col) has value
+            `val`" has the identifier `(row * size + col) * size + val`
+        """
+        with self._lock:
+            if size not in self._templates:
+                empty = SudokuGrid(np.zeros((size, size), dtype=np.uint))
+                self._templates[size] = VectorizedSudokuCNF.encode(empty, self.encoding)
+                self._idle[size] = []
+                self._slots[size] = threading.Semaphore(self.solvers_per_size)
+            return self._templates[size]
+
+    @contextmanager
+    def acquire(
+        self, size: int, timeout: float | None = None
+    ) -> Iterator[tuple[Solver, VectorizedSudokuCNF]]:
+        """
+        Hands out a solver loaded with the template of the given size.
+        The solver is returned to the pool when the context ends.
+
+        Parameters
+        -----------
+        size: int
+            size of the grid
+        timeout: float | None
+            the longest time (in seconds) to wait for a free solver,
+            `None` to wait indefinitely
+
+        Returns
+        --------
+        solver_template: Iterator[tuple[Solver, VectorizedSudokuCNF]]
+            a context yielding the solver and its template
+
+        Raises
+        -------
+        timeout_error: TimeoutError
+            when no solver frees up in time
+        """
+        template = self.template(size)
+        if not self._slots[size].acquire(timeout=timeout):
+            raise TimeoutError
+        try:
+            with self._lock:
+                solver = self._idle[size].pop() if self._idle[size] else None
+            if solver is None:
+                solver = Solver(name=self.backend, bootstrap_with=template.cnf)
+            try:
+                yield solver, template
+            finally:
+                if self.backend.supports_interrupt:
+                    solver.clear_interrupt()
+                with self._lock:
+                    self._idle[size].append(solver)
+        finally:
+            self._slots[size].release()
+
+    def close(self) -> None:
+        """
+        Deletes all the idle solvers.
+        """
+        with self._lock:
+            for solvers in self._idle.values():
+                for solver in solvers:
+                    solver.delete()
+                solvers.clear()
+
+    @staticmethod
+    def assumptions(
+        puzzle: SudokuGrid, candidates: Candidates | None = None
+    ) -> list[int]:
+        """
+        Translates givens of the puzzle into the template propositions.
+
+        Parameters
+        -----------
+        puzzle: SudokuGrid
+            a sudoku puzzle
+        candidates: Candidates | None
+            restrictions of the values of the empty cells
+
+        Returns
+        --------
+        assumptions: list[int]
+            identifiers of the template propositions stating the givens,
+            followed by the negated propositions ruled out by the candidates
+        """
+        size = puzzle.size
+        grid = np.asarray(puzzle[:, :], dtype=np.int64)
+        rows, cols = np.nonzero(grid)
+        assumptions = (rows * size + cols) * size + grid[rows, cols]
+        if candidates is not None:
+            rows, cols, vals = np.nonzero((grid == 0)[:, :, None] & ~candidates)
+            excluded = (rows * size + cols) * size + vals + 1
+            assumptions = np.concatenate([assumptions, -excluded])
+        return assumptions.tolist()
@@ -0,0 +1,186 @@
+from __future__ import annotations
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+import os
+import time
+from timeit import default_timer as timer
+from typing import Iterable, Iterator
+import numpy as np
+from src.model.grid import SudokuGrid
+from src.model.shared_slab import GridSlot, SharedGridSlab
+from src.solvers.batch import SolveResult, SolveStatus, _solve_chunk, _solve_one
+from src.solvers.solver_type import SudokuSolverType
+
+
+def estimated_cost(puzzle: SudokuGrid) -> float:
+    """
+    Estimates how hard a puzzle is, relative to the other puzzles.
+    The estimate is the number of the propositions an empty cell may take,
+    `size` values for every empty cell, i.e. `size^3 * (1 - fill ratio)`.
+
+    Parameters
+    -----------
+    puzzle: SudokuGrid
+        a sudoku puzzle
+
+    Returns
+    --------
+    cost: float
+        the estimated cost, in arbitrary units
+    """
+    empty = np.count_nonzero(np.asarray(puzzle[:, :]) == 0)
+    return float(empty * puzzle.size) + 1.0
+
+
+def solve_within(
+    puzzles: Iterable[SudokuGrid],
+    solver_type: SudokuSolverType,
+    deadline: float,
+    workers: int | None = None,
+    **options,
+) -> Iterator[SolveResult]:
+    """
+    Solves a batch of puzzles sharing a single time budget.
+
+    The puzzles are started shortest expected first (see `estimated_cost`),
+    one per worker at a time. When a puzzle starts it gets a share
+    of the time left until the deadline: proportional to its cost among
+    the puzzles still waiting, but never less than an equal share.
+    The shares are computed from the time actually left, so the time unused
+    by the fast puzzles goes to the harder ones started later. A worker
+    clamps the share to the deadline once it starts the puzzle, so the time
+    spent waiting for the worker is not lost. No result comes after
+    the deadline: the puzzles not started by then time out, and so do
+    the puzzles still running, which are abandoned to their workers.
+    A single worker can only stop a puzzle as fast as its solver does.
+
+    Usage
+    -----
+        `for result in solve_within(puzzles, SudokuSolverType.SAT, 60.0, workers=8):`
+        `    print(result.index, result.status)`
+
+    Parameters
+    -----------
+    puzzles: Iterable[SudokuGrid]
+        the puzzles to be solved
+    solver_type: SudokuSolverType
+        the solver used for every puzzle
+    deadline: float
+        the time budget (in seconds) of the whole batch
+    workers: int | None
+        number of the worker processes, by default the number of CPUs,
+        a single worker solves the puzzles in the calling process
+    **options: Any
+        options passed to `solver_type.solve`
+
+    Returns
+    --------
+    results: Iterator[SolveResult]
+        a result for every puzzle, as soon as it is ready
+    """
+    end = timer() + deadline
+    workers = workers or os.cpu_count() or 1
+    puzzles = list(puzzles)
+    costs = [estimated_cost(puzzle) for puzzle in puzzles]
+    waiting = sorted(range(len(puzzles)), key=lambda index: costs[index], reverse=True)
+    waiting_cost = sum(costs)
+
+    def time_share(index: int) -> float:
+        remaining = end - timer()
+        capacity = remaining * workers
+        fair = capacity / len(waiting)
+        proportional = capacity * costs[index] / waiting_cost
+        return min(remaining, max(fair, proportional))
+
+    if workers == 1:
+        while waiting and timer() < end:
+            index = waiting[-1]
+            limit = time_share(index)
+            waiting_cost -= costs[waiting.pop()]
+            yield _solve_one(index, puzzles[index], solver_type, limit, options)
+        for index in reversed(waiting):
+            yield SolveResult(index, SolveStatus.TIMEOUT, None, 0.0)
+        return
+
+    with SharedGridSlab.create(puzzles) as slab:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            # the workers compare the deadline with the wall clock,
+            # `timer` is not comparable between processes
+            wall_end = time.time() + (end - timer())
+            running: dict[Future, tuple[int, GridSlot, float]] = {}
+            while waiting or running:
+                while waiting and len(running) < workers and timer() < end:
+                    index = waiting[-1]
+                    limit = time_share(index)
+                    waiting_cost -= costs[waiting.pop()]
+                    chunk = ((index, slab.slots[index]),)
+                    future = executor.submit(
+                        _solve_until,
+                        slab.name,
+                        chunk,
+                        solver_type,
+                        limit,
+                        wall_end,
+                        options,
+                    )
+                    running[future] = (index, slab.slots[index], timer())
+                if not running:
+                    break
+                done, _ = wait(
+                    running,
+                    timeout=max(end - timer(), 0.0),
+                    return_when=FIRST_COMPLETED,
+                )
+                if not done:
+                    break
+                for future in done:
+                    index, slot, _ = running.pop(future)
+                    [(status, elapsed, error)] = future.result()
+                    solved = status == SolveStatus.SOLVED
+                    solution = slab.solution(slot) if solved else None
+                    yield SolveResult(index, status, solution, elapsed, error)
+            for index, _, started in running.values():
+                yield SolveResult(index, SolveStatus.TIMEOUT, None, timer() - started)
+            for index in reversed(waiting):
+                yield SolveResult(index, SolveStatus.TIMEOUT, None, 0.0)
+        finally:
+            # the abandoned puzzles stop at their own limits, not waited for
+            executor.shutdown(wait=not running, cancel_futures=True)
+
+
+def _solve_until(
+    name: str,
+    chunk: tuple[tuple[int, GridSlot], ...],
+    solver_type: SudokuSolverType,
+    time_limit: float,
+    wall_end: float,
+    options: dict,
+) -> list[tuple[SolveStatus, float, str | None]]:
+    """
+    Solves a chunk of the puzzles in a worker process (see `_solve_chunk`),
+    the time limit is clamped to the deadline.
+
+    Parameters
+    -----------
+    name: str
+        name of the slab holding the puzzles
+    chunk: tuple[tuple[int, GridSlot], ...]
+        positions in the batch and slots of the puzzles
+    solver_type: SudokuSolverType
+        the solver to be used
+    time_limit: float
+        amount of time (in seconds) available for every puzzle
+    wall_end: float
+        the deadline, as returned by `time.time`
+    options: dict
+        options passed to `solver_type.solve`
+
+    Returns
+    --------
+    outcomes: list[tuple[SolveStatus, float, str | None]]
+        the status, the time and the error of every puzzle
+    """
+    time_limit = min(time_limit, wall_end - time.time())
+    if time_limit <= 0.0:
+        return [(SolveStatus.TIMEOUT, 0.0, None) for _ in chunk]
+    return _solve_chunk(name, chunk, solver_type, time_limit, options)
@@ -0,0 +1,165 @@
+from __future__ import annotations
+from src.model.grid import SudokuGrid
+from src.solvers.feasibility import InfeasiblePuzzleError
+from src.solvers.sat_solver import SatSudokuSolver
+from src.solvers.sat_template import SatTemplatePool
+
+
+class SolveSession:
+    """
+    An interactive solving session over a single board.
+
+    The board is edited one cell at a time and every edit returns
+    a solution of the current board (or `None` if there is none).
+    Solving is done against the warm template solvers of
+    `SatTemplatePool`, with the givens passed as assumptions,
+    so edits never re-encode the board. Moreover, many edits are
+    answered without calling the solver at all:
+    - clearing a cell keeps the last solution valid,
+    - setting a cell to its value in the last solution keeps it valid,
+    - filling an empty cell of a board without a solution keeps it unsolvable.
+
+    Usage
+    -----
+        `session = SolveSession(grid, time_limit=1.0)`
+        `solution = session.set((0, 3), 7)`
+        `solution = session.clear((0, 3))`
+
+    Attributes:
+    -----------
+    time_limit: float
+        time limit (in seconds) of every call to the solver
+
+    Protected Attributes:
+    ---------------------
+    _grid: SudokuGrid
+        the current state of the board
+    _pool: SatTemplatePool
+        the pool of solvers used by the session
+    _solution: SudokuGrid | None
+        the last solution, `None` if the board has no solution
+    _up_to_date: bool
+        whether the `_solution` reflects the current board
+    """
+
+    time_limit: float
+    _grid: SudokuGrid
+    _pool: SatTemplatePool
+    _solution: SudokuGrid | None
+    _up_to_date: bool
+
+    def __init__(
+        self,
+        puzzle: SudokuGrid,
+        time_limit: float,
+        pool: SatTemplatePool | None = None,
+    ) -> None:
+        """
+        Initialize the session.
+
+        Parameters
+        -----------
+        puzzle: SudokuGrid
+            the initial board, it is copied
+        time_limit: float
+            time limit (in seconds) of every call to the solver
+        pool: SatTemplatePool | None
+            the pool of solvers, by default the shared one
+        """
+        self.time_limit = time_limit
+        self._grid = puzzle.copy()
+        self._pool = pool or SatTemplatePool.shared()
+        self._solution = None
+        self._up_to_date = False
+
+    @property
+    def grid(self) -> SudokuGrid:
+        """
+        Returns
+        --------
+        grid: SudokuGrid
+            a copy of the current board
+        """
+        return self._grid.copy()
+
+    def set(self, cell: tuple[int, int], value: int) -> SudokuGrid | None:
+        """
+        Puts a value in a cell and solves the board.
+
+        Parameters
+        -----------
+        cell: tuple[int, int]
+            coordinates (row, col) of the cell
+        value: int
+            a value from `1` to the size of the grid
+
+        Returns
+        --------
+        solution: SudokuGrid | None
+            `None` if the board has no solution, otherwise a solution
+
+        Raises
+        -------
+        value_error: ValueError
+            when the value does not fit in the grid
+
+        timeout_error: TimeoutError
+            when the solver runs out of time
+        """
+        if not 1 <= value <= self._grid.size:
+            raise ValueError(f"value {value} does not fit in the grid")
+        replaced = self._grid[cell] not in (0, value)
+        self._grid[cell] = value
+        if self._solution is not None and self._solution[cell] != value:
+            self._up_to_date = False
+        if self._solution is None and replaced:
+            self._up_to_date = False
+        return self.solve()
+
+    def clear(self, cell: tuple[int, int]) -> SudokuGrid | None:
+        """
+        Empties a cell and solves the board.
+
+        Parameters
+        -----------
+        cell: tuple[int, int]
+            coordinates (row, col) of the cell
+
+        Returns
+        --------
+        solution: SudokuGrid | None
+            `None` if the board has no solution, otherwise a solution
+
+        Raises
+        -------
+        timeout_error: TimeoutError
+            when the solver runs out of time
+        """
+        self._grid[cell] = 0
+        if self._solution is None:
+            self._up_to_date = False
+        return self.solve()
+
+    def solve(self) -> SudokuGrid | None:
+        """
+        Solves the current board, reusing the last solution if it is still valid.
+
+        Returns
+        --------
+        solution: SudokuGrid | None
+            `None` if the board has no solution, otherwise a solution
+
+        Raises
+        -------
+        timeout_error: TimeoutError
+            when the solver runs out of time
+        """
+        if not self._up_to_date:
+            try:
+                self._solution = SatSudokuSolver.solve(
+                    self._grid, self.time_limit, template_pool=self._pool
+                )
+            except InfeasiblePuzzleError:
+                self._solution = None
+            self._up_to_date = True
+        return None if self._solution is None else self._solution.copy()
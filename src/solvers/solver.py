@@ -1,14 +1,33 @@
+from __future__ import annotations
 from abc import ABC, abstractmethod
-from src.model.grid import SudokuGrid
+import threading
+from typing import ClassVar
+from src.model.grid import Candidates, SudokuGrid
+from src.solvers.feasibility import (
+    Infeasibility,
+    InfeasibilityReason,
+    InfeasiblePuzzleError,
+)
+from src.solvers.presolve import Presolved
 from timeit import default_timer as timer
 
 
+POLL_INTERVAL = 0.01
+"""how often (in seconds) a waiting solver checks whether it should stop"""
+
+
 class SudokuSolver(ABC):
     """
     An abstract class defining a sudoku solver.
     Every sudoku solver is supposed to inherit from this class
     and implement the `run_algorithm` method.
 
+    Class Attributes:
+    -----------------
+    counts_solutions: bool
+        whether the solver can count solutions (see `count_solutions`),
+        a solver stopping at the first solution it finds cannot
+
     Protected Attributes:
     ---------------------
     _puzzle: SudokuGrid
@@ -17,11 +36,30 @@ class SudokuSolver(ABC):
         how much time is available for the solver
     _deadline: float
         a deadline used in the built-in _timeout() method
+    _solutions_limit: int
+        after how many solutions should the search stop
+    _solutions_found: int
+        how many solutions has the search found so far
+    _candidates: Candidates | None
+        restrictions of the cell values (e.g. left by the presolve),
+        `None` if every value is allowed
+    _cancelled: threading.Event
+        set when the solver should stop before its deadline
 
     Methods:
     --------
     _timeout() -> bool:
-        checks whether the available time has run out
+        checks whether the available time has run out or the solver is cancelled
+    _remaining_time() -> float:
+        returns how much time is left until the deadline
+    _accept_solution() -> bool:
+        records a found solution, tells whether the search should stop
+    count_solutions_up_to(self, limit: int) -> int:
+        counts solutions of the puzzle, but no more than `limit`
+    restrict(self, candidates: Candidates) -> None:
+        restricts the values of the cells
+    cancel(self) -> None:
+        stops the solver as if its time has run out
 
     Abstract Methods:
     -----------------
@@ -30,18 +68,55 @@ class SudokuSolver(ABC):
 
     Class Methods:
     --------------
-    solve(cls, puzzle: SudokuGrid, time_limit: float, *args, **kwargs) -> SudokuGrid | None:
-        an interface method supposed dispatch correct algorithm
+    solve(cls, puzzle: SudokuGrid, time_limit: float, *args, presolve: bool, cancelled: threading.Event | None, **kwargs) -> SudokuGrid | None:
+        an interface method supposed dispatch correct algorithm,
+        contradictory puzzles are rejected up front (see `InfeasiblePuzzleError`),
+        optionally running the presolve (`Presolved.from_grid`) first,
+        the solver stops early once `cancelled` is set
+    count_solutions(cls, puzzle: SudokuGrid, time_limit: float, limit: int, *args, **kwargs) -> int:
+        counts solutions of the puzzle, but no more than `limit`
+    is_unique(cls, puzzle: SudokuGrid, time_limit: float, *args, **kwargs) -> bool:
+        checks whether the puzzle has exactly one solution
     """
 
+    counts_solutions: ClassVar[bool] = True
     _puzzle: SudokuGrid
     _time_limit: float
     _deadline: float
+    _solutions_limit: int
+    _solutions_found: int
+    _candidates: Candidates | None
+    _cancelled: threading.Event
 
     def __init__(self, puzzle: SudokuGrid, time_limit: float) -> None:
         self._puzzle = puzzle.copy()
         self._time_limit = time_limit
         self._deadline = timer() + time_limit
+        self._solutions_limit = 1
+        self._solutions_found = 0
+        self._candidates = None
+        self._cancelled = threading.Event()
+
+    def restrict(self, candidates: Candidates) -> None:
+        """
+        Restricts the values of the cells, e.g. to the candidates left by
+        the presolve. Solvers may use the restriction to prune their search,
+        the ones ignoring it still find correct solutions.
+
+        Parameters
+        -----------
+        candidates: Candidates
+            the allowed values of every cell
+        """
+        self._candidates = candidates
+
+    def cancel(self) -> None:
+        """
+        Stops the solver from another thread. The solver notices it
+        at its next `_timeout()` check (the SAT solvers interrupt the engine)
+        and raises `TimeoutError`.
+        """
+        self._cancelled.set()
 
     def _timeout(self) -> bool:
         """
@@ -50,10 +125,63 @@ class SudokuSolver(ABC):
         Returns
         --------
         timeout: bool
-            - `True` if solver has missed the deadline
+            - `True` if solver has missed the deadline or has been cancelled
             - `False` otherwise
         """
-        return timer() > self._deadline
+        return self._cancelled.is_set() or timer() > self._deadline
+
+    def _remaining_time(self) -> float:
+        """
+        Returns how much time is left until the deadline.
+
+        Returns
+        --------
+        remaining: float
+            remaining time in seconds, never negative
+        """
+        return max(0.0, self._deadline - timer())
+
+    def _accept_solution(self) -> bool:
+        """
+        Records a solution found by a search.
+        Backtracking solvers call it whenever the grid is complete
+        and stop the search only if it returns `True`.
+        It makes the same search usable for both solving and counting.
+
+        Returns
+        --------
+        stop: bool
+            - `True` if the search has found enough solutions
+            - `False` if the search should look for another solution
+        """
+        self._solutions_found += 1
+        return self._solutions_found >= self._solutions_limit
+
+    def count_solutions_up_to(self, limit: int) -> int:
+        """
+        Counts solutions of the puzzle, stopping after `limit` of them.
+        By default it runs `run_algorithm` with the `_accept_solution` hook
+        asking for `limit` solutions.
+
+        Parameters
+        -----------
+        limit: int
+            the largest number of solutions worth counting
+
+        Returns
+        --------
+        count: int
+            number of solutions, but no more than `limit`
+
+        Raises
+        -------
+        timeout_error: TimeoutError
+            when the available time runs out
+        """
+        self._solutions_limit = limit
+        self._solutions_found = 0
+        self.run_algorithm()
+        return min(self._solutions_found, limit)
 
     @abstractmethod
     def run_algorithm(self) -> SudokuGrid | None:
@@ -75,11 +203,18 @@ class SudokuSolver(ABC):
 
     @classmethod
     def solve(
-        cls, puzzle: SudokuGrid, time_limit: float, *args, **kwargs
+        cls,
+        puzzle: SudokuGrid,
+        time_limit: float,
+        *args,
+        presolve: bool = False,
+        cancelled: threading.Event | None = None,
+        **kwargs,
     ) -> SudokuGrid | None:
         """
         Solves the given sudoku puzzle within a specified time limit using
         the solver implement within the class `cls`.
+        Puzzles failing the `Infeasibility` check are rejected without solving.
 
         Returns
         --------
@@ -92,6 +227,13 @@ class SudokuSolver(ABC):
         timeout_error: TimeoutError
             when the available time runs out
 
+        value_error: ValueError
+            when the puzzle contains a value larger than its size
+
+        infeasible_puzzle_error: InfeasiblePuzzleError
+            when the puzzle is rejected without solving,
+            its `infeasibility` tells why it has no solution
+
         Parameters
         -----------
         puzzle: SudokuGrid
@@ -100,8 +242,178 @@ class SudokuSolver(ABC):
             amount of time (in seconds) available to the solver
         *args: Any
             extra arguments passed to the solver constructor
+        presolve: bool
+            whether to reduce the puzzle by constraint propagation first,
+            the solver gets the reduced grid and the remaining candidates
+        cancelled: threading.Event | None
+            an event stopping the solver when set (see `cancel`)
         **kwargs: Any
             extra named arguments passed to the solver constructor
         """
-        solver = cls(puzzle, time_limit, *args, **kwargs)
+        cls._reject(puzzle)
+        if presolve:
+            start = timer()
+            presolved = Presolved.from_grid(puzzle)
+            if presolved.infeasible:
+                return None
+            if presolved.solved:
+                return presolved.grid
+            time_limit -= timer() - start
+            solver = cls._restricted(presolved, time_limit, *args, **kwargs)
+        else:
+            solver = cls(puzzle, time_limit, *args, **kwargs)
+        if cancelled is not None:
+            solver._cancelled = cancelled
         return solver.run_algorithm()
+
+    @classmethod
+    def count_solutions(
+        cls,
+        puzzle: SudokuGrid,
+        time_limit: float,
+        limit: int = 2,
+        *args,
+        presolve: bool = False,
+        cancelled: threading.Event | None = None,
+        **kwargs,
+    ) -> int:
+        """
+        Counts solutions of the given sudoku puzzle, stopping after `limit` of them,
+        using the solver implemented within the class `cls`.
+
+        Returns
+        --------
+        count: int
+            number of solutions, but no more than `limit`
+
+        Raises
+        -------
+        timeout_error: TimeoutError
+            when the available time runs out
+
+        value_error: ValueError
+            when the puzzle contains a value larger than its size,
+            or the solver cannot count solutions (see `counts_solutions`)
+
+        infeasible_puzzle_error: InfeasiblePuzzleError
+            when the puzzle is rejected without solving,
+            its `infeasibility` tells why it has no solution
+
+        Parameters
+        -----------
+        puzzle: SudokuGrid
+            a sudoku puzzle to be examined
+        time_limit: float
+            amount of time (in seconds) available to the solver
+        limit: int
+            the largest number of solutions worth counting
+        *args: Any
+            extra arguments passed to the solver constructor
+        presolve: bool
+            whether to reduce the puzzle by constraint propagation first,
+            it never changes the number of solutions
+        cancelled: threading.Event | None
+            an event stopping the solver when set (see `cancel`)
+        **kwargs: Any
+            extra named arguments passed to the solver constructor
+        """
+        if not cls.counts_solutions:
+            raise ValueError(f"{cls.__name__} cannot count solutions")
+        cls._reject(puzzle)
+        if presolve:
+            start = timer()
+            presolved = Presolved.from_grid(puzzle)
+            if presolved.infeasible or presolved.solved:
+                return min(int(presolved.solved), limit)
+            time_limit -= timer() - start
+            solver = cls._restricted(presolved, time_limit, *args, **kwargs)
+        else:
+            solver = cls(puzzle, time_limit, *args, **kwargs)
+        if cancelled is not None:
+            solver._cancelled = cancelled
+        return solver.count_solutions_up_to(limit)
+
+    @staticmethod
+    def _reject(puzzle: SudokuGrid) -> None:
+        """
+        Runs the `Infeasibility` check before solving.
+
+        Parameters
+        -----------
+        puzzle: SudokuGrid
+            a sudoku puzzle to be checked
+
+        Raises
+        -------
+        value_error: ValueError
+            when the puzzle contains a value larger than its size
+
+        infeasible_puzzle_error: InfeasiblePuzzleError
+            when the puzzle certainly has no solution
+        """
+        infeasibility = Infeasibility.of(puzzle)
+        if infeasibility is None:
+            return
+        if infeasibility.reason == InfeasibilityReason.OUT_OF_RANGE:
+            raise ValueError(str(infeasibility))
+        raise InfeasiblePuzzleError(infeasibility)
+
+    @classmethod
+    def _restricted(
+        cls, presolved: Presolved, time_limit: float, *args, **kwargs
+    ) -> SudokuSolver:
+        """
+        Creates a solver of the presolved puzzle.
+
+        Parameters
+        -----------
+        presolved: Presolved
+            a puzzle reduced by the presolve
+        time_limit: float
+            amount of time (in seconds) available to the solver
+        *args: Any
+            extra arguments passed to the solver constructor
+        **kwargs: Any
+            extra named arguments passed to the solver constructor
+
+        Returns
+        --------
+        solver: SudokuSolver
+            a solver of the reduced grid restricted to the candidates
+        """
+        solver = cls(presolved.grid, time_limit, *args, **kwargs)
+        solver.restrict(presolved.candidates)
+        return solver
+
+    @classmethod
+    def is_unique(cls, puzzle: SudokuGrid, time_limit: float, *args, **kwargs) -> bool:
+        """
+        Checks whether the given sudoku puzzle has exactly one solution.
+        It costs roughly two solves.
+
+        Returns
+        --------
+        unique: bool
+            `True` if the puzzle has exactly one solution, `False` otherwise
+            (also for the puzzles rejected without solving)
+
+        Raises
+        -------
+        timeout_error: TimeoutError
+            when the available time runs out
+
+        Parameters
+        -----------
+        puzzle: SudokuGrid
+            a sudoku puzzle to be examined
+        time_limit: float
+            amount of time (in seconds) available to the solver
+        *args: Any
+            extra arguments passed to the solver constructor
+        **kwargs: Any
+            extra named arguments passed to the solver constructor
+        """
+        try:
+            return cls.count_solutions(puzzle, time_limit, 2, *args, **kwargs) == 1
+        except InfeasiblePuzzleError:
+            return False
@@ -1,37 +1,77 @@
 from enum import StrEnum, auto
 
+from src.solvers.solver import SudokuSolver
 from src.solvers.sat_solver import SatSudokuSolver
+from src.solvers.cube_solver import CubeAndConquerSatSudokuSolver
 from src.model.grid import SudokuGrid
 from src.solvers.first_fail_solver import FirstFailSudokuSolver
 from src.solvers.naive_solver import NaiveSudokuSolver
 from src.solvers.dancing_links_solver import DancingLinksSudokuSolver
+from src.solvers.portfolio_solver import PortfolioSudokuSolver
+from src.solvers.auto_solver import AutoSudokuSolver
 
 
 class SudokuSolverType(StrEnum):
     """
     Type representing various solver types.
 
+    Properties:
+    -----------
+    solver_class: type[SudokuSolver]
+        a solver class corresponding to the enum value
+
     Methods:
     --------
-    solve(self, puzzle: SudokuGrid, time_limit: float) -> SudokuGrid:
+    solve(self, puzzle: SudokuGrid, time_limit: float, **options) -> SudokuGrid:
         solves the given puzzle with a time limit
-        uses a solver corresponding to the enum value
+        uses a solver corresponding to the enum value,
+        `options` are passed to the solver constructor
+    count_solutions(self, puzzle: SudokuGrid, time_limit: float, limit: int, **options) -> int:
+        counts solutions of the puzzle, but no more than `limit`,
+        every solver but `DANCING_LINKS` can count (its external solver
+        stops at the first solution), that one raises `ValueError`
+    is_unique(self, puzzle: SudokuGrid, time_limit: float, **options) -> bool:
+        checks whether the puzzle has exactly one solution,
+        the same solvers as for `count_solutions`
     """
 
     NAIVE = auto()
     FIRST_FAIL = auto()
     DANCING_LINKS = auto()
     SAT = auto()
+    CUBE_AND_CONQUER = auto()
+    PORTFOLIO = auto()
+    AUTO = auto()
 
-    def solve(self, puzzle: SudokuGrid, time_limit: float) -> SudokuGrid | None:
+    @property
+    def solver_class(self) -> type[SudokuSolver]:
         match self:
             case SudokuSolverType.NAIVE:
-                return NaiveSudokuSolver.solve(puzzle, time_limit)
+                return NaiveSudokuSolver
             case SudokuSolverType.FIRST_FAIL:
-                return FirstFailSudokuSolver.solve(puzzle, time_limit)
+                return FirstFailSudokuSolver
             case SudokuSolverType.DANCING_LINKS:
-                return DancingLinksSudokuSolver.solve(puzzle, time_limit)
+                return DancingLinksSudokuSolver
             case SudokuSolverType.SAT:
-                return SatSudokuSolver.solve(puzzle, time_limit)
+                return SatSudokuSolver
+            case SudokuSolverType.CUBE_AND_CONQUER:
+                return CubeAndConquerSatSudokuSolver
+            case SudokuSolverType.PORTFOLIO:
+                return PortfolioSudokuSolver
+            case SudokuSolverType.AUTO:
+                return AutoSudokuSolver
             case _:
                 raise NotImplementedError()
+
+    def solve(
+        self, puzzle: SudokuGrid, time_limit: float, **options
+    ) -> SudokuGrid | None:
+        return self.solver_class.solve(puzzle, time_limit, **options)
+
+    def count_solutions(
+        self, puzzle: SudokuGrid, time_limit: float, limit: int = 2, **options
+    ) -> int:
+        return self.solver_class.count_solutions(puzzle, time_limit, limit, **options)
+
+    def is_unique(self, puzzle: SudokuGrid, time_limit: float, **options) -> bool:
+        return self.solver_class.is_unique(puzzle, time_limit, **options)
@@ -0,0 +1,495 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import functools
+import math
+from typing import Callable, Iterator, Mapping
+import numpy as np
+import numpy.typing as npt
+from pysat.formula import CNF  # type: ignore[import-untyped]
+from src.model.grid import Candidates, SudokuGrid
+from src.solvers.at_most_one import (
+    AtMostOneEncoding,
+    PAIRWISE_LIMIT,
+    COMMANDER_GROUP_SIZE,
+)
+
+
+ClauseBlock = npt.NDArray[np.int32]
+"""Type representing clauses of the same width,
+   a 2D array with a single clause in every row"""
+
+ClauseSink = Callable[[ClauseBlock], None]
+"""Type representing a consumer of the clause blocks, e.g. a SAT solver"""
+
+
+@dataclass(frozen=True, slots=True)
+class Coordinates:
+    """
+    Represent coordinates of a sudoku variable (empty cell).
+    """
+
+    row: int
+    col: int
+    block: int
+
+
+@dataclass(frozen=True, slots=True)
+class Proposition:
+    """
+    A single proposition:
+    "Sudoku cell at coordinates: `coords` has value `val`"
+    """
+
+    coords: Coordinates
+    val: int
+    id: int
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class PropositionTable(Mapping[int, Proposition]):
+    """
+    Struct-of-arrays representation of the sudoku propositions:
+    "Sudoku cell at (`rows[i]`, `cols[i]`) has value `vals[i]`"
+    The proposition at index `i` has the identifier `i + 1`,
+    unless the identifiers are given explicitly.
+
+    The table is a read-only mapping from the identifiers to the propositions,
+    the `Proposition` objects are created on demand, e.g. by `table[1]`
+    or `table.values()`, and they are not kept.
+
+    Attributes:
+    -----------
+    rows: npt.NDArray[np.int32]
+        row coordinates of the propositions
+    cols: npt.NDArray[np.int32]
+        column coordinates of the propositions
+    blocks: npt.NDArray[np.int32]
+        block indices of the propositions
+    vals: npt.NDArray[np.int32]
+        values of the propositions
+    identifiers: npt.NDArray[np.int32] | None
+        ascending identifiers of the propositions,
+        `None` stands for `1, 2, ..., len(self)`
+    """
+
+    rows: npt.NDArray[np.int32]
+    cols: npt.NDArray[np.int32]
+    blocks: npt.NDArray[np.int32]
+    vals: npt.NDArray[np.int32]
+    identifiers: npt.NDArray[np.int32] | None = None
+
+    def __len__(self) -> int:
+        return len(self.vals)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.ids.tolist())
+
+    def __contains__(self, prop_id: object) -> bool:
+        return self._index(prop_id) is not None
+
+    def __getitem__(self, prop_id: int) -> Proposition:
+        index = self._index(prop_id)
+        if index is None:
+            raise KeyError(prop_id)
+        coords = Coordinates(
+            int(self.rows[index]), int(self.cols[index]), int(self.blocks[index])
+        )
+        return Proposition(coords, int(self.vals[index]), int(prop_id))
+
+    def _index(self, prop_id: object) -> int | None:
+        """
+        Finds the proposition with the given identifier.
+
+        Parameters
+        -----------
+        prop_id: object
+            an identifier of a proposition
+
+        Returns
+        --------
+        index: int | None
+            position of the proposition in the arrays,
+            `None` if there is no such proposition
+        """
+        if not isinstance(prop_id, (int, np.integer)) or isinstance(prop_id, bool):
+            return None
+        if self.identifiers is None:
+            return int(prop_id) - 1 if 1 <= prop_id <= len(self) else None
+        index = int(np.searchsorted(self.identifiers, prop_id))
+        if index < len(self) and self.identifiers[index] == prop_id:
+            return index
+        return None
+
+    @property
+    def ids(self) -> npt.NDArray[np.int32]:
+        """
+        Returns identifiers of the propositions.
+
+        Returns
+        --------
+        ids: npt.NDArray[np.int32]
+            identifiers as used in the CNF, by default `1, 2, ..., len(self)`
+        """
+        if self.identifiers is not None:
+            return self.identifiers
+        return np.arange(1, len(self) + 1, dtype=np.int32)
+
+    @property
+    def top_id(self) -> int:
+        """
+        Returns the largest identifier of the propositions.
+
+        Returns
+        --------
+        top_id: int
+            the largest identifier, `0` for an empty table
+        """
+        if self.identifiers is not None and len(self):
+            return int(self.identifiers[-1])
+        return len(self)
+
+    def decode(self, puzzle: SudokuGrid, results: list[int]) -> SudokuGrid:
+        """
+        Fills the puzzle with the values of the true propositions.
+        The model is turned into a boolean mask over the table
+        and the grid is written by a single fancy-index assignment.
+
+        Parameters
+        -----------
+        puzzle: SudokuGrid
+            a puzzle described by the table, it is not modified
+        results: list[int]
+            a model from a SAT solver, identifiers of no proposition
+            (auxiliary variables) are ignored
+
+        Returns
+        --------
+        solution: SudokuGrid
+            a copy of the puzzle filled according the model
+        """
+        model = np.asarray(results, dtype=np.int64)
+        if self.identifiers is not None:
+            true = np.isin(self.identifiers, model[model > 0])
+        else:
+            model = model[(model > 0) & (model <= len(self))]
+            true = np.zeros(len(self), dtype=bool)
+            true[model - 1] = True
+        solution = puzzle.copy()
+        solution[self.rows[true], self.cols[true]] = self.vals[true]
+        return solution
+
+    @staticmethod
+    def from_grid(
+        puzzle: SudokuGrid, candidates: Candidates | None = None
+    ) -> PropositionTable:
+        """
+        Creates propositions for every value which can still be put
+        in an empty cell of the puzzle. The propositions are ordered
+        by the row, the column and then the value of the cell.
+
+        Parameters
+        -----------
+        puzzle: SudokuGrid
+            a puzzle whose empty cells are described
+        candidates: Candidates | None
+            restrictions of the cell values (e.g. found by the presolve),
+            values outside of them get no propositions
+
+        Returns
+        --------
+        table: PropositionTable
+            a table of the possible propositions
+        """
+        possible = puzzle.candidates()
+        possible &= (np.asarray(puzzle[:, :]) == 0)[:, :, None]
+        if candidates is not None:
+            possible &= candidates
+        rows, cols, vals = np.nonzero(possible)
+        return PropositionTable(
+            rows.astype(np.int32),
+            cols.astype(np.int32),
+            puzzle.topology.cell_blocks[rows, cols].astype(np.int32),
+            (vals + 1).astype(np.int32),
+        )
+
+
+def _groups(keys: npt.NDArray[np.int64]) -> Iterator[npt.NDArray[np.int32]]:
+    """
+    Groups proposition identifiers by their keys.
+    Groups of the same size are returned together as a single 2D array,
+    the identifiers within every group are in ascending order.
+
+    Parameters
+    -----------
+    keys: npt.NDArray[np.int64]
+        group label of every proposition
+
+    Returns
+    --------
+    groups: Iterator[npt.NDArray[np.int32]]
+        2D arrays with a single group of identifiers in every row
+    """
+    order = np.argsort(keys, kind="stable").astype(np.int32)
+    starts = np.flatnonzero(np.diff(keys[order], prepend=-1))
+    sizes = np.diff(starts, append=len(keys))
+    for size in np.unique(sizes):
+        group_starts = starts[sizes == size]
+        yield order[group_starts[:, None] + np.arange(size)] + 1
+
+
+@functools.cache
+def _pairs(size: int) -> tuple[npt.NDArray[np.intp], npt.NDArray[np.intp]]:
+    return np.triu_indices(size, 1)
+
+
+class _ArrayEncoder:
+    """
+    Builds clause blocks for many groups of literals at once.
+    Each method takes a 2D array of literals with a single group in every row,
+    auxiliary variables are allocated after `top_id`.
+    Every block is passed to the `sink` as soon as it is built.
+    """
+
+    encoding: AtMostOneEncoding
+    top_id: int
+    sink: ClauseSink
+
+    def __init__(
+        self, encoding: AtMostOneEncoding, top_id: int, sink: ClauseSink
+    ) -> None:
+        self.encoding = encoding
+        self.top_id = top_id
+        self.sink = sink
+
+    def _emit(self, *columns: npt.NDArray[np.int32]) -> None:
+        shape = np.broadcast_shapes(*(column.shape for column in columns))
+        if math.prod(shape) == 0:
+            return
+        block = np.empty((*shape, len(columns)), dtype=np.int32)
+        for i, column in enumerate(columns):
+            block[..., i] = column
+        self.sink(block.reshape(-1, len(columns)))
+
+    def _new_variables(self, groups: int, count: int) -> npt.NDArray[np.int32]:
+        first = self.top_id + 1
+        self.top_id += groups * count
+        return np.arange(first, self.top_id + 1, dtype=np.int32).reshape(groups, count)
+
+    def at_least_one(self, literals: npt.NDArray[np.int32]) -> None:
+        self.sink(literals.astype(np.int32, copy=False))
+
+    def at_most_one(self, literals: npt.NDArray[np.int32]) -> None:
+        match self.encoding.resolve(literals.shape[1]):
+            case AtMostOneEncoding.PAIRWISE:
+                self._pairwise(literals)
+            case AtMostOneEncoding.SEQUENTIAL:
+                self._sequential_counter(literals)
+            case AtMostOneEncoding.PRODUCT:
+                self._product(literals)
+            case AtMostOneEncoding.COMMANDER:
+                self._commander(literals)
+            case _:
+                raise NotImplementedError()
+
+    def exactly_one(self, literals: npt.NDArray[np.int32]) -> None:
+        self.at_most_one(literals)
+        self.at_least_one(literals)
+
+    def _pairwise(self, literals: npt.NDArray[np.int32]) -> None:
+        if literals.shape[1] < 2:
+            return
+        first, second = _pairs(literals.shape[1])
+        self._emit(-literals[:, first], -literals[:, second])
+
+    def _sequential_counter(self, literals: npt.NDArray[np.int32]) -> None:
+        groups, size = literals.shape
+        if size < 2:
+            return
+        counters = self._new_variables(groups, size - 1)
+        self._emit(-literals[:, :1], counters[:, :1])
+        self._emit(-literals[:, 1:-1], counters[:, 1:])
+        self._emit(-counters[:, :-1], counters[:, 1:])
+        self._emit(-literals[:, 1:-1], -counters[:, :-1])
+        self._emit(-literals[:, -1:], -counters[:, -1:])
+
+    def _product(self, literals: npt.NDArray[np.int32]) -> None:
+        groups, size = literals.shape
+        if size <= PAIRWISE_LIMIT:
+            self._pairwise(literals)
+            return
+        cols = math.ceil(math.sqrt(size))
+        rows = math.ceil(size / cols)
+        row_vars = self._new_variables(groups, rows)
+        col_vars = self._new_variables(groups, cols)
+        positions = np.arange(size)
+        self._emit(-literals, row_vars[:, positions // cols])
+        self._emit(-literals, col_vars[:, positions % cols])
+        self._product(row_vars)
+        self._product(col_vars)
+
+    def _commander(self, literals: npt.NDArray[np.int32]) -> None:
+        groups, size = literals.shape
+        if size <= PAIRWISE_LIMIT:
+            self._pairwise(literals)
+            return
+        full = size // COMMANDER_GROUP_SIZE * COMMANDER_GROUP_SIZE
+        subgroups = literals[:, :full].reshape(-1, COMMANDER_GROUP_SIZE)
+        commanders = [self._command(subgroups).reshape(groups, -1)]
+        if size - full == 1:
+            commanders.append(literals[:, full:])
+        elif size - full > 1:
+            commanders.append(self._command(literals[:, full:]))
+        self._commander(np.concatenate(commanders, axis=1))
+
+    def _command(self, literals: npt.NDArray[np.int32]) -> npt.NDArray[np.int32]:
+        commander = self._new_variables(literals.shape[0], 1)
+        self._pairwise(literals)
+        self._emit(-literals, commander)
+        self.sink(np.concatenate([-commander, literals], axis=1))
+        return commander
+
+
+@dataclass
+class VectorizedSudokuCNF:
+    """
+    Array-backed counterpart of `SudokuCNF`.
+    It produces the same clauses (up to the numbering of auxiliary variables
+    and the order of the clauses), but builds them with NumPy operations
+    instead of creating a Python object per proposition.
+
+    Usage
+    -----
+    Encode a sudoku `grid: SudokuGrid`:
+
+        `sudoku_cnf = VectorizedSudokuCNF.encode(grid)`
+
+    Either build the `cnf` property or append the blocks into a solver:
+
+        `for block in sudoku_cnf.clauses: solver.append_formula(block.tolist())`
+
+    The clauses can also be streamed straight into a solver,
+    without keeping the formula in memory:
+
+        `sudoku_cnf = VectorizedSudokuCNF.stream(grid, solver_sink)`
+
+    Decode the solution with:
+
+        `solution_grid = sudoku_cnf.decode(solver.get_model())`
+    """
+
+    clauses: list[ClauseBlock]
+    """blocks of clauses, every block is a 2D array of clauses of the same width"""
+    propositions: PropositionTable
+    """table of propositions, proposition `i` is stored at index `i - 1`"""
+    puzzle: SudokuGrid
+    """a puzzle encoded in the CNF"""
+    top_id: int
+    """the largest variable identifier in use"""
+
+    @property
+    def cnf(self) -> CNF:
+        """
+        Returns
+        --------
+        cnf: CNF
+            the clauses as a python-sat formula
+        """
+        return CNF(from_clauses=self.clause_lists())
+
+    def clause_lists(self) -> list[list[int]]:
+        """
+        Returns
+        --------
+        clauses: list[list[int]]
+            the clauses as plain python lists
+        """
+        return [clause for block in self.clauses for clause in block.tolist()]
+
+    @staticmethod
+    def encode(
+        puzzle: SudokuGrid,
+        encoding: AtMostOneEncoding = AtMostOneEncoding.AUTO,
+        candidates: Candidates | None = None,
+    ) -> VectorizedSudokuCNF:
+        """
+        Encodes a given sudoku puzzle into its Conjunctive Normal Form.
+
+        Parameters
+        ----------
+        puzzle: SudokuGrid
+            a sudoku puzzle to be encoded
+        encoding: AtMostOneEncoding
+            encoding of the "at most one" constraints
+        candidates: Candidates | None
+            restrictions of the cell values
+
+        Returns
+        -------
+        encoding: VectorizedSudokuCNF
+            Conjunctive Normal Form encoding of the specified puzzle
+        """
+        clauses: list[ClauseBlock] = []
+        sudoku_cnf = VectorizedSudokuCNF.stream(
+            puzzle, clauses.append, encoding, candidates
+        )
+        sudoku_cnf.clauses = clauses
+        return sudoku_cnf
+
+    @staticmethod
+    def stream(
+        puzzle: SudokuGrid,
+        sink: ClauseSink,
+        encoding: AtMostOneEncoding = AtMostOneEncoding.AUTO,
+        candidates: Candidates | None = None,
+    ) -> VectorizedSudokuCNF:
+        """
+        Encodes a given sudoku puzzle passing every block of clauses
+        to the `sink` as soon as it is built. The clauses are not kept,
+        the returned encoding can only be used to decode a solution.
+
+        Parameters
+        ----------
+        puzzle: SudokuGrid
+            a sudoku puzzle to be encoded
+        sink: ClauseSink
+            a consumer of the clause blocks
+        encoding: AtMostOneEncoding
+            encoding of the "at most one" constraints
+        candidates: Candidates | None
+            restrictions of the cell values
+
+        Returns
+        -------
+        encoding: VectorizedSudokuCNF
+            Conjunctive Normal Form encoding without the clauses
+        """
+        propositions = PropositionTable.from_grid(puzzle, candidates)
+        size = puzzle.size
+        rows = propositions.rows.astype(np.int64)
+        cols = propositions.cols.astype(np.int64)
+        blocks = propositions.blocks.astype(np.int64)
+        vals = propositions.vals.astype(np.int64) - 1
+
+        encoder = _ArrayEncoder(encoding, len(propositions), sink)
+        for cell_group in _groups(rows * size + cols):
+            encoder.exactly_one(cell_group)
+        for unit in (rows, cols, blocks):
+            for unit_group in _groups(unit * size + vals):
+                encoder.at_most_one(unit_group)
+        return VectorizedSudokuCNF([], propositions, puzzle, encoder.top_id)
+
+    def decode(self, results: list[int]) -> SudokuGrid:
+        """
+        Decodes a SAT solution into a filled sudoku grid.
+
+        Parameters
+        ----------
+        results: list[int]
+            list of true propositions (their identifiers, to be exact)
+
+        Returns
+        -------
+        solution: SudokuGrid
+            a sudoku grid filled according the SAT results
+        """
+        return self.propositions.decode(self.puzzle, results)
@@ -0,0 +1,31 @@
+import asyncio
+from timeit import default_timer as timer
+import numpy as np
+import pytest
+from src.model.grid import SudokuGrid
+from src.solvers.async_solving import AsyncSolverPool, ExecutorKind
+from src.solvers.solver_type import SudokuSolverType
+
+TOLERANCE = 0.5
+"""how long (in seconds) a cancelled solver may take to stop"""
+
+
+@pytest.mark.parametrize("kind", list(ExecutorKind))
+def test_cancel_stops_the_solver(kind):
+    empty = SudokuGrid(np.zeros((81, 81), dtype=np.uint))
+    puzzle = SudokuGrid.from_file("puzzles/sudokuN3num0.txt")
+
+    async def cancel_and_reuse() -> SudokuGrid | None:
+        async with AsyncSolverPool(kind, max_concurrency=1) as pool:
+            # a warm worker, so the cancellation is not held up by its start
+            await pool.solve(puzzle, SudokuSolverType.SAT, 10.0)
+            solving = asyncio.create_task(pool.solve(empty, SudokuSolverType.SAT, 60.0))
+            await asyncio.sleep(0.5)
+            start = timer()
+            solving.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await solving
+            assert timer() - start < TOLERANCE
+            return await pool.solve(puzzle, SudokuSolverType.SAT, 10.0)
+
+    assert asyncio.run(cancel_and_reuse()) is not None
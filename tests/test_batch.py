@@ -0,0 +1,46 @@
+from typing import Iterator
+import pytest
+from src.model.grid import SudokuGrid
+from src.solvers.batch import SolveStatus, solve_stream
+from src.solvers.solver_type import SudokuSolverType
+
+
+@pytest.fixture
+def puzzles() -> list[SudokuGrid | Exception]:
+    grids = [SudokuGrid.from_file(f"puzzles/sudokuN3num{i}.txt") for i in range(3)]
+    return [*grids, ValueError("line 31: not a valid puzzle"), *grids]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_stream_is_read_within_the_window(puzzles, workers):
+    taken = []
+
+    def lazily() -> Iterator[SudokuGrid | Exception]:
+        for index, puzzle in enumerate(puzzles):
+            taken.append(index)
+            yield puzzle
+
+    window = 2
+    results = []
+    for result in solve_stream(
+        lazily(), SudokuSolverType.SAT, 10.0, workers, window, ordered=True
+    ):
+        assert len(taken) <= result.index + 1 + window
+        results.append(result)
+    assert [result.index for result in results] == list(range(len(puzzles)))
+    statuses = [result.status for result in results]
+    assert statuses == [SolveStatus.SOLVED] * 3 + [SolveStatus.ERROR] + statuses[:3]
+    assert results[3].error == "line 31: not a valid puzzle"
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_failing_stream_drains_first(puzzles, workers):
+    def failing() -> Iterator[SudokuGrid | Exception]:
+        yield from puzzles[:3]
+        raise OSError("the stream is gone")
+
+    results = []
+    with pytest.raises(OSError, match="the stream is gone"):
+        for result in solve_stream(failing(), SudokuSolverType.SAT, 10.0, workers):
+            results.append(result)
+    assert sorted(result.index for result in results) == [0, 1, 2]
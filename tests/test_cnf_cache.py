@@ -0,0 +1,54 @@
+import os
+import time
+import numpy as np
+import pytest
+from src.model.grid import SudokuGrid
+from src.solvers.at_most_one import AtMostOneEncoding
+from src.solvers.cnf_cache import STALE_TEMPORARY_AGE, CNFCache
+from src.solvers.solver_type import SudokuSolverType
+
+
+@pytest.fixture
+def puzzle() -> SudokuGrid:
+    return SudokuGrid.from_file("puzzles/sudokuN3num0.txt")
+
+
+def test_hit_matches_the_encoding(puzzle, tmp_path):
+    cache = CNFCache(tmp_path)
+    encoded = cache.encode(puzzle)
+    loaded = cache.load(puzzle, AtMostOneEncoding.AUTO)
+    assert loaded is not None
+    assert loaded.top_id == encoded.top_id
+    for cached, fresh in zip(loaded.clauses, encoded.clauses, strict=True):
+        assert (np.asarray(cached) == fresh).all()
+    assert SudokuSolverType.SAT.solve(puzzle, 10.0, cache=cache) is not None
+
+
+@pytest.mark.parametrize("damage", ["truncate", "garbage", "header"])
+def test_damaged_entry_is_a_miss(puzzle, tmp_path, damage):
+    cache = CNFCache(tmp_path)
+    cache.encode(puzzle)
+    (path,) = tmp_path.glob("*.cnf")
+    content = path.read_bytes()
+    match damage:
+        case "truncate":
+            path.write_bytes(content[: len(content) // 2])
+        case "garbage":
+            path.write_bytes(b"\0" * len(content))
+        case "header":
+            path.write_bytes(content[:9] + b"!" + content[10:])
+    assert cache.load(puzzle, AtMostOneEncoding.AUTO) is None
+    assert not path.exists()
+    assert SudokuSolverType.SAT.solve(puzzle, 10.0, cache=cache) is not None
+    assert path.exists()
+
+
+def test_stale_temporary_files_are_removed(puzzle, tmp_path):
+    stale, fresh = tmp_path / "stale.tmp", tmp_path / "fresh.tmp"
+    stale.write_bytes(b"")
+    fresh.write_bytes(b"")
+    old = time.time() - STALE_TEMPORARY_AGE - 1.0
+    os.utime(stale, (old, old))
+    CNFCache(tmp_path).encode(puzzle)
+    assert not stale.exists()
+    assert fresh.exists()
@@ -0,0 +1,24 @@
+import time
+import numpy as np
+import pytest
+from src.model.grid import SudokuGrid
+from src.solvers.solver_type import SudokuSolverType
+
+TOLERANCE = 0.3
+"""how long (in seconds) past its time limit a solver may take to stop"""
+
+
+def test_solves_with_workers():
+    puzzle = SudokuGrid.from_file("puzzles/sudokuN4num0.txt")
+    solution = SudokuSolverType.CUBE_AND_CONQUER.solve(puzzle, 30.0, workers=4)
+    assert solution is not None
+    assert (np.asarray(solution[:, :]) != 0).all()
+
+
+@pytest.mark.parametrize("size, time_limit", [(49, 0.2), (81, 0.3)])
+def test_time_limit_covers_the_encoding(size, time_limit):
+    empty = SudokuGrid(np.zeros((size, size), dtype=np.uint))
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        SudokuSolverType.CUBE_AND_CONQUER.solve(empty, time_limit, workers=4)
+    assert time.perf_counter() - start < time_limit + TOLERANCE
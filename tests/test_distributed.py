@@ -0,0 +1,118 @@
+import glob
+import json
+import multiprocessing
+from multiprocessing.queues import Queue
+import socket
+import threading
+import time
+import numpy as np
+import pytest
+from src.distributed.coordinator import coordinate
+from src.distributed.work_queue import AUTHKEY, CoordinatorManager
+from src.distributed.worker import work
+from src.model.grid import SudokuGrid
+from src.model.loading import load_many
+from src.solvers.batch import SolveStatus
+from src.solvers.solver_type import SudokuSolverType
+
+
+@pytest.fixture
+def puzzles() -> list[SudokuGrid]:
+    return load_many(sorted(glob.glob("puzzles/sudokuN3num*.txt"))) * 4
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def is_solution(puzzle: SudokuGrid, values: list[list[int]]) -> bool:
+    solution = np.array(values)
+    given = np.asarray(puzzle[:, :]) != 0
+    expected = np.arange(1, puzzle.size + 1)
+    blocks = [SudokuGrid(solution).block(i) for i in range(puzzle.size)]
+    return (solution[given] == np.asarray(puzzle[:, :])[given]).all() and all(
+        (np.sort(np.ravel(unit)) == expected).all()
+        for unit in [*solution, *solution.T, *blocks]
+    )
+
+
+def read_results(path) -> list[dict]:
+    with open(path) as lines:
+        return [json.loads(line) for line in lines]
+
+
+def stall(address: tuple[str, int], taken: Queue) -> None:
+    """Takes a chunk and never reports its results, like a hung worker."""
+    CoordinatorManager.register("work_queue")
+    manager = CoordinatorManager(address, AUTHKEY)
+    manager.connect()
+    chunk_id, _ = manager.work_queue().take("stalled")
+    taken.put(chunk_id)
+    time.sleep(60.0)
+
+
+def test_full_run(puzzles, tmp_path):
+    port = free_port()
+    for attempt in range(2):
+        output = tmp_path / f"results{attempt}.jsonl"
+        counts = coordinate(
+            puzzles,
+            SudokuSolverType.SAT,
+            10.0,
+            output,
+            ("127.0.0.1", port),
+            chunk_size=5,
+            local_workers=2,
+        )
+        assert counts == {SolveStatus.SOLVED: len(puzzles)}
+        results = read_results(output)
+        assert sorted(result["index"] for result in results) == list(
+            range(len(puzzles))
+        )
+        for result in results:
+            assert is_solution(puzzles[result["index"]], result["solution"])
+            assert result["worker"]
+
+
+def test_released_chunk(puzzles, tmp_path):
+    address = ("127.0.0.1", free_port())
+    output = tmp_path / "results.jsonl"
+    counts = {}
+
+    def run() -> None:
+        counts.update(
+            coordinate(
+                puzzles,
+                SudokuSolverType.SAT,
+                0.5,
+                output,
+                address,
+                chunk_size=4,
+                lease_grace=0.5,
+            )
+        )
+
+    coordinator = threading.Thread(target=run)
+    coordinator.start()
+    context = multiprocessing.get_context("spawn")
+    taken = context.Queue()
+    stalled = context.Process(target=stall, args=(address, taken))
+    stalled.start()
+    try:
+        stalled_chunk = taken.get(timeout=30.0)
+        worker = context.Process(target=work, args=(address, AUTHKEY, 1, "live"))
+        worker.start()
+        coordinator.join(timeout=60.0)
+        worker.join(timeout=10.0)
+    finally:
+        stalled.kill()
+        stalled.join()
+
+    assert not coordinator.is_alive()
+    assert counts == {SolveStatus.SOLVED: len(puzzles)}
+    results = read_results(output)
+    assert {result["worker"] for result in results} == {"live"}
+    assert {result["index"] for result in results} == set(range(len(puzzles)))
+    assert stalled_chunk == 0
@@ -0,0 +1,28 @@
+import pytest
+from src.model.grid import SudokuGrid
+from src.solvers.batch import SolveStatus, solve_many
+from src.solvers.feasibility import InfeasibilityReason, InfeasiblePuzzleError
+from src.solvers.solver_type import SudokuSolverType
+
+
+@pytest.fixture
+def unsolvable() -> SudokuGrid:
+    return SudokuGrid.from_file("puzzles/unsolvableN2num1.txt")
+
+
+def test_rejection_gives_the_reason(unsolvable):
+    for solve in (SudokuSolverType.SAT.solve, SudokuSolverType.SAT.count_solutions):
+        with pytest.raises(InfeasiblePuzzleError) as raised:
+            solve(unsolvable, 1.0)
+        infeasibility = raised.value.infeasibility
+        assert infeasibility.reason == InfeasibilityReason.DUPLICATE_GIVEN
+        assert infeasibility.value == 3
+        assert infeasibility.cells == ((0, 1), (1, 0))
+    assert not SudokuSolverType.SAT.is_unique(unsolvable, 1.0)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_reports_the_reason(unsolvable, workers):
+    (result,) = solve_many([unsolvable], SudokuSolverType.SAT, 1.0, workers=workers)
+    assert result.status == SolveStatus.UNSAT
+    assert result.error == "value 3 is given twice in a unit at (0, 1), (1, 0)"
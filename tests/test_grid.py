@@ -0,0 +1,18 @@
+import numpy as np
+import pytest
+from src.model.grid import SudokuGrid
+
+
+def test_signed_input_is_converted():
+    values = np.array([[1, 2, 3, 4], [3, 4, 1, 2], [2, 1, 4, 3], [4, 3, 2, 1]])
+    grid = SudokuGrid(values)
+    assert grid[:, :].dtype == np.uint
+    assert (np.asarray(grid.block(3)) == [[4, 3], [2, 1]]).all()
+
+
+@pytest.mark.parametrize("dtype", [np.int64, np.float64])
+def test_invalid_input_is_rejected(dtype):
+    values = np.zeros((4, 4), dtype=dtype)
+    values[0, 0] = -1
+    with pytest.raises(ValueError):
+        SudokuGrid(values)
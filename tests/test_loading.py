@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from src.model.grid import SudokuGrid
+from src.model.loading import PuzzleFormat, read_puzzles
+
+
+def grid_lines(path: str) -> list[str]:
+    with open(path) as file:
+        return file.read().splitlines()
+
+
+def test_reads_lines_and_grids():
+    grid = SudokuGrid.from_file("puzzles/sudokuN2num0.txt")
+    line = "".join(str(value) for value in np.asarray(grid[:, :]).flat)
+    for lines in ([line, "", line], [*grid_lines("puzzles/sudokuN2num0.txt")] * 2):
+        puzzles = list(read_puzzles(lines))
+        assert len(puzzles) == 2
+        for puzzle in puzzles:
+            assert isinstance(puzzle, SudokuGrid)
+            assert (np.asarray(puzzle[:, :]) == np.asarray(grid[:, :])).all()
+
+
+@pytest.mark.parametrize(
+    "separator, invalid, first_line",
+    [([""], ["1,2,x"], 11), ([], ["1,2,x"], 10), ([""], ["1,2,3,4", "1,2,3,4"], 11)],
+)
+def test_lenient_stream_resyncs(separator, invalid, first_line):
+    lines = [
+        *grid_lines("puzzles/sudokuN3num0.txt"),
+        *separator,
+        *invalid,
+        *separator,
+        *grid_lines("puzzles/sudokuN2num0.txt"),
+    ]
+    puzzles = list(read_puzzles(lines, strict=False))
+    assert [type(puzzle) for puzzle in puzzles] == [SudokuGrid, ValueError, SudokuGrid]
+    assert str(puzzles[1]) == f"line {first_line}: not a valid puzzle"
+    assert puzzles[2].size == 4
+    with pytest.raises(ValueError, match=f"line {first_line}"):
+        list(read_puzzles(lines, PuzzleFormat.GRIDS))
@@ -0,0 +1,54 @@
+import os
+import time
+import numpy as np
+import pytest
+from src.model.grid import SudokuGrid
+from src.solvers.cube_solver import CubeAndConquerSatSudokuSolver
+from src.solvers.portfolio_solver import STOP_GRACE
+from src.solvers.sat_solver import SatSudokuSolver
+from src.solvers.solver_type import SudokuSolverType
+
+TOLERANCE = 0.3
+"""how long (in seconds) past its time limit a solver may take to stop"""
+
+
+class FourWorkers(CubeAndConquerSatSudokuSolver):
+    def __init__(self, puzzle: SudokuGrid, time_limit: float):
+        super().__init__(puzzle, time_limit, workers=4)
+
+
+def forked_processes() -> set[int]:
+    """the other processes running the same command line as this one"""
+    with open("/proc/self/cmdline", "rb") as file:
+        command = file.read()
+    pids = set()
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit() or int(entry) == os.getpid():
+            continue
+        try:
+            with open(f"/proc/{entry}/cmdline", "rb") as file:
+                if file.read() == command:
+                    pids.add(int(entry))
+        except OSError:
+            pass
+    return pids
+
+
+def test_solves():
+    puzzle = SudokuGrid.from_file("puzzles/sudokuN3num0.txt")
+    solution = SudokuSolverType.PORTFOLIO.solve(puzzle, 10.0)
+    assert solution is not None
+    assert (np.asarray(solution[:, :]) != 0).all()
+
+
+@pytest.mark.parametrize("size, time_limit", [(49, 0.5), (81, 1.0)])
+def test_time_limit(size, time_limit):
+    empty = SudokuGrid(np.zeros((size, size), dtype=np.uint))
+    before = forked_processes()
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        SudokuSolverType.PORTFOLIO.solve(
+            empty, time_limit, solvers=[SatSudokuSolver, FourWorkers]
+        )
+    assert time.perf_counter() - start < time_limit + STOP_GRACE + TOLERANCE
+    assert forked_processes() <= before
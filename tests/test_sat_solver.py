@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from src.model.grid import SudokuGrid
+from src.solvers.sat_solver import SatSudokuSolver
+from src.solvers.sat_template import SatTemplatePool
+from src.solvers.solve_session import SolveSession
+
+
+@pytest.fixture
+def puzzle() -> SudokuGrid:
+    return SudokuGrid.from_file("puzzles/sudokuN3num0.txt")
+
+
+def test_hint_is_kept_out_of_the_template_solvers(puzzle):
+    solution = SatSudokuSolver.solve(puzzle, 10.0)
+    hinted = SatSudokuSolver.solve(puzzle, 10.0, hint=solution)
+    assert hinted is not None
+    assert (np.asarray(hinted[:, :]) == np.asarray(solution[:, :])).all()
+    with pytest.raises(ValueError):
+        SatSudokuSolver(puzzle, 10.0, template_pool=SatTemplatePool(), hint=solution)
+
+
+def test_session_edits(puzzle):
+    pool = SatTemplatePool()
+    session = SolveSession(puzzle, 10.0, pool=pool)
+    solution = session.solve()
+    assert solution is not None
+    row, col = np.argwhere(np.asarray(puzzle[:, :]) == 0)[0]
+    value = int(solution[row, col])
+    assert session.set((row, col), value) is not None
+    conflicting = int(puzzle[row, np.flatnonzero(np.asarray(puzzle[row, :]))[0]])
+    assert session.set((row, col), conflicting) is None
+    assert session.clear((row, col)) is not None
+    pool.close()
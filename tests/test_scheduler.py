@@ -0,0 +1,26 @@
+from timeit import default_timer as timer
+import numpy as np
+import pytest
+from src.model.grid import SudokuGrid
+from src.solvers.batch import SolveStatus
+from src.solvers.scheduler import solve_within
+from src.solvers.solver_type import SudokuSolverType
+
+TOLERANCE = 0.3
+"""how long (in seconds) past the deadline the results may take to come"""
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_no_result_after_the_deadline(workers):
+    easy = [SudokuGrid.from_file(f"puzzles/sudokuN3num{i}.txt") for i in range(3)]
+    hard = [SudokuGrid(np.zeros((81, 81), dtype=np.uint)) for _ in range(3)]
+    deadline = 1.5
+    start = timer()
+    results = []
+    for result in solve_within([*hard, *easy], SudokuSolverType.SAT, deadline, workers):
+        assert timer() - start < deadline + TOLERANCE
+        results.append(result)
+    assert sorted(result.index for result in results) == list(range(6))
+    statuses = {result.index: result.status for result in results}
+    assert all(statuses[index] == SolveStatus.SOLVED for index in range(3, 6))
+    assert all(statuses[index] == SolveStatus.TIMEOUT for index in range(3))
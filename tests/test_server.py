@@ -0,0 +1,77 @@
+import asyncio
+import numpy as np
+from src.model.grid import SudokuGrid
+from src.server.protocol import (
+    BINARY_MARKER,
+    REQUEST_HEADER,
+    RESPONSE_HEADER,
+    SolveRequest,
+    grid_nbytes,
+    response_from_binary,
+    response_from_json,
+)
+from src.server.server import SolveServer
+from src.solvers.batch import SolveStatus
+
+
+async def serving(server: SolveServer, path: str) -> asyncio.Task:
+    serve = asyncio.create_task(server.serve(path=path))
+    while not serve.done():
+        try:
+            _, writer = await asyncio.open_unix_connection(path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            await asyncio.sleep(0.05)
+            continue
+        writer.close()
+        break
+    return serve
+
+
+def test_protocol(tmp_path):
+    path = str(tmp_path / "sudoku.sock")
+    puzzles = [SudokuGrid.from_file(f"puzzles/sudokuN3num{i}.txt") for i in range(3)]
+    unsolvable = SudokuGrid.from_file("puzzles/unsolvableN2num1.txt")
+
+    async def exchange() -> None:
+        async with SolveServer(workers=1, warm_sizes=(9,), max_size=16) as server:
+            serve = await serving(server, path)
+            reader, writer = await asyncio.open_unix_connection(path)
+            for request_id, puzzle in enumerate(puzzles):
+                request = SolveRequest(request_id, puzzle)
+                binary = request_id % 2 == 1
+                writer.write(request.to_binary() if binary else request.to_json())
+            writer.write(b'{"id": 9, "puzzle": "not a grid"}\n')
+            writer.write(SolveRequest(10, unsolvable).to_json())
+            await writer.drain()
+
+            results = {}
+            while len(results) < len(puzzles) + 2:
+                first = await reader.readexactly(1)
+                if first == b"{":
+                    result = response_from_json(first + await reader.readline())
+                else:
+                    header = first + await reader.readexactly(RESPONSE_HEADER.size - 1)
+                    size = RESPONSE_HEADER.unpack(header)[-1]
+                    grid = await reader.readexactly(grid_nbytes(size))
+                    result = response_from_binary(header, grid)
+                results[result.index] = result
+            for request_id, puzzle in enumerate(puzzles):
+                assert results[request_id].status == SolveStatus.SOLVED
+                given = np.asarray(puzzle[:, :]) != 0
+                solution = np.asarray(results[request_id].solution[:, :])
+                assert (solution[given] == np.asarray(puzzle[:, :])[given]).all()
+            assert results[None].status == SolveStatus.ERROR
+            assert results[10].status == SolveStatus.UNSAT
+            assert "given twice" in results[10].error
+
+            # a binary request too large to read closes the connection
+            header = REQUEST_HEADER.pack(BINARY_MARKER, 11, 0, 1.0, 25)
+            writer.write(header)
+            await writer.drain()
+            response = await reader.readexactly(RESPONSE_HEADER.size)
+            assert response_from_binary(response, b"").status == SolveStatus.ERROR
+            assert await reader.read() == b""
+            writer.close()
+            serve.cancel()
+
+    asyncio.run(exchange())